@@ -4,12 +4,14 @@
 
 from controller import Supervisor
 import os
+import sys
 import random
 import struct
 import math
 import datetime
 import threading
 import ControllerUploader
+import MapLoader
 import glob
 
 # Create the instance of the supervisor class
@@ -563,6 +565,12 @@ if __name__ == '__main__':
     uploader.setDaemon(True)
     uploader.start()
 
+    # A base world has no map in it - build the scene from the compact map file given as the controller argument
+    if supervisor.getFromDef('WALLTILES') == None and len(sys.argv) > 1 and sys.argv[1] != "":
+        MapLoader.buildScene(supervisor, MapLoader.loadMap(MapLoader.mapPath(sys.argv[1])))
+        # Let the imported nodes be added before they are looked up
+        supervisor.step(32)
+
     # Empty list to contain checkpoints
     checkpoints = []
     # Empty list to contain swamps
@@ -0,0 +1,262 @@
+"""Compact Map Loader v1
+
+Builds the scene of a base world (a world with only the header and the supervisor) from a compact map
+file written by the world generator (WorldCreator.writeMapData). The map file holds one integer per
+tile with the values of its tile node, the humans and the obstacles, so it is far smaller than a full
+world file and one base world can run any generated map.
+
+The nodes are the same as the generator writes in a world file. The template for each kind of node is
+formatted once here, and each tile node is pre-rendered once for every different tile code so only the
+position and id are filled in for each tile. Each group is imported as one node string.
+
+The templates and tile code bits here are copies of the world generator's, so world_gen/SelfCheck.py checks
+the scene built from a compact map is the same text as the groups of the world file for the same seed.
+"""
+
+import json
+import os
+
+# Version of the compact map format this loader reads (WorldCreator.mapFormat)
+mapFormat = 1
+
+# First bit of each part of a tile code (must match WorldCreator - checked by world_gen/SelfCheck.py)
+codeWalls = 0
+codeFloor = 4
+codeCorners = 5
+codeExternals = 9
+codeNotchLeft = 13
+codeNotchRight = 14
+codeNotchDirection = 15
+codeSpecial = 18
+
+# Rotation of the notch for each direction (4 - no notch)
+notchRotations = [3.14159, 1.57079, 0, -1.57079, 0]
+
+# Node templates (the same as the world generator templates - checked by world_gen/SelfCheck.py)
+groupTemplate = '''    DEF {1} Group {{
+        children [
+          {0}
+        ]
+    }}
+'''
+
+tileTemplate = '''DEF {0} worldTile {{
+  xPos {1}
+  zPos {2}
+  floor {3}
+  topWall {4}
+  rightWall {5}
+  bottomWall {6}
+  leftWall {7}
+  topLeftCorner {11}
+  bottomLeftCorner {10}
+  bottomRightCorner {9}
+  topRightCorner {8}
+  topExternal {12}
+  rightExternal {13}
+  bottomExternal {14}
+  leftExternal {15}
+  notch "{16}"
+  notchRotation {17}
+  start {18}
+  trap {19}
+  checkpoint {20}
+  swamp {21}
+  width {22}
+  height {23}
+  id "{24}"
+  xScale {25}
+  yScale {26}
+  zScale {27}
+}}
+'''
+
+boundsTemplate = '''DEF boundary Group {{
+  children [
+    DEF {0}{1}min Transform {{
+          translation {2} {6} {3}
+    }}
+    DEF {0}{1}max Transform {{
+          translation {4} {6} {5}
+    }}
+  ]
+}}
+'''
+
+obstacleTemplate = '''		DEF OBSTACLE{0} Solid {{
+            translation {4} {5} {6}
+			rotation 0 1 0 {7}
+            children [
+                Shape {{
+                    appearance Appearance {{
+						material Material {{
+						diffuseColor 0.45 0.45 0.45
+						}}
+                    }}
+                    geometry DEF OBSTACLEBOX{0} Box {{
+						size {1} {2} {3}
+                    }}
+                }}
+            ]
+            name "obstacle{0}"
+            boundingObject USE OBSTACLEBOX{0}
+	    recognitionColors [
+			0.45 0.45 0.45
+		]
+        }}
+'''
+
+debrisTemplate = '''		DEF DEBRIS{0} Solid {{
+            translation {4} {5} {6}
+			rotation 0 1 0 {7}
+            children [
+                Shape {{
+                    appearance Appearance {{
+						material Material {{
+						diffuseColor 0.45 0.45 0.45
+						}}
+                    }}
+                    geometry DEF OBSTACLEBOX{0} Box {{
+						size {1} {2} {3}
+                    }}
+                }}
+            ]
+            name "debris{0}"
+            boundingObject USE OBSTACLEBOX{0}
+	    recognitionColors [
+			0.45 0.45 0.45
+		]
+        }}
+'''
+
+visualHumanTemplate = '''Victim {{
+    translation {0} 0 {1}
+    rotation 0 1 0 {2}
+    name "Victim{3}"
+    type "{4}"
+    scoreWorth {5}
+}}
+'''
+
+thermalHumanTemplate = '''HeatVictim {{
+    translation {0} 0 {1}
+    rotation 0 1 0 {2}
+    name "HeatVictim{3}"
+    scoreWorth {4}
+}}
+'''
+
+
+def mapPath(argument: str) -> str:
+    '''Get the path of a map file given to the supervisor (relative paths are from the worlds folder)'''
+    if os.path.isabs(argument):
+        return argument
+    path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(path, "..", "..", "worlds", argument)
+
+
+def loadMap(path: str) -> dict:
+    '''Read a compact map file'''
+    mapFile = open(path, "r")
+    mapData = json.load(mapFile)
+    mapFile.close()
+    if mapData.get("format") != mapFormat:
+        raise ValueError(path + " is compact map format " + str(mapData.get("format")) + " but this supervisor reads format " + str(mapFormat))
+    return mapData
+
+
+def vrmlBool(code: int, bit: int) -> str:
+    '''VRML text for one bit of a tile code'''
+    if code >> bit & 1:
+        return "TRUE"
+    return "FALSE"
+
+
+def renderTile(code: int, width: int, height: int, scale: list) -> list:
+    '''Format the tile node for a tile code, returns the text either side of the x position, z position and id'''
+    name = "TILE"
+    if code >> codeSpecial & 1:
+        name = "START_TILE"
+    notch = ""
+    if code >> codeNotchLeft & 1:
+        notch = "left"
+    if code >> codeNotchRight & 1:
+        notch = "right"
+    walls = [vrmlBool(code, codeWalls + i) for i in range(4)]
+    corners = [vrmlBool(code, codeCorners + i) for i in range(4)]
+    externals = [vrmlBool(code, codeExternals + i) for i in range(4)]
+    special = [vrmlBool(code, codeSpecial + i) for i in range(4)]
+    text = tileTemplate.format(name, "\0", "\0", vrmlBool(code, codeFloor), *walls, *corners, *externals, notch, notchRotations[code >> codeNotchDirection & 7], *special, width, height, "\0", scale[0], scale[1], scale[2])
+    return text.split("\0")
+
+
+def groupNode(name: str, children: list) -> str:
+    '''Format a group node containing the formatted children'''
+    groupStart, groupEnd = groupTemplate.format("\0", name).split("\0")
+    return groupStart + "".join(children) + groupEnd
+
+
+def sceneGroups(mapData: dict) -> list:
+    '''Get the group nodes of the scene for a map, returns [name, node string] in the order of a generated world file'''
+    width = mapData["width"]
+    height = mapData["height"]
+    scale = mapData["scale"]
+    tiles = mapData["tiles"]
+    floorPos = -0.075 * scale[1]
+
+    # Upper left corner to start placing tiles from
+    startX = -(width * (0.3 * scale[0]) / 2.0)
+    startZ = -(height * (0.3 * scale[2]) / 2.0)
+
+    # Pre-rendered tile node for each different tile code
+    rendered = {}
+    tileNodes = []
+    # Boundaries of special tiles [start, trap, checkpoint, swamp]
+    bounds = [[], [], [], []]
+    boundNames = ["start", "trap", "checkpoint", "swamp"]
+
+    tileId = 0
+    for x in range(width):
+        for z in range(height):
+            code = tiles[z][x]
+            parts = rendered.get(code)
+            if parts == None:
+                parts = renderTile(code, width, height, scale)
+                rendered[code] = parts
+            tileNodes.append(parts[0] + str(x) + parts[1] + str(z) + parts[2] + str(tileId) + parts[3])
+            # Checkpoint, trap, start and swamp boundaries (in the same order as the world file)
+            for i in [2, 1, 0, 3]:
+                if code >> (codeSpecial + i) & 1:
+                    group = bounds[i]
+                    group.append(boundsTemplate.format(boundNames[i], len(group), (x * 0.3 * scale[0] + startX) - (0.15 * scale[0]), (z * 0.3 * scale[2] + startZ) - (0.15 * scale[2]), (x * 0.3 * scale[0] + startX) + (0.15 * scale[0]), (z * 0.3 * scale[2] + startZ) + (0.15 * scale[2]), floorPos))
+            tileId = tileId + 1
+
+    obstacles = [obstacleTemplate.format(i, *values) for i, values in enumerate(mapData["obstacles"])]
+    debris = [debrisTemplate.format(i, *values) for i, values in enumerate(mapData["debris"])]
+
+    humans = []
+    for i, human in enumerate(mapData["humans"]):
+        humanX, humanZ, rotation, humanType, score = human
+        if humanType == "thermal":
+            humans.append(thermalHumanTemplate.format(humanX, humanZ, rotation, i, score))
+        else:
+            humans.append(visualHumanTemplate.format(humanX, humanZ, rotation, i, humanType, score))
+
+    groups = [["WALLTILES", tileNodes], ["CHECKPOINTBOUNDS", bounds[2]], ["TRAPBOUNDS", bounds[1]], ["STARTBOUNDS", bounds[0]],
+              ["SWAMPBOUNDS", bounds[3]], ["OBSTACLES", obstacles], ["DEBRIS", debris], ["HUMANGROUP", humans]]
+    return [[name, groupNode(name, children)] for name, children in groups]
+
+
+def buildScene(supervisor, mapData: dict) -> None:
+    '''Import the scene for a map into the world before the supervisor node (one import for each group)'''
+    children = supervisor.getRoot().getField("children")
+    # Find the supervisor so the groups are in the same place as in a generated world file
+    supervisorId = supervisor.getSelf().getId()
+    position = children.getCount()
+    for i in range(children.getCount()):
+        if children.getMFNode(i).getId() == supervisorId:
+            position = i
+            break
+    for name, node in sceneGroups(mapData):
+        children.importMFNodeFromString(position, node)
+        position = position + 1
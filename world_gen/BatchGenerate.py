@@ -0,0 +1,211 @@
+"""Map Generation Batch Generator v4
+
+Generates many worlds without the GUI, one per seed, spread across a pool of processes.
+Each world is saved as <name>_<seed>.wbt with a preview image (<name>_<seed>.png) and a metadata
+file (<name>_<seed>.json) holding the parameters, how much of each feature was placed and the maze
+metrics (see MazeMetrics).
+
+The same generation and file creation functions as the GUI are used, so a seed always gives the
+same world whichever process generates it. With --cache, worlds that have already been generated
+with the same parameters and seed are copied from a WorldCache instead of being generated again.
+
+With --merge-walls the world files are written with merged wall and floor boxes (see MergedWalls).
+With --compact a compact map file (<name>_<seed>.map.json) is saved instead of the world file, to be
+loaded into the GeneratedMap base world by the supervisor.
+With --stream very large mazes are generated row by row straight into the world file (see
+GenerateMap.generateStreamedWorld). Only the maze and start tile are made (no checkpoints, traps, swamps,
+humans or obstacles, no preview image or maze metrics) and the worlds are not cached.
+
+Example (100 worlds from seed 0 into the nightly folder):
+    python BatchGenerate.py --size 10 8 --seeds 0 100 --output nightly
+
+Changelog:
+ V1:
+ - Added headless batch generation with a process pool
+ V2:
+ - Added world cache
+ V3:
+ - Added maze metrics and difficulty to the metadata
+ V4:
+ - Added merged wall world files
+ - Added compact map files
+ - Added streamed worlds for very large mazes
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import GenerateMap
+import MazeEngines
+import MazeMetrics
+import WorldCache
+
+#Changes whenever the metadata saved for a world changes (so cached worlds are regenerated)
+metadataVersion = 3
+
+
+def worldPaths (outputDir: str, name: str, seed: int, compact = False) -> list:
+    '''Get the [world file, preview image, metadata] paths for a seed (the world file is a compact map if compact is set)'''
+    base = os.path.join(outputDir, name + "_" + str(seed))
+    worldExtension = ".wbt"
+    if compact:
+        worldExtension = ".map.json"
+    return [base + worldExtension, base + ".png", base + ".json"]
+
+
+def generateStreamedSeed (seed: int, parameters: dict, outputDir: str, name: str) -> dict:
+    '''Generate a streamed world for one seed (maze and start tile only), returns its metadata'''
+    worldPath, imagePath, dataPath = worldPaths(outputDir, name, seed)
+    key = WorldCache.worldKey(GenerateMap.generatorVersion + " metadata " + str(metadataVersion), parameters, seed)
+    startPos = GenerateMap.generateStreamedWorld(parameters["width"], parameters["height"], worldPath, random.Random(seed))
+    metadata = {"seed": seed,
+                "key": key,
+                "parameters": parameters,
+                "start": {"tile": startPos[0], "direction": startPos[1]},
+                "files": {"world": os.path.basename(worldPath)}}
+    saveMetadata(metadata, dataPath)
+    return metadata
+
+
+def generateSeed (seed: int, parameters: dict, outputDir: str, name: str, cache = None) -> dict:
+    '''Generate and save the world for one seed (or copy it from the cache), returns its metadata'''
+    #Streamed worlds are written straight to the output (never cached)
+    if parameters.get("stream", False):
+        return generateStreamedSeed(seed, parameters, outputDir, name)
+    worldPath, imagePath, dataPath = worldPaths(outputDir, name, seed, parameters.get("compactMap", False))
+    key = WorldCache.worldKey(GenerateMap.generatorVersion + " metadata " + str(metadataVersion), parameters, seed)
+    if cache != None:
+        cached = cache.lookup(key)
+        #If this world has been generated before
+        if cached != None:
+            shutil.copyfile(cached[0], worldPath)
+            shutil.copyfile(cached[1], imagePath)
+            dataFile = open(cached[2], "r")
+            metadata = json.load(dataFile)
+            dataFile.close()
+            metadata["files"] = {"world": os.path.basename(worldPath), "image": os.path.basename(imagePath)}
+            saveMetadata(metadata, dataPath)
+            return metadata
+
+    #Generate a plan with the values from the seed (same as the GUI)
+    world, obstacles, startPos, visual, thermal, placedBulky, placedDebris = GenerateMap.generatePlan(parameters["width"], parameters["height"], parameters["checkpoints"], parameters["traps"], parameters["bulky"], parameters["debris"], parameters["swamps"], parameters["visual"], parameters["thermal"], parameters["engine"], imagePath, seed)
+    #Generate and save the world file (human positions on their walls are also picked from the seed)
+    GenerateMap.generateWorldFile(world, obstacles, startPos, None, worldPath, parameters.get("mergeWalls", False), random.Random(seed))
+
+    metrics = MazeMetrics.measure(world, startPos[0])
+    metadata = {"seed": seed,
+                "key": key,
+                "parameters": parameters,
+                "start": {"tile": startPos[0], "direction": startPos[1]},
+                "placed": {"visual": visual, "thermal": thermal, "bulky": placedBulky, "debris": placedDebris},
+                "metrics": metrics,
+                "difficulty": MazeMetrics.difficulty(world, metrics),
+                "files": {"world": os.path.basename(worldPath), "image": os.path.basename(imagePath)}}
+    saveMetadata(metadata, dataPath)
+
+    #Keep a copy for the next time it is requested
+    if cache != None:
+        cache.store(key, worldPath, imagePath, dataPath)
+
+    return metadata
+
+
+def saveMetadata (metadata: dict, dataPath: str) -> None:
+    '''Save the metadata for a world as JSON'''
+    dataFile = open(dataPath, "w")
+    json.dump(metadata, dataFile, indent = 2)
+    dataFile.close()
+
+
+def generateBatch (seeds: list, parameters: dict, outputDir: str, name = "world", workers = None, cache = None) -> list:
+    '''Generate a world for every seed using a pool of processes, returns the metadata for each (in seed order)
+    If a WorldCache is given worlds are taken from it when they have been generated before'''
+    os.makedirs(outputDir, exist_ok = True)
+
+    #Single process - no need for a pool
+    if workers == 1:
+        results = [generateSeed(seed, parameters, outputDir, name, cache) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers = workers) as pool:
+            jobs = [pool.submit(generateSeed, seed, parameters, outputDir, name, cache) for seed in seeds]
+            results = [job.result() for job in jobs]
+
+    #Apply the cache limits once the whole batch is in
+    if cache != None:
+        cache.evict()
+    return results
+
+
+def addGenerationArguments (parser) -> None:
+    '''Add the generation parameters, output and cache options to a command line parser'''
+    parser.add_argument("--size", type = int, nargs = 2, default = [10, 8], metavar = ("WIDTH", "HEIGHT"), help = "size of the maze in tiles")
+    parser.add_argument("--checkpoints", type = int, default = 3)
+    parser.add_argument("--traps", type = int, default = 3)
+    parser.add_argument("--swamps", type = int, default = 2)
+    parser.add_argument("--visual", type = int, default = 4, help = "number of visual humans")
+    parser.add_argument("--thermal", type = int, default = 4, help = "number of thermal humans")
+    parser.add_argument("--bulky", type = int, default = 2, help = "number of bulky obstacles")
+    parser.add_argument("--debris", type = int, default = 10)
+    parser.add_argument("--engine", default = MazeEngines.defaultEngine, choices = MazeEngines.engineNames(), help = "maze carving algorithm")
+    parser.add_argument("--output", default = "generatedWorlds", help = "folder to save the worlds in")
+    parser.add_argument("--name", default = "world", help = "start of each file name")
+    parser.add_argument("--workers", type = int, default = None, help = "number of processes (defaults to the number of cores)")
+    parser.add_argument("--cache", default = None, help = "folder to reuse previously generated worlds from")
+    parser.add_argument("--cache-size", type = float, default = None, help = "largest the cache can get in megabytes")
+    parser.add_argument("--cache-age", type = float, default = None, help = "days a cached world is kept since it was last used")
+    parser.add_argument("--merge-walls", action = "store_true", help = "join lined up walls and floors into fewer, longer nodes")
+    parser.add_argument("--compact", action = "store_true", help = "save compact map files for the GeneratedMap base world instead of world files")
+    parser.add_argument("--stream", action = "store_true", help = "write very large mazes row by row (maze and start tile only)")
+
+
+def parametersFromArguments (args) -> dict:
+    '''Get the generation parameters from parsed command line arguments'''
+    parameters = {"width": args.size[0], "height": args.size[1],
+                  "checkpoints": args.checkpoints, "traps": args.traps, "swamps": args.swamps,
+                  "visual": args.visual, "thermal": args.thermal,
+                  "bulky": args.bulky, "debris": args.debris,
+                  "engine": args.engine}
+    #Only added when set so worlds cached before it existed keep the same key
+    if args.merge_walls:
+        parameters["mergeWalls"] = True
+    if args.compact:
+        parameters["compactMap"] = True
+    if args.stream:
+        parameters["stream"] = True
+    return parameters
+
+
+def cacheFromArguments (args):
+    '''Get the world cache from parsed command line arguments (None if no cache was asked for)'''
+    if args.cache == None:
+        return None
+    maxBytes = None
+    if args.cache_size != None:
+        maxBytes = int(args.cache_size * 1024 * 1024)
+    maxAge = None
+    if args.cache_age != None:
+        maxAge = args.cache_age * 24 * 60 * 60
+    return WorldCache.WorldCache(args.cache, maxBytes, maxAge)
+
+
+def parseArguments (arguments = None):
+    '''Read the generation parameters from the command line'''
+    parser = argparse.ArgumentParser(description = "Generate worlds without the GUI, one for each seed")
+    addGenerationArguments(parser)
+    parser.add_argument("--seeds", type = int, nargs = 2, default = [0, 1], metavar = ("FIRST", "COUNT"), help = "generate COUNT worlds starting at seed FIRST")
+    return parser.parse_args(arguments)
+
+
+def main (arguments = None) -> None:
+    '''Run a batch generation from the command line'''
+    args = parseArguments(arguments)
+    seeds = list(range(args.seeds[0], args.seeds[0] + args.seeds[1]))
+    generateBatch(seeds, parametersFromArguments(args), args.output, args.name, args.workers, cacheFromArguments(args))
+    print("Generated " + str(len(seeds)) + " worlds in " + args.output)
+
+
+if __name__ == "__main__":
+    main()
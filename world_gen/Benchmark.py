@@ -0,0 +1,194 @@
+"""Map Generation Benchmark v1
+
+Times every stage of a generation (maze carving, loop opening, each placement stage, linear walls,
+obstacles, the map image and the world file) across a sweep of maze sizes and feature densities.
+
+Each case is run several times and the fastest time for each stage is kept (the least affected by
+anything else running). Peak memory is measured in one extra run with tracemalloc, which is kept
+separate as it slows everything down.
+
+The report is written as JSON and compared against a stored baseline report - any stage that has
+become slower or uses more memory than the tolerance allows is listed and the exit code is 1.
+
+Example:
+    python Benchmark.py --output report.json --baseline benchmarkBaseline.json
+    python Benchmark.py --baseline benchmarkBaseline.json --update-baseline
+
+Changelog:
+ V1:
+ - Added stage benchmark with baseline comparison
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import GenerateMap
+import MazeEngines
+import Profiler
+
+#Maze sizes to sweep [width, height]
+defaultSizes = [[5, 5], [10, 8], [20, 20], [40, 40]]
+quickSizes = [[5, 5], [10, 8]]
+
+#Number of each feature per tile of the maze for each density
+densities = {"low": {"checkpoints": 0.02, "traps": 0.02, "swamps": 0.02, "visual": 0.02, "thermal": 0.02, "bulky": 0.01, "debris": 0.05},
+             "medium": {"checkpoints": 0.05, "traps": 0.05, "swamps": 0.05, "visual": 0.05, "thermal": 0.05, "bulky": 0.03, "debris": 0.1},
+             "high": {"checkpoints": 0.1, "traps": 0.1, "swamps": 0.1, "visual": 0.15, "thermal": 0.15, "bulky": 0.08, "debris": 0.2}}
+
+#Timings shorter than this (seconds) are too noisy to call a regression
+minimumSeconds = 0.005
+#Memory differences smaller than this (bytes) are ignored
+minimumBytes = 64 * 1024
+
+
+def caseParameters (width: int, height: int, density: str, engine: str) -> dict:
+    '''Get the generation parameters for a size and density'''
+    tiles = width * height
+    parameters = {"width": width, "height": height, "engine": engine}
+    for feature, perTile in densities[density].items():
+        parameters[feature] = max(1, int(round(tiles * perTile)))
+    return parameters
+
+
+def runCase (parameters: dict, seed: int, folder: str) -> None:
+    '''Generate and save one world (output is thrown away)'''
+    imagePath = os.path.join(folder, "map.png")
+    worldPath = os.path.join(folder, "world.wbt")
+    #Generation prints progress - keep the benchmark output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        world, obstacles, startPos = GenerateMap.generatePlan(parameters["width"], parameters["height"], parameters["checkpoints"], parameters["traps"], parameters["bulky"], parameters["debris"], parameters["swamps"], parameters["visual"], parameters["thermal"], parameters["engine"], imagePath, seed)[:3]
+        GenerateMap.generateWorldFile(world, obstacles, startPos, None, worldPath)
+
+
+def benchmarkCase (parameters: dict, repeats: int, seed: int, folder: str) -> dict:
+    '''Time each stage of a case (fastest of the repeats) and measure its peak memory'''
+    stages = {}
+    for i in range(0, repeats):
+        with Profiler.StageProfiler() as profiler:
+            runCase(parameters, seed + i, folder)
+        for name, result in profiler.report().items():
+            if name not in stages or result["seconds"] < stages[name]["seconds"]:
+                stages[name] = {"seconds": result["seconds"], "peakBytes": 0}
+
+    #Separate run for memory as tracing slows down every stage
+    with Profiler.StageProfiler(trackMemory = True) as profiler:
+        runCase(parameters, seed, folder)
+    for name, result in profiler.report().items():
+        stages.setdefault(name, {"seconds": 0.0, "peakBytes": 0})["peakBytes"] = result["peakBytes"]
+
+    return {"stages": stages, "totalSeconds": sum(stage["seconds"] for stage in stages.values())}
+
+
+def runBenchmark (sizes: list, densityNames: list, repeats = 3, seed = 0, engine = MazeEngines.defaultEngine) -> dict:
+    '''Run every size and density combination, returns the report'''
+    report = {"generatorVersion": GenerateMap.generatorVersion,
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "repeats": repeats,
+              "seed": seed,
+              "cases": {}}
+    with tempfile.TemporaryDirectory() as folder:
+        #Untimed run so one off start up costs (imports, first renders) are not put on the first case
+        runCase(caseParameters(sizes[0][0], sizes[0][1], densityNames[0], engine), seed, folder)
+        for width, height in sizes:
+            for density in densityNames:
+                name = str(width) + "x" + str(height) + "-" + density
+                parameters = caseParameters(width, height, density, engine)
+                result = benchmarkCase(parameters, repeats, seed, folder)
+                result["parameters"] = parameters
+                report["cases"][name] = result
+                print(name + ": " + str(round(result["totalSeconds"] * 1000, 1)) + "ms")
+    return report
+
+
+def compareReports (report: dict, baseline: dict, tolerance: float) -> list:
+    '''Compare a report to a baseline, returns a list of descriptions of every regression'''
+    regressions = []
+    for name, case in baseline["cases"].items():
+        if name not in report["cases"]:
+            continue
+        current = report["cases"][name]["stages"]
+        for stageName, old in case["stages"].items():
+            if stageName not in current:
+                continue
+            new = current[stageName]
+            #Slower than allowed
+            if new["seconds"] > old["seconds"] * (1 + tolerance) and new["seconds"] - old["seconds"] > minimumSeconds:
+                regressions.append(name + " " + stageName + ": " + str(round(old["seconds"] * 1000, 2)) + "ms -> " + str(round(new["seconds"] * 1000, 2)) + "ms")
+            #More memory than allowed
+            if new["peakBytes"] > old["peakBytes"] * (1 + tolerance) and new["peakBytes"] - old["peakBytes"] > minimumBytes:
+                regressions.append(name + " " + stageName + ": peak " + str(old["peakBytes"]) + " -> " + str(new["peakBytes"]) + " bytes")
+    return regressions
+
+
+def loadReport (path: str) -> dict:
+    '''Read a report from a JSON file'''
+    reportFile = open(path, "r")
+    report = json.load(reportFile)
+    reportFile.close()
+    return report
+
+
+def saveReport (report: dict, path: str) -> None:
+    '''Write a report to a JSON file'''
+    reportFile = open(path, "w")
+    json.dump(report, reportFile, indent = 2)
+    reportFile.close()
+
+
+def parseArguments (arguments = None):
+    '''Read the benchmark options from the command line'''
+    parser = argparse.ArgumentParser(description = "Time each stage of world generation and compare against a baseline")
+    parser.add_argument("--quick", action = "store_true", help = "only sweep the small sizes")
+    parser.add_argument("--density", nargs = "+", default = list(densities.keys()), choices = list(densities.keys()))
+    parser.add_argument("--repeats", type = int, default = 3, help = "runs of each case (the fastest is kept)")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--engine", default = MazeEngines.defaultEngine, choices = MazeEngines.engineNames())
+    parser.add_argument("--output", default = "benchmarkReport.json", help = "file to write the report to")
+    parser.add_argument("--baseline", default = None, help = "report to compare against")
+    parser.add_argument("--update-baseline", action = "store_true", help = "save this report as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type = float, default = 0.25, help = "fraction a stage can get worse by before it is a regression")
+    return parser.parse_args(arguments)
+
+
+def main (arguments = None) -> int:
+    '''Run the benchmark from the command line, returns the exit code'''
+    args = parseArguments(arguments)
+    sizes = defaultSizes
+    if args.quick:
+        sizes = quickSizes
+
+    report = runBenchmark(sizes, args.density, args.repeats, args.seed, args.engine)
+    saveReport(report, args.output)
+    print("Report written to " + args.output)
+
+    if args.baseline == None:
+        return 0
+    if args.update_baseline:
+        saveReport(report, args.baseline)
+        print("Baseline updated")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at " + args.baseline + " (use --update-baseline to create one)")
+        return 1
+
+    baseline = loadReport(args.baseline)
+    if baseline.get("generatorVersion") != report["generatorVersion"]:
+        print("Baseline is for generator " + str(baseline.get("generatorVersion")) + ", this is " + report["generatorVersion"])
+    regressions = compareReports(report, baseline, args.tolerance)
+    if len(regressions) > 0:
+        print("REGRESSIONS (" + str(len(regressions)) + "):")
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+    print("No regressions against " + args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
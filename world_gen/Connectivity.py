@@ -0,0 +1,185 @@
+"""Map Generation Connectivity Index v1
+
+Keeps track of which tiles can be reached from the start of a maze and which of them are
+articulation points (tiles that would cut part of the maze off if they were blocked).
+
+The passable tiles form a graph (edges where there is no wall between two tiles). Its biconnected
+components (blocks) are found once with Tarjan's algorithm, a tile is an articulation point if it is
+in two or more blocks. When a tile that is not an articulation point is blocked only the one block
+containing it is re-split, so placing traps, swamps and obstacles does not need a whole maze search.
+
+Changelog:
+ V1:
+ - Replaced repeated depth first connection checks with an articulation point index
+"""
+
+import numpy as np
+import MazeGrid
+
+#Tiles that cannot be travelled through
+blockingFlags = MazeGrid.TRAP | MazeGrid.SWAMP | MazeGrid.OBSTACLE
+
+
+def findBlocks (root: int, neighbours) -> list:
+    '''Find the biconnected components reachable from root with an iterative Tarjan search
+    neighbours(i) returns the tiles joined to tile i, returns a list of blocks (each a set of tiles)'''
+    #Discovery time and lowest reachable discovery time for each tile
+    discovered = {root: 0}
+    low = {root: 0}
+    time = 1
+    #Search stack of [tile, parent, neighbour iterator]
+    stack = [[root, -1, iter(neighbours(root))]]
+    #Edges seen but not yet assigned to a block
+    edgeStack = []
+    blocks = []
+
+    while len(stack) > 0:
+        current, parent, remaining = stack[-1]
+        advanced = False
+        for other in remaining:
+            if other not in discovered:
+                #Tree edge - go deeper
+                discovered[other] = time
+                low[other] = time
+                time = time + 1
+                edgeStack.append((current, other))
+                stack.append([other, current, iter(neighbours(other))])
+                advanced = True
+                break
+            elif other != parent and discovered[other] < discovered[current]:
+                #Back edge to an ancestor
+                low[current] = min(low[current], discovered[other])
+                edgeStack.append((current, other))
+
+        #All neighbours searched - return to the parent
+        if not advanced:
+            stack.pop()
+            if len(stack) > 0:
+                above = stack[-1][0]
+                low[above] = min(low[above], low[current])
+                #If nothing below here reaches above the parent it closes a block
+                if low[current] >= discovered[above]:
+                    block = set()
+                    while True:
+                        edge = edgeStack.pop()
+                        block.add(edge[0])
+                        block.add(edge[1])
+                        if edge == (above, current):
+                            break
+                    blocks.append(block)
+
+    return blocks
+
+
+class ConnectivityIndex ():
+    '''Index of the tiles reachable from the start and the articulation points between them'''
+    def __init__ (self, grid, start) -> None:
+        self.grid = grid
+        self.width = grid.width
+        self.height = grid.height
+        self.start = start[1] * self.width + start[0]
+        self.rebuild()
+
+    def rebuild (self) -> None:
+        '''Recalculate the whole index from the grid'''
+        size = self.width * self.height
+        #Tiles that can be travelled through
+        self.passable = bytearray(((self.grid.flags & blockingFlags) == 0).ravel().tolist())
+        #Tiles that can be reached from the start
+        self.reachable = bytearray(size)
+        #Tiles in two or more blocks
+        self.cut = bytearray(size)
+        #Blocks by id and the ids of the blocks each tile is in
+        self.blocks = {}
+        self.tileBlocks = {}
+        self.nextBlockId = 0
+
+        if not self.passable[self.start]:
+            return
+
+        self.reachable[self.start] = 1
+        for block in findBlocks(self.start, self.neighbours):
+            self.addBlock(block)
+
+    def neighbours (self, i: int) -> list:
+        '''Return the passable tiles joined to tile i (no wall between them)'''
+        x = i % self.width
+        y = i // self.width
+        walls = int(self.grid.walls[y, x])
+        found = []
+        #Iterate for the four directions
+        for d in range(0, 4):
+            if not walls & MazeGrid.wallBits[d]:
+                other = i + MazeGrid.around[d][1] * self.width + MazeGrid.around[d][0]
+                if self.passable[other]:
+                    found.append(other)
+        return found
+
+    def addBlock (self, block: set) -> None:
+        '''Add a block to the index and update the tiles in it'''
+        blockId = self.nextBlockId
+        self.nextBlockId = self.nextBlockId + 1
+        self.blocks[blockId] = block
+        for i in block:
+            self.reachable[i] = 1
+            ids = self.tileBlocks.setdefault(i, set())
+            ids.add(blockId)
+            self.cut[i] = len(ids) > 1
+
+    def removeBlock (self, blockId: int) -> set:
+        '''Remove a block from the index, returns the tiles that were in it'''
+        block = self.blocks.pop(blockId)
+        for i in block:
+            ids = self.tileBlocks.get(i)
+            if ids != None:
+                ids.discard(blockId)
+                self.cut[i] = len(ids) > 1
+        return block
+
+    def isReachable (self, pos) -> bool:
+        '''Returns true if the tile can be reached from the start'''
+        return bool(self.reachable[pos[1] * self.width + pos[0]])
+
+    def isCut (self, pos) -> bool:
+        '''Returns true if blocking the tile would cut off part of the maze'''
+        return bool(self.cut[pos[1] * self.width + pos[0]])
+
+    def canBlock (self, pos) -> bool:
+        '''Returns true if the tile can be blocked without cutting anything off from the start'''
+        i = pos[1] * self.width + pos[0]
+        return i != self.start and bool(self.reachable[i]) and not self.cut[i]
+
+    def blockableMask (self) -> np.ndarray:
+        '''Boolean array of tiles that can be blocked without cutting anything off from the start'''
+        reachable = np.frombuffer(bytes(self.reachable), dtype = np.uint8).astype(bool)
+        cut = np.frombuffer(bytes(self.cut), dtype = np.uint8).astype(bool)
+        mask = reachable & ~cut
+        mask[self.start] = False
+        return mask.reshape(self.height, self.width)
+
+    def block (self, pos) -> None:
+        '''Update the index after the tile at pos has been made impassable'''
+        i = pos[1] * self.width + pos[0]
+        if not self.passable[i]:
+            return
+        self.passable[i] = 0
+
+        #An unreachable tile does not change anything that can be reached
+        if not self.reachable[i]:
+            return
+
+        #Blocking an articulation point or the start can disconnect tiles - recalculate everything
+        if self.cut[i] or i == self.start:
+            self.rebuild()
+            return
+
+        self.reachable[i] = 0
+        #Split the one block that contained the tile without it
+        for blockId in list(self.tileBlocks.pop(i, set())):
+            remaining = self.removeBlock(blockId)
+            remaining.discard(i)
+            #A single tile left (the block was a bridge) has nothing to split
+            if len(remaining) > 1:
+                root = next(iter(remaining))
+                for block in findBlocks(root, lambda t: [o for o in self.neighbours(t) if o in remaining]):
+                    self.addBlock(block)
@@ -10,6 +10,15 @@ Changelog:
       - Bulky obstacles and debris
       - Checkpoints and traps
   - Reduced output section to display only necessary info
+ V2:
+  - Added maze algorithm selection
+ V3:
+  - Added buttons to place humans, obstacles or traps and swamps again
+  - Map preview is given as an image instead of being read from map.png
+ V4:
+  - Added progress message and cancel button (generation runs in the background)
+  - Save dialog offers compact map files
+  - Output section shows the numbers of traps and swamps placed
 """
 
 import tkinter as tk
@@ -24,11 +33,14 @@ except:
 
 dirname = os.path.dirname(__file__)
 
+#Largest width and height of the map preview in pixels
+previewSize = 320
+
 
 class GenerateWindow(tk.Tk):
     '''A generation interface window'''
-    def __init__ (self, *args, **kwargs):
-        '''Create new window setup'''
+    def __init__ (self, *args, engineNames = None, **kwargs):
+        '''Create new window setup (engineNames is the list of maze algorithms to choose from)'''
         #Create the basic tkinter window
         tk.Tk.__init__(self, *args, **kwargs)
         #Set a fixed geometry
@@ -50,16 +62,18 @@ class GenerateWindow(tk.Tk):
         self.outputFrame.grid_columnconfigure(0, minsize = 350)
         self.outputFrame.grid_rowconfigure(0, minsize = 30)
         self.outputFrame.grid_rowconfigure(1, minsize = 340)
-        self.outputFrame.grid_rowconfigure(2, minsize = 216)
-        self.outputFrame.grid_rowconfigure(3, minsize = 58)
+        self.outputFrame.grid_rowconfigure(2, minsize = 156)
+        self.outputFrame.grid_rowconfigure(3, minsize = 30)
         self.outputFrame.grid_rowconfigure(4, minsize = 58)
+        self.outputFrame.grid_rowconfigure(5, minsize = 30)
+        self.outputFrame.grid_rowconfigure(6, minsize = 58)
 
         #Label for the map
         self.mapLabel = tk.Label(self.outputFrame, text = "Generated Plan")
         self.mapLabel.grid(row = 0, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
 
-        #Image representing the map
-        imageData = ImageTk.PhotoImage(Image.open(os.path.join(dirname, "map.png")))
+        #Image representing the map (blank until one is given)
+        imageData = ImageTk.PhotoImage(Image.new("RGB", (previewSize, previewSize), (255, 255, 255)))
         self.mapImage = tk.Label(self.outputFrame, image = imageData, width = 250, height = 250)
         self.mapImage.image = imageData
         self.mapImage.grid(row = 1, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
@@ -71,8 +85,9 @@ class GenerateWindow(tk.Tk):
         #All columns and rows for values
         self.generatedNumbers.grid_columnconfigure(0, minsize = 100)
         self.generatedNumbers.grid_columnconfigure(1, minsize = 250)
-        self.generatedNumbers.grid_rowconfigure(0, minsize = 108)
-        self.generatedNumbers.grid_rowconfigure(1, minsize = 108)
+        self.generatedNumbers.grid_rowconfigure(0, minsize = 52)
+        self.generatedNumbers.grid_rowconfigure(1, minsize = 52)
+        self.generatedNumbers.grid_rowconfigure(2, minsize = 52)
 
         #Lists to hold the output headers and bodies
         self.outputHeaders = []
@@ -80,7 +95,7 @@ class GenerateWindow(tk.Tk):
         #Current index
         position = 0
         #Iterate different output headers
-        for header in ["Humans", "Obstacles"]:
+        for header in ["Humans", "Obstacles", "Hazards"]:
             #Create header label and grid on the right
             label = tk.Label(self.generatedNumbers, text = header, relief = tk.SUNKEN)
             label.grid(row = position, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
@@ -92,11 +107,31 @@ class GenerateWindow(tk.Tk):
             #Increment position
             position = position + 1
 
+        #Frame to hold the progress of the current job and the button to cancel it
+        self.progressFrame = tk.Frame(self.outputFrame)
+        self.progressFrame.grid(row = 3, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
+        self.progressFrame.grid_columnconfigure(0, weight = 3)
+        self.progressFrame.grid_columnconfigure(1, weight = 1)
+        self.progressLabel = tk.Label(self.progressFrame, text = "Ready", anchor = tk.W)
+        self.progressLabel.grid(row = 0, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
+        self.cancelButton = tk.Button(self.progressFrame, text = "Cancel", state = "disabled", command = self.cancelPressed)
+        self.cancelButton.grid(row = 0, column = 1, sticky = (tk.N, tk.E, tk.S, tk.W))
+
         #Add generate and save buttons
         self.generateButton = tk.Button(self.outputFrame, text = "Generate Map", bg = "lightblue", command = self.generatePressed)
-        self.generateButton.grid(row = 3, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
+        self.generateButton.grid(row = 4, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
         self.saveButton = tk.Button(self.outputFrame, text = "Save World", bg = "lightblue", state = "disabled", command = self.savePressed)
-        self.saveButton.grid(row = 4, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
+        self.saveButton.grid(row = 6, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
+
+        #Add buttons to place parts of the map again (keeping the same maze)
+        self.regenerateFrame = tk.Frame(self.outputFrame)
+        self.regenerateFrame.grid(row = 5, column = 0, sticky = (tk.N, tk.E, tk.S, tk.W))
+        self.regenerateButtons = []
+        for column, (text, part) in enumerate([["New Humans", "humans"], ["New Obstacles", "obstacles"], ["New Traps/Swamps", "hazards"]]):
+            self.regenerateFrame.grid_columnconfigure(column, weight = 1)
+            button = tk.Button(self.regenerateFrame, text = text, state = "disabled", command = lambda part = part: self.regeneratePressed(part))
+            button.grid(row = 0, column = column, sticky = (tk.N, tk.E, tk.S, tk.W))
+            self.regenerateButtons.append(button)
 
         #Setup frame for inputs
         self.inputFrame = tk.Frame(self.mainFrame)
@@ -146,7 +181,8 @@ class GenerateWindow(tk.Tk):
         self.basicSection.grid_columnconfigure(0, minsize = 50)
         self.basicSection.grid_columnconfigure(1, minsize = 450)
         self.basicSection.grid_columnconfigure(2, minsize = 50)
-        self.basicSection.grid_rowconfigure(0, minsize=670)
+        self.basicSection.grid_rowconfigure(0, minsize=335)
+        self.basicSection.grid_rowconfigure(1, minsize=335)
 
         #List of default difficulty values
         '''self.difficulties = [[[5, 5], [4, 7], [0, 0], [2, 1, 1]],
@@ -194,7 +230,19 @@ class GenerateWindow(tk.Tk):
 
         #Add a slider to choose the difficulty
         self.basicSlider = tk.Scale(self.basicSection, label="Difficulty:", font=self.inputFont, showvalue=0, from_=0, to=5, orient=tk.HORIZONTAL, length=250, command = self.moveBasicSlider)
-        self.basicSlider.grid(row = 0, column = 1)
+        self.basicSlider.grid(row = 0, column = 1, sticky = tk.S)
+
+        #If there are no algorithms given only the default can be used
+        if engineNames == None or len(engineNames) == 0:
+            engineNames = ["Depth First"]
+        #Add a menu to choose the maze generation algorithm
+        self.engine = tk.StringVar(self, engineNames[0])
+        self.engineFrame = tk.Frame(self.basicSection)
+        self.engineFrame.grid(row = 1, column = 1, sticky = tk.N, pady = 20)
+        self.engineLabel = tk.Label(self.engineFrame, text = "Maze Algorithm:", font = self.inputFont)
+        self.engineLabel.grid(row = 0, column = 0)
+        self.engineMenu = tk.OptionMenu(self.engineFrame, self.engine, *engineNames)
+        self.engineMenu.grid(row = 0, column = 1)
         #Initialize difficulty slider
         self.moveBasicSlider(0)
 
@@ -205,6 +253,10 @@ class GenerateWindow(tk.Tk):
         self.ready = False
         #Not currently saving
         self.saving = False
+        #Part of the map to place again (None if not needed)
+        self.regenerating = None
+        #Current job does not need cancelling
+        self.cancelling = False
         #Difficulty is not currently changing
         self.changingDifficulty = False
 
@@ -215,18 +267,12 @@ class GenerateWindow(tk.Tk):
         self.updateValues()
 
 
-    def updateImage (self) -> None:
-        '''Update the map image once the new one has been generated'''
-        #Get the image from the file
-        img = Image.open(os.path.join(dirname, "map.png"))
-        wx = 320 / img.width
-        hx = 320 / img.height
-        x = 0
-        if wx > hx:
-            x = hx
-        else:
-            x = wx
-        img = img.resize((int(img.width * x), int(img.height * x)))
+    def updateImage (self, img: Image.Image) -> None:
+        '''Update the map image once the new one has been generated (already rendered at the preview size)'''
+        #Shrink if it is larger than the space for it
+        if img.width > previewSize or img.height > previewSize:
+            img = img.copy()
+            img.thumbnail((previewSize, previewSize))
         imageData = ImageTk.PhotoImage(img)
         #Set the image of the mapImage
         self.mapImage.configure(image = imageData)
@@ -441,6 +487,11 @@ class GenerateWindow(tk.Tk):
         return values
 
 
+    def getEngine (self) -> str:
+        '''Get the name of the selected maze generation algorithm'''
+        return self.engine.get()
+
+
     def setSaveButton (self, allowed: bool) -> None:
         '''Set the save button to enabled/disabled'''
         if allowed:
@@ -469,17 +520,63 @@ class GenerateWindow(tk.Tk):
         self.saving = False
 
 
+    def setRegenerateButtons (self, allowed: bool) -> None:
+        '''Set the buttons to place parts of the map again to enabled/disabled'''
+        for button in self.regenerateButtons:
+            if allowed:
+                button.configure(state = "normal")
+            else:
+                button.configure(state = "disabled")
+
+
+    def regeneratePressed (self, part: str) -> None:
+        '''Set flag to indicate that part of the map (humans, obstacles or hazards) needs placing again'''
+        self.regenerating = part
+
+
+    def regenerateStarted (self) -> None:
+        '''Reset flag so that a part is not placed again more than once'''
+        self.regenerating = None
+
+
+    def cancelPressed (self) -> None:
+        '''Set flag to indicate that the current job should be cancelled'''
+        self.cancelling = True
+
+
+    def cancelStarted (self) -> None:
+        '''Reset flag so that a job is not cancelled more than once'''
+        self.cancelling = False
+
+
+    def setBusy (self, busy: bool) -> None:
+        '''Set whether a job is running (only cancel is allowed while it is)'''
+        if busy:
+            self.generateButton.configure(state = "disabled")
+            self.cancelButton.configure(state = "normal")
+            self.setSaveButton(False)
+            self.setRegenerateButtons(False)
+        else:
+            self.generateButton.configure(state = "normal")
+            self.cancelButton.configure(state = "disabled")
+
+
+    def setProgress (self, message: str) -> None:
+        '''Show the progress of the current job'''
+        self.progressLabel.configure(text = message)
+
+
     def getPathSelection (self) -> str:
         '''Get a path from the user as to where to save the file and return it'''
         self.update()
-        path = filedialog.asksaveasfilename(title = "Save World As", filetypes = [("Webots World File", ".wbt")])
+        path = filedialog.asksaveasfilename(title = "Save World As", filetypes = [("Webots World File", ".wbt"), ("Compact Map", ".json")])
         return path
 
 
-    def setGeneratedInformation (self, thermal: str, visual: str, obstacles: str, debris: str) -> None:
+    def setGeneratedInformation (self, thermal: str, visual: str, obstacles: str, debris: str, traps: str, swamps: str) -> None:
         '''Update the generated numbers from the values given by the generation'''
         #Combine items in a list (so it can be iteratively added)
-        dataList = [[thermal, visual], [obstacles, debris]]
+        dataList = [[thermal, visual], [obstacles, debris], [traps, swamps]]
         position = 0
         #Iterate across all output types
         while position < len(dataList) and position < len(self.outputBodies):
@@ -24,422 +24,93 @@ Changelog:
  - Added human generation
  V4:
  - Updated generation so start tile is within the main map section
+ V5:
+ - Tiles are stored in an array backed MazeGrid rather than a list of Tile objects
+ - Map image is rendered with NumPy array slicing
+ - Maze carving algorithm can be selected (depth first, Kruskal, Wilson or Prim)
+ - Added streamed generation for very large mazes
+ - Trap placement uses a connectivity index instead of searching the maze for every candidate
+ - Checkpoints, traps, swamps and obstacles are placed from candidate masks (no unbounded retry loops)
+ - Humans are placed from an index of wall runs
+ - Linear walls are marked with an iterative flood fill (no recursion limit on large maps)
+ - The GUI only starts when run as a script so generation can be imported (see BatchGenerate)
+ - Plans can be generated from a seed
+ - Generation stages are timed when a profiler is running (see Benchmark)
+ - Obstacle collisions are checked with a spatial hash (placeholder obstacles outside the maze are no longer checked)
+ V6:
+ - Debris is placed in the maze with a Poisson-disk sampler
+ - Humans, obstacles or traps and swamps can be placed again on the same maze (only changed map tiles are redrawn)
+ - The GUI is given the map image directly, drawn at the preview size (map.png is no longer written)
+ - Generating and saving from the GUI runs on a worker thread with progress and cancelling (the window is driven by Tk's event loop)
+ - The GUI map is drawn as it is generated (the tiles changed by each stage are redrawn)
+ - Maps can be saved as compact map files (.json) from the GUI
+ V7:
+ - Seeded plans use a random generator of their own instead of reseeding the random module
+ - The GUI shows the numbers of traps and swamps placed (also after placing them again)
+ - GUI maps are generated from a seed and its random generator is used to place parts again and to save
 """
 
 import random
-from PIL import Image
+import numpy as np
 import math
 import WorldCreator
 import os
 import GUI
-dirname = os.path.dirname(__file__)
+from MazeGrid import MazeGrid, wallBits, LINEAR, TRAP, SWAMP, OBSTACLE, HUMAN
+import MapRenderer
+import MazeEngines
+import Placement
+import Profiler
+import threading
+import queue
+import traceback
+
+#Changes whenever the same parameters and seed would give a different world (used to key cached worlds)
+generatorVersion = "Type 2 v7"
 
-#Object to contain information for a map tile
-class Tile ():
-    def __init__ (self) -> None:
-        '''Initialize the tile with all four walls and no special parts'''
-        #All walls
-        self.upperWall = True
-        self.lowerWall = True
-        self.leftWall = True
-        self.rightWall = True
-        #Linear walls
-        self.upperLinearWall = False
-        self.lowerLinearWall = False
-        self.leftLinearWall = False
-        self.rightLinearWall = False
-        #No special parts
-        self.checkpoint = False
-        self.trap = False
-        self.goal = False
-        self.swamp = False
-        #List of humans [up, right, down, left]
-        self.humans = [0,0,0,0]
-        self.hasHuman = False
-        #No obstacles yet
-        self.obstacle = False
-        #Linear flag
-        self.linear = False
-
-    def addWalls (self, wallList: list) -> None:
-        '''Add a list of walls'''
-        if 0 in wallList:
-            self.upperWall = True
-        if 1 in wallList:
-            self.rightWall = True
-        if 2 in wallList:
-            self.lowerWall = True
-        if 3 in wallList:
-            self.leftWall = True
-
-    def addLinearWall (self, wall: int) -> bool:
-        '''Set a list of linear walls'''
-        if 0 == wall and self.upperWall:
-            self.upperLinearWall = True
-            return True
-        if 1 == wall and self.rightWall:
-            self.rightLinearWall = True
-            return True
-        if 2 == wall and self.lowerWall:
-            self.lowerLinearWall = True
-            return True
-        if 3 == wall and self.leftWall:
-            self.leftLinearWall = True
-            return True
-        return False
-    def removeWalls (self, wallList: list) -> None:
-        '''Remove a list of walls'''
-        if 0 in wallList:
-            self.upperWall = False
-        if 1 in wallList:
-            self.rightWall = False
-        if 2 in wallList:
-            self.lowerWall = False
-        if 3 in wallList:
-            self.leftWall = False
-
-    def addCheckpoint (self) -> None:
-        '''Add a checkpoint - removes traps, goals and swamps'''
-        self.checkpoint = True
-        self.trap = False
-        self.goal = False
-        self.swamp = False
-
-    def removeCheckpoint (self) -> None:
-        '''Remove a checkpoint'''
-        self.checkpoint = False
-
-    def addTrap (self) -> None:
-        '''Add a trap - removes checkpoints, goals and swamps'''
-        self.trap = True
-        self.checkpoint = False
-        self.goal = False
-        self.swamp = False
-
-    def removeTrap (self) -> None:
-        '''Remove a trap'''
-        self.trap = False
-
-    def addGoal (self) -> None:
-        '''Add a goal - removes checkpoints, traps and swamps'''
-        self.goal = True
-        self.checkpoint = False
-        self.trap = False
-        self.swamp = False
-
-    def removeGoal (self) -> None:
-        '''Remove a goal'''
-        self.goal = False
-
-    def addSwamp (self) -> None:
-        '''Add a swamp - removes checkpoints, traps and goals'''
-        self.swamp = True
-        self.checkpoint = False
-        self.trap = False
-        self.goal = False
-
-    def removeSwamp (self) -> None:
-        '''Remove a swamp'''
-        self.swamp = False
-
-    def getWalls (self) -> list:
-        '''Returns a list of bools which represents if each of the four walls is present'''
-        return [self.upperWall, self.rightWall, self.lowerWall, self.leftWall]
-
-    def getLinearWalls (self) -> list:
-        '''Returns a list of bools which represents if each of the four linear walls is present'''
-        return [self.upperLinearWall, self.rightLinearWall, self.lowerLinearWall, self.leftLinearWall]
-
-    def getCheckpoint (self) -> bool:
-        '''Return if this tile has a checkpoint'''
-        return self.checkpoint
-
-    def getTrap (self) -> bool:
-        '''Return if this tile has a trap'''
-        return self.trap
-
-    def getGoal (self) -> bool:
-        '''Return if this tile has a goal'''
-        return self.goal
-
-    def getSwamp (self) -> bool:
-        '''Return if this tile has a swamp'''
-        return self.swamp
-
-    def addHuman (self, type, wall) -> bool:
-        '''Add a human to a given wall, returns true only if a wall was present in that direction and it didn't contain a human'''
-        #Get the walls from this tile
-        walls = self.getWalls()
-        #If the wall position is valid
-        if wall < len(walls) and wall < len(self.humans) and wall >= 0 and not self.hasHuman:
-            #If there isn't already a human on that wall
-            if walls[wall] and self.humans[wall] == 0:
-                #Set the human value
-                self.humans[wall] = type
-                #This tile does contain a human
-                self.hasHuman = True
-                #Successfully added
-                return True
-
-        #Failed to add human
-        return False
-
-    def getHuman (self) -> bool:
-        '''Returns true if there is a human on this tile'''
-        #Iterate humans list
-        for h in self.humans:
-            #If it is a human
-            if h != 0:
-                return True
-        #Otherwise
-        return False
-
-    def getHumanData (self) -> list:
-        '''Returns the human type and the wall it is on'''
-        #Iterate through the walls
-        for i in range(0, len(self.humans)):
-            #If there is a human
-            if self.humans[i] != 0:
-                #Return the human type and the wall
-                return self.humans[i], i
-
-        #Return no human
-        return 0, 0
-
-    def addObstacle(self) -> None:
-        '''Toggle flag for an obstacle to true'''
-        self.obstacle = True
-
-    def getObstacle(self) -> bool:
-        '''Returns true if an obstacle has been placed in this tile'''
-        return self.obstacle
-
-    def getTileType(self) -> bool:
-        return self.linear
-
-    def setLinear(self) -> None:
-        self.linear = True
-
-    def setFloating(self) -> None:
-        self.linear = False
-
-    def generatePixels (self) -> list:
-        '''Generate a grid of pixels for this tile'''
-        #Array to hold pixel information
-        pixels = []
-
-        #The background pixel colour
-        if self.linear:
-            basicPixel = 20
-        else:
-            basicPixel = 0
-
-        #Change background colour if this is a checkpoint / trap / goal / swamp
-        if self.checkpoint:
-            basicPixel = 2
-        if self.trap:
-            basicPixel = 3
-        if self.goal:
-            basicPixel = 4
-        if self.swamp:
-            basicPixel = 5
-
-
-        #Fill array with background pixels
-        for y in range(0, 100):
-            row = []
-            for x in range(0, 100):
-                if (y < 10 or y > 90 or x < 10 or x > 90) and self.linear:
-                    row.append(20)
-                else:
-                    row.append(basicPixel)
-            pixels.append(row)
-
-        #Add upper wall
-        if self.upperWall:
-            for x in range(0, 100):
-                pixels[0][x] = 1
-                pixels[1][x] = 1
-                pixels[2][x] = 1
-                pixels[3][x] = 1
-            #Add upper human
-            if self.humans[0] > 0:
-                hColour = 6
-                if self.humans[0] == 4:
-                    hColour = 7
-                for x in range(30, 70):
-                    pixels[4][x] = hColour
-                    pixels[5][x] = hColour
-                    pixels[6][x] = hColour
-        #Add left wall
-        if self.leftWall:
-            for y in range(0, 100):
-                pixels[y][0] = 1
-                pixels[y][1] = 1
-                pixels[y][2] = 1
-                pixels[y][3] = 1
-            #Add left human
-            if self.humans[3] > 0:
-                hColour = 6
-                if self.humans[3] == 4:
-                    hColour = 7
-                for y in range(30, 70):
-                    pixels[y][4] = hColour
-                    pixels[y][5] = hColour
-                    pixels[y][6] = hColour
-        #Add lower wall
-        if self.lowerWall:
-            for x in range(0, 100):
-                pixels[len(pixels) - 1][x] = 1
-                pixels[len(pixels) - 2][x] = 1
-                pixels[len(pixels) - 3][x] = 1
-                pixels[len(pixels) - 4][x] = 1
-            if self.humans[2] > 0:
-                hColour = 6
-                if self.humans[2] == 4:
-                    hColour = 7
-                for x in range(30, 70):
-                    pixels[len(pixels) - 5][x] = hColour
-                    pixels[len(pixels) - 6][x] = hColour
-                    pixels[len(pixels) - 7][x] = hColour
-        #Add right wall
-        if self.rightWall:
-            for y in range(0, 100):
-                pixels[y][len(pixels[0]) - 1] = 1
-                pixels[y][len(pixels[0]) - 2] = 1
-                pixels[y][len(pixels[0]) - 3] = 1
-                pixels[y][len(pixels[0]) - 4] = 1
-            #Add right human
-            if self.humans[1] > 0:
-                hColour = 6
-                if self.humans[1] == 4:
-                    hColour = 7
-                for y in range(30, 70):
-                    pixels[y][len(pixels[0]) - 5] = hColour
-                    pixels[y][len(pixels[0]) - 6] = hColour
-                    pixels[y][len(pixels[0]) - 7] = hColour
-
-        #Add obstacle marker
-        if self.obstacle:
-            for x in range(30, 70):
-                for y in range(30, 70):
-                    pixels[y][x] = 8
-
-        #Return array of pixels
-        return pixels
+dirname = os.path.dirname(__file__)
 
+#Milliseconds between the GUI checking for button presses and progress from the worker thread
+pollInterval = 50
 
 def createEmptyWorld(x, y):
-    '''Create a new array of x by y containing all walls on all tiles'''
-    array = []
+    '''Create a new grid of x by y containing all walls on all tiles'''
+    return MazeGrid(x, y)
 
-    #Iterate y axis
-    for i in range(0, y):
 
-        #Create this row
-        row = []
+#Last map image drawn (only tiles that change are drawn again)
+preview = MapRenderer.PreviewImage()
+#Last map drawn for the GUI (at the preview size)
+guiPreview = MapRenderer.PreviewImage()
 
-        #Iterate x axis
-        for j in range(0, x):
-            #Add a new section of the maze
-            row.append(Tile())
-        #Add the row to the array
-        array.append(row)
 
-    #Return the generated array
-    return array
+def printWorld(array, filePath = None):
+    '''Output the array as a map image file (map.png next to this script unless a path is given)'''
+    if filePath == None:
+        filePath = os.path.join(dirname, "map.png")
+    #Update the changed tiles of the map and save the completed image to file
+    preview.update(array)
+    preview.toImage().save(filePath, "PNG")
 
 
-def printWorld(array):
-    '''Output the array as a map image file'''
-    #Create a new image with the same dimensions as the array (in rgb mode with white background)
-    img = Image.new("RGB", (len(array[0]) * 100, len(array) * 100), "#FFFFFF")
+def previewImage(array, size = GUI.previewSize):
+    '''Draw the map straight at a size to fit in the GUI (no file or full size image), returns the image'''
+    guiPreview.update(array, MapRenderer.fitTileSize(array, size))
+    return guiPreview.toImage()
 
-    xStart = 0
-    yStart = 0
 
-    #Iterate across x axis
-    for i in range(len(array[0])):
-        #Reset y start position each loop
-        yStart = 0
-        #Iterate across y axis
-        for j in range(len(array)):
-            #Get that tile
-            tile = array[j][i]
-            #If there is a tile there
-            if tile != None:
-                #Get the pixels for the tile
-                pixels = tile.generatePixels()
-                #Iterate across x of pixels
-                for x in range(0, 100):
-                    #Iterate across y of pixels
-                    for y in range(0, 100):
-                        #If there is a wall
-                        if pixels[y][x] == 1:
-                            #Add blue pixel
-                            img.putpixel((xStart + x, yStart + y), (0, 0, 255))
-                        #If there is a checkpoint
-                        if pixels[y][x] == 2:
-                            #Add grey pixel
-                            img.putpixel((xStart + x, yStart + y), (175, 175, 175))
-                        #If there is a trap
-                        if pixels[y][x] == 3:
-                            #Add black pixel
-                            img.putpixel((xStart + x, yStart + y), (0, 0, 0))
-                        #If there is a goal
-                        if pixels[y][x] == 4:
-                            #Add green pixel
-                            img.putpixel((xStart + x, yStart + y), (0, 255, 0))
-                        #If there is a swamp
-                        if pixels[y][x] == 5:
-                            #Add tan pixel
-                            img.putpixel((xStart + x, yStart + y), (222, 184, 135))
-                        #If there is a visual human
-                        if pixels[y][x] == 6:
-                            #Add magenta pixel
-                            img.putpixel((xStart + x, yStart + y), (255, 0, 255))
-                        #If there is a thermal human
-                        if pixels[y][x] == 7:
-                            #Add red pixel
-                            img.putpixel((xStart + x, yStart + y), (255, 0, 0))
-                        #If there is an obstacle
-                        if pixels[y][x] == 8:
-                            #Add orange pixel
-                            img.putpixel((xStart + x, yStart + y), (255, 127, 0))
-                        if pixels[y][x] == 20:
-                            #Add light blue pixel
-                            img.putpixel((xStart + x, yStart + y), (231, 243, 247))
-            #Increase y start each pass
-            yStart = yStart + 100
-        #Increase x start position each time
-        xStart = xStart + 100
-
-    #Save the completed image to file
-    img.save(os.path.join(dirname, "map.png"), "PNG")
+def previewCodes(codes, size = GUI.previewSize):
+    '''Draw a snapshot of a map's tile codes (see MapRenderer.gridCodes) to fit in the GUI, returns the image
+    Only the tiles that have changed since the last preview are redrawn'''
+    #Largest tile size that fits the map (as fitTileSize)
+    guiPreview.updateCodes(codes, max(1, size // max(codes.shape)))
+    return guiPreview.toImage()
 
 
 def openSurround(world, target, direction):
     '''Opens a the wall in the given direction. Both the target tile and the one adjacent to it.'''
-    #Directions (in order) of the surrounding tiles
-    around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
-    #For each direction this is the alternative in the opposite direction
-    alternateDirections = [2, 3, 0, 1]
-
-    #Get the target tile
-    thisTile = world[target[1]][target[0]]
-
-    #Get the position of the tile being opened to
-    opened = [target[0] + around[direction][0], target[1] + around[direction][1]]
-
-    #Get the other tile
-    thatTile = world[opened[1]][opened[0]]
-
-    #Open the walls in both tiles
-    thatTile.removeWalls([alternateDirections[direction]])
-    thisTile.removeWalls([direction])
-
-    #Return the position that was opened to
-    return opened
+    #Open the walls in both tiles and return the position that was opened to
+    return world.openWall(target[0], target[1], direction)
 
 
 def getAllAround (world, pos):
@@ -467,372 +138,47 @@ def getAllAround (world, pos):
     return aroundPositions, aroundDirs
 
 
-def depthFirstMaze (world, start):
+def depthFirstMaze (world, start, rng = random):
     '''Generate a maze using depth first search'''
-    #List of tiles that have been visited
-    visited = [start]
-    #The current stack - allowing for backtracking
-    stack = [start]
+    MazeEngines.depthFirst(world, start, rng)
 
-    #Currently selected point on the stack
-    pointer = 0
 
-    #If the algorithm has finished
-    done = False
+def addCheckPoints(array, checkpoints, startTile, endTile, x, y, placement = None):
+    '''Add a number of checkpoints to the map (each in a different quadrant), returns the number added'''
+    #Engine holding the tiles that checkpoints can go on
+    if placement == None:
+        placement = Placement.PlacementEngine(array, startTile, endTile)
 
-    #While it is still generating
-    while not done:
-        usable = []
-        #Get all the tiles around the current one
-        posList, directions = getAllAround(world, stack[pointer])
-        #Iterate through found tiles
-        for i in range(len(posList)):
-            #If it hasn't been visited yet
-            if posList[i] not in visited:
-                #Add to the list of usable tiles with it's direction
-                usable.append([posList[i], directions[i]])
-
-        #If there are tiles that can be reached
-        if len(usable) > 0:
-            #Pick a random tile
-            r = random.randrange(0, len(usable))
-            #Open the wall to that tile
-            openSurround(world, stack[pointer], usable[r][1])
-            #Add tile to visited
-            visited.append(usable[r][0])
-            #Add tile to stack
-            stack.append(usable[r][0])
-            #Increment pointer to point at new tile
-            pointer = pointer + 1
-        else:
-            #If there are no unvisited tiles to go to
-            #Decrement pointer (go back a tile)
-            pointer = pointer - 1
-            #Remove last item from stack
-            del stack[len(stack) - 1]
-            #If the pointer has retreated past the start
-            if pointer < 0:
-                #The algorithm is finished
-                done = True
-
-
-def checkConnect (world, start, check, avoid):
-    '''Check if the start and check points can be connected without avoid'''
-    #List of used tiles
-    visited = [start, avoid]
-    #Stack to hold the tile path
-    stack = [start]
-
-    #Pointer - current tile
-    pointer = 0
-
-    #Finished
-    done = False
+    #Place each checkpoint in a random unused quadrant
+    return placement.placeInQuadrants(Placement.CHECKPOINT, checkpoints, [0, 1, 2, 3], True)
 
-    #Until it has finished
-    while not done:
-        usable = []
-        #Get surrounding tiles
-        posList, directions = getAllAround(world, stack[pointer])
-        #Get the walls of the current tile
-        tileWalls = world[stack[pointer][1]][stack[pointer][0]].getWalls()
-        #Iterate surrounding tiles
-        for i in range(len(posList)):
-            #If the tile hasn't already been visited and the wall is open to get to it
-            if posList[i] not in visited and not tileWalls[directions[i]]:
-                #Get the tile that corresponds to that movement
-                otherTile = world[posList[i][1]][posList[i][0]]
-                #If there is a tile there
-                if otherTile != None:
-                    #If that tile isn't a trap or swamp or obstacle
-                    if not otherTile.getTrap() and not otherTile.getSwamp() and not otherTile.getObstacle():
-                        #Add the tile to usable tiles
-                        usable.append([posList[i], directions[i]])
-
-        #Iterate through usable tiles
-        for u in usable:
-            #If it is the tile being searched for
-            if u[0] == check:
-                #The connection can be made
-                return True
-
-        #If there are tiles to go to
-        if len(usable) > 0:
-            #Move to the next one
-            visited.append(usable[0][0])
-            stack.append(usable[0][0])
-            pointer = pointer + 1
-        else:
-            #Move back a tile
-            pointer = pointer - 1
-            del stack[len(stack) - 1]
-            #If it has moved back past the start
-            if pointer < 0:
-                #It has finished
-                done = True
-
-    #Connection could not be made
-    return False
-
-
-def addCheckPoints(array, checkpoints, startTile, endTile, x, y):
-    '''Add a number of checkpoints to the map'''
-    #Cannot put a checkpoint at the start or end
-    disallowedSpaces = [startTile, endTile]
-
-    #Get data about tiles surrounding the start
-    aroundStart, aroundStartDir = getAllAround(array, startTile)
-
-    #Iterate through surrounding tiles
-    for i in range(0, len(aroundStart)):
-        #If there is not a wall to block
-        if not array[startTile[1]][startTile[0]].getWalls()[aroundStartDir[i]]:
-            #Cannot place check point here
-            disallowedSpaces.append([aroundStart[i][0], aroundStart[i][1]])
-
-    #Split the grid into quadrants
-    quads = [[[0, 0], [int(x / 2) - 1, int(y / 2) - 1]],
-             [[int(x / 2), 0], [x - 1, int(y / 2) - 1]],
-             [[0, int(y / 2)], [int(x / 2) - 1, y - 1]],
-             [[int(x / 2), int(y / 2)], [x - 1, y - 1]]]
-
-    #For each of the checkpoints
-    for i in range(0, checkpoints):
-        #Not added yet
-        added = False
-        #Get a random quadrant
-        rQ = random.randrange(0, len(quads))
-        q = quads[rQ]
-        #Remove the quadrant
-        del quads[rQ]
-        #Until it has added the checkpoint
-        while not added:
-            #Get a random position
-            xPos = random.randint(q[0][0], q[1][0])
-            yPos = random.randint(q[0][1], q[1][1])
-            #If it is allowed to put the checkpoint there
-            if [xPos, yPos] not in disallowedSpaces:
-                #Get the tile
-                tile = array[yPos][xPos]
-                #If there isn't already a checkpoint or trap there
-                if not tile.getCheckpoint() and not tile.getTrap() and not tile.getGoal():
-                    #Add a checkpoint
-                    tile.addCheckpoint()
-                    #Add this tile and four surrounding to not allowed spaces
-                    disallowedSpaces.append([xPos, yPos])
-                    around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
-                    for a in around:
-                        disallowedSpaces.append([xPos + a[0], yPos + a[1]])
-                    #The checkpoint has been added
-                    added = True
-
-
-def addTraps(array, traps, startTile, endTile, x, y):
-    '''Add a number of traps to the map'''
-    #Split the grid into quadrants
-    quads = [[[0, 0], [int(x / 2) - 1, int(y / 2) - 1]],
-             [[int(x / 2), 0], [x - 1, int(y / 2) - 1]],
-             [[0, int(y / 2)], [int(x / 2) - 1, y - 1]],
-             [[int(x / 2), int(y / 2)], [x - 1, y - 1]]]
-
-    #Iterate for each trap
-    for i in range(0, traps):
-        #It hasn't added the trap yet
-        added = False
-        #Until the trap has been added
-        while not added:
-            #Pick a random quadrant
-            rQ = random.randrange(0, len(quads))
-            q = quads[rQ]
-            #Generate a random position
-            xPos = random.randint(q[0][0], q[1][0])
-            yPos = random.randint(q[0][1], q[1][1])
-            #Get the tile
-            tile = array[yPos][xPos]
-            #If it isn't the start or end and there is a tile there
-            if [xPos, yPos] != startTile and [xPos, yPos] != endTile and tile != None:
-                #If there isn't a checkpoint
-                if not tile.getCheckpoint():
-                    allowed = True
-                    #Surrounding tile positions
-                    around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
-                    #Iterate for surrounding
-                    for a in around:
-                        #Get the tile
-                        checkTile = None
-                        if yPos + a[1] >= 0 and yPos + a[1] < len(array) and xPos + a[0] >= 0 and xPos + a[0] < len(array[0]):
-                            checkTile = array[yPos + a[1]][xPos + a[0]]
-                        #If there is a tile there
-                        if checkTile != None:
-                            #If there isn't a trap there
-                            if not checkTile.getTrap() and not checkTile.getGoal():
-                                #If a connection cannot be made to the start
-                                if not checkConnect(array, startTile ,[xPos + a[0], yPos + a[1]], [xPos, yPos]):
-                                    #The trap cannot be placed here
-                                    allowed = False
-
-                    #If the trap can be placed here
-                    if allowed:
-                        #Add the trap
-                        added = True
-                        tile.addTrap()
-                        #Remove the quadrant from the options
-                        del quads[rQ]
-
-
-def addSwamps(array, swamps, startTile, endTile, x, y):
-    '''Adds a number of swamps to the map'''
-    #Cannot put a swamp at the start or end
-    disallowedSpaces = [startTile, endTile]
-
-    #Get data about tiles surrounding the start
-    aroundStart, aroundStartDir = getAllAround(array, startTile)
-
-    #Iterate through surrounding tiles
-    for i in range(0, len(aroundStart)):
-        #If there is not a wall to block
-        if not array[startTile[1]][startTile[0]].getWalls()[aroundStartDir[i]]:
-            #Cannot place check point here
-            disallowedSpaces.append([aroundStart[i][0], aroundStart[i][1]])
-
-    #Iterate for each swamp
-    for i in range(0, swamps):
-        #Not added yet
-        added = False
-        attempt = 0
-        #Repeat until added or 100 tries reached
-        while not added and attempt < 100:
-            #Get a random tile
-            xPos = random.randrange(0, x)
-            yPos = random.randrange(0, y)
-            tile = array[yPos][xPos]
-            #If this isn't the start, end or not a tile
-            if [xPos, yPos] not in disallowedSpaces:
-                #If there is nothing there already
-                if not tile.getGoal() and not tile.getCheckpoint() and not tile.getSwamp() and not tile.getTrap():
-                    #Add the swamp
-                    tile.addSwamp()
-                    added = True
-            #Increment counter
-            attempt = attempt + 1
+
+def addTraps(array, traps, startTile, endTile, x, y, placement = None):
+    '''Add a number of traps to the map (each in a different quadrant), returns the number added'''
+    #Engine holding the tiles that traps can go on (without cutting off part of the maze)
+    if placement == None:
+        placement = Placement.PlacementEngine(array, startTile, endTile)
+
+    #Place each trap in a random unused quadrant
+    return placement.placeInQuadrants(Placement.TRAP, traps, [0, 1, 2, 3], True)
+
+
+def addSwamps(array, swamps, startTile, endTile, x, y, placement = None):
+    '''Adds a number of swamps to the map, returns the number added'''
+    #Engine holding the tiles that swamps can go on
+    if placement == None:
+        placement = Placement.PlacementEngine(array, startTile, endTile)
+
+    #Place each swamp on a random allowed tile
+    return placement.placeAnywhere(Placement.SWAMP, swamps)
 
 
 def generateHumanSpaces(array, x, y):
-    '''Generate a list of wall groups with directions'''
-    wallGroups = []
-
-    #Two directional lists of walls
-    currentGroup = []
-    currentGroupOther = []
-
-    #Iterate through each tile (left to right, top to bottom)
-    for yPos in range(0, y):
-        for xPos in range(0, x):
-            #Get this tile
-            cTile = array[yPos][xPos]
-            #If this has an upper wall and no special tile states
-            if cTile.getWalls()[0] and not cTile.getTrap() and not cTile.getCheckpoint() and not cTile.getSwamp() and not cTile.getGoal():
-                #Add this tile to the list of tiles
-                currentGroup.append(cTile)
-            #Otherwise if there are tiles in the group
-            elif len(currentGroup) != 0:
-                #Add group to list with upper direction
-                wallGroups.append([0, currentGroup])
-                currentGroup = []
-            #If there is a wall on the right
-            if cTile.getWalls()[1] and len(currentGroup) != 0:
-                #End the group and add to the list with direction
-                wallGroups.append([0, currentGroup])
-                currentGroup = []
-            #If the end of the row has been reached
-            if xPos == x + 1:
-                #If there are tiles in the group
-                if len(currentGroup) != 0:
-                    #Add to list of groups with direction
-                    wallGroups.append([0, currentGroup])
-                #End group
-                currentGroup = []
-
-            #If this has a lower wall and no special tile states
-            if cTile.getWalls()[2] and not cTile.getTrap() and not cTile.getCheckpoint() and not cTile.getSwamp() and not cTile.getGoal():
-                #Add this tile to the list of tiles
-                currentGroupOther.append(cTile)
-            #Otherwise if there are tiles in the group
-            elif len(currentGroupOther) != 0:
-                #Add group to list with down direction
-                wallGroups.append([2, currentGroupOther])
-                currentGroupOther = []
-            #If there is a wall on the right
-            if cTile.getWalls()[1] and len(currentGroupOther) != 0:
-                #End the group and add to the list with direction
-                wallGroups.append([2, currentGroupOther])
-                currentGroupOther = []
-            #If the end of the row has been reached
-            if xPos == x + 1:
-                #If there are tiles in the group
-                if len(currentGroupOther) != 0:
-                    #Add to list of groups with direction
-                    wallGroups.append([2, currentGroupOther])
-                #End group
-                currentGroupOther = []
-
-    #Iterate through each tile (top to bottom, left to right)
-    for xPos in range(0, x):
-        for yPos in range(0, y):
-            #Get this tile
-            cTile = array[yPos][xPos]
-            #If this has a right wall and no special tile states
-            if cTile.getWalls()[1] and not cTile.getTrap() and not cTile.getCheckpoint() and not cTile.getSwamp() and not cTile.getGoal():
-                #Add this tile to the list of tiles
-                currentGroup.append(cTile)
-            #Otherwise if there are tiles in the group
-            elif len(currentGroup) != 0:
-                #Add group to list with right direction
-                wallGroups.append([1, currentGroup])
-                currentGroup = []
-            #If there is a wall on the bottom
-            if cTile.getWalls()[2] and len(currentGroup) != 0:
-                #End the group and add to the list with direction
-                wallGroups.append([1, currentGroup])
-                currentGroup = []
-            #If the end of the column has been reached
-            if yPos == y + 1:
-                #If there are tiles in the group
-                if len(currentGroup) != 0:
-                    #Add to list of groups with direction
-                    wallGroups.append([1, currentGroup])
-                #End group
-                currentGroup = []
-
-            cTile = array[yPos][xPos]
-            #If this has a left wall and no special tile states
-            if cTile.getWalls()[3] and not cTile.getTrap() and not cTile.getCheckpoint() and not cTile.getSwamp() and not cTile.getGoal():
-                #Add this tile to the list of tiles
-                currentGroupOther.append(cTile)
-            #Otherwise if there are tiles in the group
-            elif len(currentGroupOther) != 0:
-                #Add group to list with left direction
-                wallGroups.append([3, currentGroupOther])
-                currentGroupOther = []
-            #If there is a wall on the bottom
-            if cTile.getWalls()[2] and len(currentGroupOther) != 0:
-                #End the group and add to the list with direction
-                wallGroups.append([3, currentGroupOther])
-                currentGroupOther = []
-            #If the end of the column has been reached
-            if yPos == y + 1:
-                #If there are tiles in the group
-                if len(currentGroupOther) != 0:
-                    #Add to list of groups with direction
-                    wallGroups.append([3, currentGroupOther])
-                #End group
-                currentGroupOther = []
-
-    #Return the list of wall groups
-    return wallGroups
-
-
-def addHumans (array, numberVisual, numberThermal, x, y):
+    '''Generate an index of the runs of wall (with directions) that humans can be placed on'''
+    return Placement.WallRunIndex(array)
+
+
+def addHumans (array, numberVisual, numberThermal, x, y, rng = random):
     '''Add the specified number of humans to the array'''
     #List to hold all humans to add
     toAdd = []
@@ -840,7 +186,7 @@ def addHumans (array, numberVisual, numberThermal, x, y):
     #For each of the visual humans
     for i in range(0, numberVisual):
         #Pick a random type (1 - harmed, 2 - unharmed, 3 - stable)
-        toAdd.append(random.randrange(1, 4))
+        toAdd.append(rng.randrange(1, 4))
 
     #For each of the thermal humans
     for i in range(0, numberThermal):
@@ -855,8 +201,8 @@ def addHumans (array, numberVisual, numberThermal, x, y):
         #Scramble order (so that if some cannot be added it is not all thermal missing)
         for i in range(0, 200):
             #Random positions
-            r1 = random.randrange(0, len(toAdd))
-            r2 = random.randrange(0, len(toAdd))
+            r1 = rng.randrange(0, len(toAdd))
+            r2 = rng.randrange(0, len(toAdd))
             #Temporary store item 1
             temp = toAdd[r1]
             #Place item 2
@@ -864,112 +210,85 @@ def addHumans (array, numberVisual, numberThermal, x, y):
             #Place item 1
             toAdd[r2] = temp
 
-        #Groups of walls to place humans on
-        wallGroupData = generateHumanSpaces(array, x, y)
-        used = []
-
-        #Iterate for every human
-        for h in toAdd:
-            #Not added yet, give 200 attempts
-            added = False
-            attempts = 200
-
-            #While still trying to add
-            while not added and attempts > 0:
-                #Decreate attempt amount
-                attempts = attempts - 1
-                #Random wall group
-                r = random.randrange(0, len(wallGroupData))
-                #If that group is unused
-                if r not in used:
-                    #Get the group data
-                    group = wallGroupData[r][1]
-                    #Randomly select a tile in that group
-                    tile = group[random.randrange(0, len(group))]
-                    #Attempt to add a human
-                    success = tile.addHuman(h, wallGroupData[r][0])
-                    #If added successfully
-                    if success:
-                        added = True
-                        #Increment human counters
-                        if h < 4:
-                            #Visual
-                            humansPlaced[0] = humansPlaced[0] + 1
-                        else:
-                            #Thermal
-                            humansPlaced[1] = humansPlaced[1] + 1
-
-                        #Add position to used list
-                        used.append(r)
-
-                #If all the groups have been used
-                if len(used) >= len(wallGroupData):
-                    #Reset for second pass
-                    used = []
+        #Runs of walls to place humans on
+        wallRuns = generateHumanSpaces(array, x, y)
+
+        #Pick a different tile for every human (as many as there is room for)
+        slots = wallRuns.sample(len(toAdd), rng)
+        if len(slots) < len(toAdd):
+            print("Only room for " + str(len(slots)) + " of " + str(len(toAdd)) + " humans (" + str(wallRuns.slotCount()) + " wall slots)")
+
+        #Iterate for every human that has a place
+        for h, slot in zip(toAdd, slots):
+            xPos, yPos, d = slot
+            #Add the human to the wall
+            if array[yPos][xPos].addHuman(h, d):
+                #Increment human counters
+                if h < 4:
+                    #Visual
+                    humansPlaced[0] = humansPlaced[0] + 1
+                else:
+                    #Thermal
+                    humansPlaced[1] = humansPlaced[1] + 1
 
     #Return the numbers of humans placed
     return humansPlaced
 
+#Wall edges to continue a linear wall along for each direction [x offset, y offset, wall]
+#(the same wall on the tiles either side and the facing wall on the three tiles across from it)
+linearNeighbours = [[[-1, 0, 0], [1, 0, 0], [-1, -1, 2], [0, -1, 2], [1, -1, 2]],
+                    [[0, -1, 1], [0, 1, 1], [1, -1, 3], [1, 0, 3], [1, 1, 3]],
+                    [[-1, 0, 2], [1, 0, 2], [-1, 1, 0], [0, 1, 0], [1, 1, 0]],
+                    [[0, -1, 3], [0, 1, 3], [-1, -1, 1], [-1, 0, 1], [-1, 1, 1]]]
+
 def setLinearWalls(array, current, rot):
-    if len(array) > current[1] and current[1] >= 0:
-        if len(array[current[1]]) > current[0] and current[0] >= 0:
-            if array[current[1]][current[0]]:
-                tile = array[current[1]][current[0]]
-                tile.setLinear()
-                if (tile.getTileType() and tile.getLinearWalls()[rot]) or not tile.getWalls()[rot]:
-                    return
-                ro = rot
-                for i in range(4):
-                    if not tile.addLinearWall(ro):
-                        break
-                    ro = ro + 1
-                    if ro > 3:
-                        ro = 0
-                ro = rot
-                for i in range(4):
-                    if not tile.addLinearWall(ro):
-                        break
-                    ro = ro - 1
-                    if ro < 0:
-                        ro = 3
-
-                walls = tile.getLinearWalls()
-                if walls[0]:
-                    #Top
-                    setLinearWalls(array,[current[0]-1, current[1]], 0)
-                    setLinearWalls(array,[current[0]+1, current[1]], 0)
-                    setLinearWalls(array,[current[0]-1, current[1]-1], 2)
-                    setLinearWalls(array,[current[0], current[1]-1], 2)
-                    setLinearWalls(array,[current[0]+1, current[1]-1], 2)
-                if walls[1]:
-                    #Right
-                    setLinearWalls(array,[current[0], current[1]-1], 1)
-                    setLinearWalls(array,[current[0], current[1]+1], 1)
-                    setLinearWalls(array,[current[0]+1, current[1]-1], 3)
-                    setLinearWalls(array,[current[0]+1, current[1]], 3)
-                    setLinearWalls(array,[current[0]+1, current[1]+1], 3)
-                if walls[2]:
-                    #Bottom
-                    setLinearWalls(array,[current[0]-1, current[1]], 2)
-                    setLinearWalls(array,[current[0]+1, current[1]], 2)
-                    setLinearWalls(array,[current[0]-1, current[1]+1], 0)
-                    setLinearWalls(array,[current[0], current[1]+1], 0)
-                    setLinearWalls(array,[current[0]+1, current[1]+1], 0)
-                if walls[3]:
-                    #Left
-                    setLinearWalls(array,[current[0], current[1]-1], 3)
-                    setLinearWalls(array,[current[0], current[1]+1], 3)
-                    setLinearWalls(array,[current[0]-1, current[1]-1], 1)
-                    setLinearWalls(array,[current[0]-1, current[1]], 1)
-                    setLinearWalls(array,[current[0]-1, current[1]+1], 1)
-
-def generateWorld(x, y, checkpoints, traps, swamps, visual, thermal):
+    '''Mark every wall connected to the wall on this tile in the given direction as linear
+    Iterative flood fill over wall edges - the linear wall mask is the visited set so each wall is only expanded once'''
+    walls = array.walls.tolist()
+    linear = array.linearWalls.tolist()
+    linearTiles = np.zeros((array.height, array.width), dtype = bool)
+
+    #Wall edges still to visit
+    toVisit = [[current[0], current[1], rot]]
+    while len(toVisit) > 0:
+        xPos, yPos, r = toVisit.pop()
+        #Ignore edges off the grid
+        if not array.inBounds(xPos, yPos):
+            continue
+        #Any tile touched by a linear wall is a linear tile
+        linearTiles[yPos, xPos] = True
+        tileWalls = walls[yPos][xPos]
+        done = linear[yPos][xPos]
+        #Stop if there is no wall here or it has already been visited
+        if done & wallBits[r] or not tileWalls & wallBits[r]:
+            continue
+        #The wall continues around the tile in both directions until there is a gap
+        added = 0
+        for step in [1, -1]:
+            ro = r
+            for i in range(4):
+                if not tileWalls & wallBits[ro]:
+                    break
+                added = added | wallBits[ro]
+                ro = (ro + step) % 4
+        added = added & ~done
+        linear[yPos][xPos] = done | added
+        #Continue from each newly added wall
+        for d in range(0, 4):
+            if added & wallBits[d]:
+                for offset in linearNeighbours[d]:
+                    toVisit.append([xPos + offset[0], yPos + offset[1], offset[2]])
+
+    array.linearWalls[:, :] = linear
+    array.flags[linearTiles] |= LINEAR
+
+def generateWorld(x, y, checkpoints, traps, swamps, visual, thermal, engine = MazeEngines.defaultEngine, rng = random):
     '''Perform generation of a world array'''
     #Create the empty array
     array = createEmptyWorld(x, y)
 
     #Pick a starting edge
-    startEdge = random.randrange(0, 4)
+    startEdge = rng.randrange(0, 4)
     xStart = 0
     yStart = 0
 
@@ -979,28 +298,28 @@ def generateWorld(x, y, checkpoints, traps, swamps, visual, thermal):
     if startEdge == 0:
         #Pick start position
         yStart = 0
-        xStart = random.randrange(0, len(array[0]))
+        xStart = rng.randrange(0, len(array[0]))
         #Set start direction
         startDir = 2
     #Right edge
     if startEdge == 1:
         #Pick start position
         xStart = len(array[0]) - 1
-        yStart = random.randrange(0, len(array))
+        yStart = rng.randrange(0, len(array))
         #Set start direction
         startDir = 3
     #Bottom edge
     if startEdge == 2:
         #Pick start position
         yStart = len(array) - 1
-        xStart = random.randrange(0, len(array[0]))
+        xStart = rng.randrange(0, len(array[0]))
         #Set start direction
         startDir = 0
     #Left edge
     if startEdge == 3:
         #Pick start position
         xStart = 0
-        yStart = random.randrange(0, len(array))
+        yStart = rng.randrange(0, len(array))
         #Set start direction
         startDir = 1
 
@@ -1035,55 +354,92 @@ def generateWorld(x, y, checkpoints, traps, swamps, visual, thermal):
     #If there are some possible end points
     if len(possibleEnd) > 0:
         #Get an end position (chosen randomly)
-        xEnd, yEnd = possibleEnd[random.randrange(0, len(possibleEnd))]
+        xEnd, yEnd = possibleEnd[rng.randrange(0, len(possibleEnd))]
         endTile = [xEnd, yEnd]
 
-    #Generate maze
-    depthFirstMaze(array, startTile)
-
-    #Open some random spaces
-    for i in range(0, int((x + y) / 2) ** 2):
-        #Random position
-        randX = random.randrange(0, len(array[0]))
-        randY = random.randrange(0, len(array))
-        #Get the valid directions
-        allowedDirs = getAllAround(array, [randX, randY])[1]
-        #If there are some positions that can be opened
-        if len(allowedDirs) > 0:
-            #Get a direction to open
-            d = allowedDirs[random.randrange(0, len(allowedDirs))]
-            #Open that direction (if it is already open it will do nothing)
-            openSurround(array, [randX, randY], d)
-
-    #Add checkpoints
-    addCheckPoints(array, checkpoints, startTile, endTile, x, y)
-
-    #Add traps
-    addTraps(array, traps, startTile, endTile, x, y)
-
-    #Add swamps
-    addSwamps(array, swamps, startTile, endTile, x, y)
-
-    #Add humans
-    humansAdded = addHumans(array, visual, thermal, x, y)
-
-    #Set Linear or Floating flag
-    tile = array[startTile[1]][startTile[0]]
-    walls = tile.getWalls()
-    if walls[0]:
-        setLinearWalls(array, startTile, 0)
-    if walls[1]:
-        setLinearWalls(array, startTile, 1)
-    if walls[2]:
-        setLinearWalls(array, startTile, 2)
-    if walls[3]:
-        setLinearWalls(array, startTile, 3)
+    with Profiler.stage("carveMaze", array):
+        #Generate maze
+        MazeEngines.carve(array, startTile, engine, rng)
+
+    with Profiler.stage("openLoops", array):
+        #Open some random spaces
+        for i in range(0, int((x + y) / 2) ** 2):
+            #Random position
+            randX = rng.randrange(0, len(array[0]))
+            randY = rng.randrange(0, len(array))
+            #Get the valid directions
+            allowedDirs = getAllAround(array, [randX, randY])[1]
+            #If there are some positions that can be opened
+            if len(allowedDirs) > 0:
+                #Get a direction to open
+                d = allowedDirs[rng.randrange(0, len(allowedDirs))]
+                #Open that direction (if it is already open it will do nothing)
+                openSurround(array, [randX, randY], d)
+
+    with Profiler.stage("placementIndex", array):
+        #Candidate tiles for the special tiles
+        placement = Placement.PlacementEngine(array, startTile, endTile, rng = rng)
+
+    with Profiler.stage("addCheckPoints", array):
+        #Add checkpoints
+        placed = addCheckPoints(array, checkpoints, startTile, endTile, x, y, placement)
+        if placed < checkpoints:
+            print("Only room for " + str(placed) + " of " + str(checkpoints) + " checkpoints")
+
+    with Profiler.stage("addTraps", array):
+        #Add traps
+        placed = addTraps(array, traps, startTile, endTile, x, y, placement)
+        if placed < traps:
+            print("Only room for " + str(placed) + " of " + str(traps) + " traps")
+
+    with Profiler.stage("addSwamps", array):
+        #Add swamps
+        placed = addSwamps(array, swamps, startTile, endTile, x, y, placement)
+        if placed < swamps:
+            print("Only room for " + str(placed) + " of " + str(swamps) + " swamps")
+
+    with Profiler.stage("addHumans", array):
+        #Add humans
+        humansAdded = addHumans(array, visual, thermal, x, y, rng)
+
+    with Profiler.stage("setLinearWalls", array):
+        #Set Linear or Floating flag
+        tile = array[startTile[1]][startTile[0]]
+        walls = tile.getWalls()
+        if walls[0]:
+            setLinearWalls(array, startTile, 0)
+        if walls[1]:
+            setLinearWalls(array, startTile, 1)
+        if walls[2]:
+            setLinearWalls(array, startTile, 2)
+        if walls[3]:
+            setLinearWalls(array, startTile, 3)
 
     #Return the array, start position and humans
     return array, [startTile, startDir], humansAdded[0], humansAdded[1]
 
 
-def addObstacle(debris):
+#Largest size of a bulky obstacle (width and depth, random sizes are below 0.15)
+largestObstacleSize = 0.14
+
+
+def obstacleRadius(obstacle):
+    '''Radius of the circle around an obstacle [width, height, depth, debris]'''
+    return (((obstacle[0] / 2.0) ** 2) + ((obstacle[2] / 2.0) ** 2)) ** 0.50
+
+
+def obstacleHash(obstacles):
+    '''Create a spatial hash of the obstacles in the list that have been placed in the maze'''
+    #Cells the size of the largest obstacle so only the surrounding cells need checking
+    spatialHash = Placement.ObstacleHash(2.0 * obstacleRadius([largestObstacleSize, 0, largestObstacleSize]))
+    for obs in obstacles:
+        #If the obstacle is in the map
+        if obs[1][1] > -1:
+            spatialHash.add(obs[1][0], obs[1][2], obs[1][4])
+    return spatialHash
+
+
+def addObstacle(debris, rng = random):
     '''Generate random dimensions for an obstacle'''
     #Default height for static obstacle
     height = 0.15
@@ -1098,8 +454,8 @@ def addObstacle(debris):
         minSize = 2
         maxSize = 5
     #Generate random size
-    width = float(random.randrange(minSize, maxSize)) / 100.0
-    depth = float(random.randrange(minSize, maxSize)) / 100.0
+    width = float(rng.randrange(minSize, maxSize)) / 100.0
+    depth = float(rng.randrange(minSize, maxSize)) / 100.0
     #Create obstacle
     obstacle = [width, height, depth, debris]
     return obstacle
@@ -1167,39 +523,35 @@ def getStartTileFromBay(startPos):
     return [startPos[0][0], startPos[0][1]]
 
 
-def selectObstaclePositon(obstacle, array, x, y, obstacles, startPos):
-    '''Select a valid position for the obstacle [x, y, z, rotation, radius]'''
+def obstaclePlacement(array, startPos, rng = random):
+    '''Create a placement engine for obstacles (keeping the first tile from the start clear)'''
+    placement = Placement.PlacementEngine(array, startPos[0], rng = rng)
+    #Calculate the starting tile (so it is not obscured)
+    placement.disallow(Placement.OBSTACLE, getStartTileFromBay(startPos))
+    placement.disallow(Placement.DEBRIS, getStartTileFromBay(startPos))
+    return placement
+
+
+def selectObstaclePositon(obstacle, array, x, y, obstacles, startPos, placement = None, spatialHash = None, rng = random):
+    '''Select a valid position for the obstacle [x, y, z, rotation, radius]
+    The position is added to the spatial hash of placed obstacles (made from the obstacles list if not given)'''
     #Calculate radius of obstacle
-    r = (((obstacle[0] / 2.0) ** 2) + ((obstacle[2] / 2.0) ** 2)) ** 0.50
-    #Not selected a valid tile yet
-    tSelected = None
+    r = obstacleRadius(obstacle)
+
+    #Obstacles already in the maze
+    if spatialHash == None:
+        spatialHash = obstacleHash(obstacles)
 
     #Starting position for tiles
     startX = -((x + 1) * 0.3 / 2.0)
     startZ = -((y + 1) * 0.3 / 2.0)
 
-    #The array position of the selected tile - none yet
-    tPos = [0, 0]
-    #100 attempts
-    att = 100
-
-    #Calculate the starting tile (so it is not obscured)
-    startTile = getStartTileFromBay(startPos)
+    #Engine holding the tiles that obstacles can go on
+    if placement == None:
+        placement = obstaclePlacement(array, startPos, rng)
 
-    #Repeat until a tile is found or all attempts exhausted
-    while tSelected == None and att > 0:
-        #Decrement attempts
-        att -= 1
-        #Get random tile position
-        tPos = [random.randrange(0, x), random.randrange(0, y)]
-        #Get the tile (offset for start of grid)
-        tile = array[tPos[1]][tPos[0]]
-        #If this is a tile and not the start point
-        if tile != None and startTile != [tPos[0], tPos[1]]:
-            #If it is not a special tile and does not contain an obstacle already
-            if not tile.getCheckpoint() and not tile.getTrap() and not tile.getSwamp() and not tile.getObstacle() and not tile.getGoal() and not tile.hasHuman:
-                #Target tile found
-                tSelected = tile
+    #Pick a random tile that is not special and does not contain an obstacle or human already
+    tSelected = placement.sample(Placement.OBSTACLE)
 
     #If no tile was selected
     if tSelected == None:
@@ -1214,7 +566,7 @@ def selectObstaclePositon(obstacle, array, x, y, obstacles, startPos):
     #walls = getTileAroundBlocking(array, tPos[0], tPos[1])
 
     #Get the centre position of the tile
-    tPos = [(tPos[0] * 0.3) + startX + 0.15, (tPos[1] * 0.3) + startZ + 0.15]
+    tPos = [(tSelected[0] * 0.3) + startX + 0.15, (tSelected[1] * 0.3) + startZ + 0.15]
 
     #Adjust away from present walls by the wall thickness and the radius
     '''if walls[0]:
@@ -1237,27 +589,14 @@ def selectObstaclePositon(obstacle, array, x, y, obstacles, startPos):
         #Decrement attempts
         att -= 1
         #Get a random position
-        pos = [round(random.uniform(xBounds[0], xBounds[1]), 5), round(random.uniform(zBounds[0], zBounds[1]), 5)]
+        pos = [round(rng.uniform(xBounds[0], xBounds[1]), 5), round(rng.uniform(zBounds[0], zBounds[1]), 5)]
 
         #Offset with tile position
         pos[0] = pos[0] + tPos[0]
         pos[1] = pos[1] + tPos[1]
 
-        allowed = True
-        #Iterate through placed obstacles
-        for obs in obstacles:
-            #If the obstacle is in the map
-            if obs[0][1] > -1:
-                #Get the x and z distances between the obstacles
-                xDist = abs(pos[0] - obs[1][0])
-                zDist = abs(pos[1] - obs[1][2])
-                #If the total distance is less than their combined radius
-                if (((xDist ** 2) + (zDist ** 2)) ** (0.5)) < r + obs[1][4]:
-                    #They intersect and the obstacle cannot be placed here
-                    allowed = False
-
-        #If there is no reason to disallow this place
-        if allowed:
+        #If it does not intersect any placed obstacle (only the nearby ones are checked)
+        if not spatialHash.collides(pos[0], pos[1], r):
             #It has been successfully placed
             done = True
 
@@ -1267,16 +606,17 @@ def selectObstaclePositon(obstacle, array, x, y, obstacles, startPos):
         return [0, -1000, 0, 0, r]
 
     #Random rotation for obstacle
-    rot = round(random.uniform(0.00, 6.28), 3)
+    rot = round(rng.uniform(0.00, 6.28), 3)
 
     #Add an obstacle to the selected tile
-    tSelected.addObstacle()
+    placement.place(Placement.OBSTACLE, tSelected)
+    spatialHash.add(pos[0], pos[1], r)
 
     #Return the position data for the tile
     return [pos[0], 0, pos[1], rot, r]
 
 
-def generateObstacles(bulky, debris, array, x, y, startPos):
+def generateObstacles(bulky, debris, array, x, y, startPos, rng = random):
     '''Generate a list of obstacles of length numObstacles'''
     #List to hold obstacle dimensions
     obstacles = []
@@ -1284,36 +624,111 @@ def generateObstacles(bulky, debris, array, x, y, startPos):
     placedBulky = 0
     placedDebris = 0
 
+    #Tiles obstacles can be placed on
+    placement = obstaclePlacement(array, startPos, rng)
+    #Obstacles placed so far
+    spatialHash = obstacleHash(obstacles)
+
     #Iterate for each static obstacle
     for i in range(0, bulky):
         #Create an obstacle and add it to the list
-        newObstacle = addObstacle(False)
-        newObstaclePos = selectObstaclePositon(newObstacle, array, x, y, obstacles, startPos)
+        newObstacle = addObstacle(False, rng)
+        newObstaclePos = selectObstaclePositon(newObstacle, array, x, y, obstacles, startPos, placement, spatialHash, rng)
         if newObstaclePos[1] > -1:
             placedBulky = placedBulky + 1
         obstacles.append([newObstacle, newObstaclePos])
         obstacles.append([newObstacle, [0, -1000, 0, 0, 0]])
 
+    #Spread debris over the tiles that are left (not special and without a bulky obstacle)
+    eligible = np.argwhere(placement.candidates(Placement.DEBRIS))
+    debrisTiles = [[int(t[1]), int(t[0])] for t in eligible]
+    sampler = Placement.PoissonDiskSampler(debrisTiles, [-((x + 1) * 0.3 / 2.0), -((y + 1) * 0.3 / 2.0)], spatialHash, rng)
+
     #Iterate for each piece of debris
     for i in range(0, debris):
-        #Create an obstacle and add it to the list
-        newObstacle = addObstacle(True)
-        obstacles.append([newObstacle, [0, -1000, 0, 0, 0]])
+        #Create a piece of debris and find a position for it
+        newObstacle = addObstacle(True, rng)
+        r = obstacleRadius(newObstacle)
+        pos = sampler.sample(r)
+        #If there is no room left
+        if pos == None:
+            obstacles.append([newObstacle, [0, -1000, 0, 0, r]])
+        else:
+            placedDebris = placedDebris + 1
+            #Random rotation for debris
+            rot = round(rng.uniform(0.00, 6.28), 3)
+            obstacles.append([newObstacle, [pos[0], 0, pos[1], rot, r]])
+
+    if placedBulky < bulky:
+        print("Only room for " + str(placedBulky) + " of " + str(bulky) + " bulky obstacles")
+    if placedDebris < debris:
+        print("Only room for " + str(placedDebris) + " of " + str(debris) + " debris")
 
     #Return the list of dimensions
     return obstacles, placedBulky, placedDebris
 
 
-def generatePlan (xSize, ySize, numCheckpoints, numTraps, bulkyObstacles, debris, numSwamps, numVisualHumans, numThermalHumans):
-    '''Perform a map generation up to png - does not update map file'''
+def obstacleTiles(obstacles, x, y):
+    '''Boolean array of the tiles that have an obstacle or debris placed on them'''
+    tiles = np.zeros((y, x), dtype = bool)
+    #Starting position for tiles
+    startX = -((x + 1) * 0.3 / 2.0)
+    startZ = -((y + 1) * 0.3 / 2.0)
+    for obs in obstacles:
+        #If the obstacle is in the map
+        if obs[1][1] > -1:
+            tiles[int((obs[1][2] - startZ) // 0.3), int((obs[1][0] - startX) // 0.3)] = True
+    return tiles
+
+
+def regenerateHumans(array, visual, thermal, x, y, rng = random):
+    '''Remove all the humans and add new ones (the maze, special tiles and obstacles are kept), returns the numbers placed'''
+    array.humanType[:, :] = 0
+    array.humanWall[:, :] = 0
+    array.flags &= ~HUMAN & 0xFF
+    return addHumans(array, visual, thermal, x, y, rng)
+
+
+def regenerateObstacles(array, bulky, debris, x, y, startPos, rng = random):
+    '''Remove all the obstacles and debris and add new ones (the maze, special tiles and humans are kept)
+    Returns the list of obstacles and the numbers of bulky obstacles and debris placed'''
+    array.flags &= ~OBSTACLE & 0xFF
+    return generateObstacles(bulky, debris, array, x, y, startPos, rng)
+
+
+def regenerateHazards(array, traps, swamps, x, y, startPos, obstacles, rng = random):
+    '''Remove all the traps and swamps and add new ones (keeping clear of humans, obstacles and debris), returns the numbers placed'''
+    array.flags &= ~(TRAP | SWAMP) & 0xFF
+    with Profiler.stage("placementIndex", array):
+        #The end tile is not kept after generation - only the start is kept clear
+        placement = Placement.PlacementEngine(array, startPos[0], rng = rng)
+        occupied = array.flagMask(HUMAN | OBSTACLE) | obstacleTiles(obstacles, x, y)
+        for feature in [Placement.TRAP, Placement.SWAMP]:
+            placement.eligible[feature] &= ~occupied
+
+    with Profiler.stage("addTraps", array):
+        placedTraps = addTraps(array, traps, startPos[0], None, x, y, placement)
+    with Profiler.stage("addSwamps", array):
+        placedSwamps = addSwamps(array, swamps, startPos[0], None, x, y, placement)
+    return placedTraps, placedSwamps
+
+
+def generatePlan (xSize, ySize, numCheckpoints, numTraps, bulkyObstacles, debris, numSwamps, numVisualHumans, numThermalHumans, engine = MazeEngines.defaultEngine, imagePath = None, seed = None):
+    '''Perform a map generation up to png (saved to imagePath if given) - does not update map file
+    If a seed is given the same parameters and seed always give the same world
+    (a random generator of its own is made from the seed so the shared random module is not reseeded)'''
+    rng = random.Random(seed)
     #Generate the world and tree
-    world, startPos, numVisual, numThermal = generateWorld(xSize, ySize, numCheckpoints, numTraps, numSwamps, numVisualHumans, numThermalHumans)
+    world, startPos, numVisual, numThermal = generateWorld(xSize, ySize, numCheckpoints, numTraps, numSwamps, numVisualHumans, numThermalHumans, engine, rng)
 
-    #Create a list of obstacles
-    obstacles, placedBulky, placedDebris = generateObstacles(bulkyObstacles, debris, world, xSize, ySize, startPos)
+    with Profiler.stage("generateObstacles", world):
+        #Create a list of obstacles
+        obstacles, placedBulky, placedDebris = generateObstacles(bulkyObstacles, debris, world, xSize, ySize, startPos, rng)
 
-    #Output the world as a picture
-    printWorld(world)
+    #Output the world as a picture (if there is somewhere to put it)
+    if imagePath != None:
+        with Profiler.stage("printWorld"):
+            printWorld(world, imagePath)
 
     print("Generation Successful")
 
@@ -1321,33 +736,24 @@ def generatePlan (xSize, ySize, numCheckpoints, numTraps, bulkyObstacles, debris
     return world, obstacles, startPos, numVisual, numThermal, placedBulky, placedDebris
 
 
-def generateWorldFile (world, obstacles, startPos, window):
-    #Array of wall tiles
-    walls = []
-
-    #Iterate vertically
-    for y in range(0, len(world)):
-        #Create a row
-        row = []
-        #Iterate horizontally
-        for x in range(0, len(world[0])):
-            #Add each tile [present, [uWall,rWall,dWall,lWall], checkpoint, trap, goal, swamp, humanType, humanWall, linearTile]
-            row.append([False, [False, False, False, False], False, False, False, False, 0, 0, False])
-        #Add row to array
-        walls.append(row)
-
-    #Iterate for each of the tiles
-    for y in range(0, len(world)):
-        for x in range(0, len(world[0])):
-            #If there is a tile there
-            if world[y][x] != None:
-                #Get the human data
-                humanInfo = world[y][x].getHumanData()
-                #Add the wall data
-                walls[y][x] = [True, world[y][x].getWalls(), world[y][x].getCheckpoint(), world[y][x].getTrap(), world[y][x].getGoal(), world[y][x].getSwamp(), humanInfo[0], humanInfo[1], world[y][x].getTileType()]
+def generateWorldFile (world, obstacles, startPos, window, filePath = None, mergeWalls = False, rng = random):
+    #Array of wall tiles [present, [uWall,rWall,dWall,lWall], checkpoint, trap, goal, swamp, humanType, humanWall, linearTile]
+    walls = world.toWallData()
 
     #Make a map from the walls and objects
-    WorldCreator.makeFile(walls, obstacles, startPos, window)
+    WorldCreator.makeFile(walls, obstacles, startPos, window, filePath, mergeWalls, rng)
+
+
+def generateStreamedWorld (xSize, ySize, filePath, rng = random):
+    '''Generate a maze row by row straight into a world file (memory is bounded by the width, not the size)
+    Only the maze and start tile are generated - there are no checkpoints, traps, swamps, humans or obstacles'''
+    #Start on a random tile of the top edge
+    startTile = [rng.randrange(0, xSize), 0]
+    #Stream the rows into the world file
+    rows = MazeEngines.ellerRows(xSize, ySize, rng)
+    WorldCreator.makeStreamedFile(rows, xSize, ySize, startTile, filePath)
+    #Return the start position (facing down into the maze)
+    return [startTile, 2]
 
 
 def checkNoNones (dataValues):
@@ -1360,68 +766,284 @@ def checkNoNones (dataValues):
     #Otherwise
     return True
 
-#Generate an empty map (to be loaded to begin)
-printWorld(createEmptyWorld(1, 1))
 
+class GenerationCancelled (Exception):
+    '''Raised in a GUI job when it is cancelled (at the start of the next generation stage)'''
+    pass
 
-#Create an instacnce of the user interface
-window = GUI.GenerateWindow()
 
-#The UI is currently in use
-guiActive = True
+#Messages shown in the GUI as each stage of a job starts
+stageDescriptions = {"carveMaze": "Carving maze",
+                     "openLoops": "Opening loops",
+                     "placementIndex": "Finding free tiles",
+                     "addCheckPoints": "Adding checkpoints",
+                     "addTraps": "Adding traps",
+                     "addSwamps": "Adding swamps",
+                     "addHumans": "Adding humans",
+                     "setLinearWalls": "Marking linear walls",
+                     "generateObstacles": "Placing obstacles",
+                     "writeWorldFile": "Writing world file"}
 
-#Set all generation parameters to Nones
-world = None
-obstacles = None
-thermalHumans = None
-visualHumans = None
-startTilePos = None
-placedBulky = None
-placedDebris = None
 
-#Loop while the UI is active
-while guiActive:
+class GeneratorApp ():
+    '''Runs the generator window - generating and saving happen on a worker thread while the window is driven by Tk's event loop'''
+    def __init__ (self) -> None:
+        #Create an instance of the user interface
+        self.window = GUI.GenerateWindow(engineNames = MazeEngines.engineNames())
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        #Set all generation parameters to Nones
+        self.world = None
+        self.obstacles = None
+        self.thermalHumans = None
+        self.visualHumans = None
+        self.startTilePos = None
+        self.placedBulky = None
+        self.placedDebris = None
+        self.bulkyObstacles = None
+        self.debris = None
+        self.placedTraps = None
+        self.placedSwamps = None
+        self.traps = None
+        self.swamps = None
+        #Random generator for placing parts again and saving (made from the seed of the plan)
+        self.seed = None
+        self.rng = None
+
+        #Thread running the current job (None if there isn't one)
+        self.worker = None
+        #Set to stop the current job at the start of its next stage
+        self.cancelEvent = threading.Event()
+        #Messages from the worker thread [type, value] (only read on the Tk thread)
+        self.messages = queue.Queue()
+        Profiler.stageListeners.append(self.stageStarted)
+
+        #Show an empty map to begin
+        self.showMap()
+
+    def run (self) -> None:
+        '''Show the window until it is closed'''
+        self.window.after(pollInterval, self.tick)
+        self.window.mainloop()
+        Profiler.stageListeners.remove(self.stageStarted)
+
+    def close (self) -> None:
+        '''Stop any job (it is a daemon thread so will not keep the program open) and close the window'''
+        self.cancelEvent.set()
+        self.window.destroy()
+
+    def hasMap (self) -> bool:
+        '''Returns true if there is a generated map that can be saved or changed'''
+        return checkNoNones([self.world, self.obstacles, self.thermalHumans, self.visualHumans, self.startTilePos, self.placedBulky, self.placedDebris])
+
+    def stageStarted (self, name: str, grid) -> None:
+        '''Called (on the worker thread) as each generation stage starts'''
+        #Only the job's stages are reported
+        if threading.current_thread() is not self.worker:
+            return
+        if self.cancelEvent.is_set():
+            raise GenerationCancelled()
+        #Send the map so far (taken here as the grid is only changed on this thread)
+        if grid != None:
+            self.messages.put(["map", MapRenderer.gridCodes(grid)])
+        self.messages.put(["progress", stageDescriptions.get(name, name)])
+
+    def startJob (self, description: str, job) -> None:
+        '''Run a job on the worker thread, job returns a function that is called on the Tk thread to use its results'''
+        self.cancelEvent.clear()
+        self.window.setBusy(True)
+        self.window.setProgress(description)
+        self.worker = threading.Thread(target = self.runJob, args = [job], daemon = True)
+        self.worker.start()
+
+    def runJob (self, job) -> None:
+        '''Body of the worker thread - posts the result of the job back to the Tk thread'''
+        try:
+            self.messages.put(["done", job()])
+        except GenerationCancelled:
+            self.messages.put(["cancelled", None])
+        except Exception as error:
+            traceback.print_exc()
+            self.messages.put(["failed", error])
+
+    def tick (self) -> None:
+        '''Handle button presses and messages from the worker (called regularly by Tk)'''
+        window = self.window
+        busy = self.worker != None
+
+        #If the current job is being cancelled
+        if window.cancelling:
+            window.cancelStarted()
+            if busy:
+                self.cancelEvent.set()
+                window.setProgress("Cancelling...")
+
+        #If a generation is being called for
+        if window.ready:
+            #A generation has started (resets flag so generation is not called again)
+            window.generateStarted()
+            if not busy:
+                self.startGeneration()
+
+        #If part of the map is being placed again
+        if window.regenerating != None:
+            part = window.regenerating
+            #Resets flag so it is not placed again twice
+            window.regenerateStarted()
+            if not busy and self.hasMap():
+                self.startRegeneration(part)
+
+        #If a save file is being called for
+        if window.saving:
+            #Saving has begin (resets flag so save is not called twice)
+            window.saveStarted()
+            if not busy and self.hasMap():
+                self.startSave()
+
+        #Use everything the worker has sent
+        latestMap = None
+        while not self.messages.empty():
+            kind, value = self.messages.get()
+            if kind == "map":
+                latestMap = value
+            else:
+                #A finished job shows its own map
+                if kind != "progress":
+                    latestMap = None
+                self.handleMessage(kind, value)
+        #Repaint the tiles that changed since the last tick
+        if latestMap is not None:
+            self.window.updateImage(previewCodes(latestMap))
+
+        #Check again soon
+        window.after(pollInterval, self.tick)
+
+    def handleMessage (self, kind: str, value) -> None:
+        '''Use a message from the worker thread'''
+        if kind == "progress":
+            if not self.cancelEvent.is_set():
+                self.window.setProgress(value + "...")
+            return
+
+        #The job has finished
+        self.worker.join()
+        self.worker = None
+        if kind == "done":
+            value()
+        else:
+            if kind == "cancelled":
+                self.window.setProgress("Cancelled")
+            else:
+                self.window.setProgress("Failed: " + str(value))
+            #Put back the map from before the job
+            self.showMap()
+        #Toggle the buttons to the correct state
+        self.window.setBusy(False)
+        self.window.setSaveButton(self.hasMap())
+        self.window.setRegenerateButtons(self.hasMap())
+
+    def showMap (self) -> None:
+        '''Update the map image to the current map (empty if there isn't one)'''
+        if self.world == None:
+            self.window.updateImage(previewImage(createEmptyWorld(1, 1)))
+        else:
+            self.window.updateImage(previewImage(self.world))
+
+    def showInformation (self) -> None:
+        '''Update the map image and output fields of the window'''
+        self.showMap()
+        self.window.setGeneratedInformation("Thermal: " + str(self.thermalHumans), "Visual: " + str(self.visualHumans), "Bulky: " + str(self.placedBulky) + "(" + str(self.bulkyObstacles) +")", "Debris: " + str(self.placedDebris) + "(" + str(self.debris) +")", "Traps: " + str(self.placedTraps) + "(" + str(self.traps) +")", "Swamps: " + str(self.placedSwamps) + "(" + str(self.swamps) +")")
 
-    #If a generation is being called for
-    if window.ready:
-        #Cannot save now
-        window.setSaveButton(False)
+    def startGeneration (self) -> None:
+        '''Generate a new map on the worker thread'''
         #Get generation values as follows:
         #[[xSize ySize], [thermal, visual], [bulky, debris], [checkpoints, traps, swamps]]
-        genValues = window.getValues()
-        #A generation has started (resets flag so generation is not called again)
-        window.generateStarted()
-        #Unpack the human values
-        thermalHumans, visualHumans = genValues[1][0], genValues[1][1]
-        #Generate a plan with the values
-        world, obstacles, startTilePos, visualHumans, thermalHumans, placedBulky, placedDebris = generatePlan(genValues[0][0], genValues[0][1], genValues[3][0], genValues[3][1], genValues[2][0], genValues[2][1], genValues[3][2], visualHumans, thermalHumans)
-        #Unpack the used obstacle counts
-        bulkyObstacles, debris = genValues[2][0], genValues[2][1]
-        #Update the UI image of the map
-        window.updateImage()
-
-        #Update the output fields of the window
-        window.setGeneratedInformation("Thermal: " + str(thermalHumans), "Visual: " + str(visualHumans), "Bulky: " + str(placedBulky) + "(" + str(bulkyObstacles) +")", "Debris: " + str(placedDebris) + "(" + str(debris) +")")
-
-    #If a save file is being called for
-    if window.saving:
-        #Cannot save now
-        window.setSaveButton(False)
-        #Saving has begin (resets flag so save is not called twice)
-        window.saveStarted()
-        #If all values that are needed are not None
-        if checkNoNones([world, obstacles, startTilePos, thermalHumans, visualHumans, placedBulky, placedDebris]):
-            #Generate and save a world
-            generateWorldFile(world, obstacles, startTilePos, window)
-
-    #Attempt update loops
-    try:
-        #Toggle the save button to the correct state
-        window.setSaveButton(checkNoNones([world, obstacles, thermalHumans, visualHumans, startTilePos, placedBulky, placedDebris]))
-        #Update loops for the UI - manually called to prevent blocking of this program
-        window.update_idletasks()
-        window.update()
-    #If an error occurred in the update (window closed)
-    except:
-        #Terminate the UI loop
-        guiActive = False
+        genValues = self.window.getValues()
+        engine = self.window.getEngine()
+        #Every map is generated from a seed so it (and anything placed again on it) can be reproduced
+        seed = random.getrandbits(32)
+        rng = random.Random(seed)
+
+        def job ():
+            plan = generatePlan(genValues[0][0], genValues[0][1], genValues[3][0], genValues[3][1], genValues[2][0], genValues[2][1], genValues[3][2], genValues[1][1], genValues[1][0], engine, seed = seed)
+
+            def finish ():
+                self.world, self.obstacles, self.startTilePos, self.visualHumans, self.thermalHumans, self.placedBulky, self.placedDebris = plan
+                self.seed, self.rng = seed, rng
+                #Unpack the used obstacle counts
+                self.bulkyObstacles, self.debris = genValues[2][0], genValues[2][1]
+                #Count the placed hazards (each is one tile)
+                self.placedTraps, self.placedSwamps = int(np.count_nonzero(self.world.flagMask(TRAP))), int(np.count_nonzero(self.world.flagMask(SWAMP)))
+                self.traps, self.swamps = genValues[3][1], genValues[3][2]
+                self.showInformation()
+                self.window.setProgress("Generated (seed " + str(seed) + ")")
+            return finish
+
+        self.startJob("Generating...", job)
+
+    def startRegeneration (self, part: str) -> None:
+        '''Place humans, obstacles or hazards again on the worker thread'''
+        #Get generation values (same layout as when generating)
+        genValues = self.window.getValues()
+        #Changes are made to a copy so a cancelled job leaves the shown map as it was
+        world = self.world.copy()
+        startTilePos = self.startTilePos
+        obstacles = self.obstacles
+        #Jobs run one at a time so they can share the map's generator
+        rng = self.rng
+
+        def job ():
+            if part == "humans":
+                with Profiler.stage("addHumans", world):
+                    visualHumans, thermalHumans = regenerateHumans(world, genValues[1][1], genValues[1][0], world.width, world.height, rng)
+            elif part == "obstacles":
+                with Profiler.stage("generateObstacles", world):
+                    newObstacles, placedBulky, placedDebris = regenerateObstacles(world, genValues[2][0], genValues[2][1], world.width, world.height, startTilePos, rng)
+            elif part == "hazards":
+                #Traps and swamps are reported as separate stages (see regenerateHazards)
+                placedTraps, placedSwamps = regenerateHazards(world, genValues[3][1], genValues[3][2], world.width, world.height, startTilePos, obstacles, rng)
+
+            def finish ():
+                self.world = world
+                if part == "humans":
+                    self.visualHumans, self.thermalHumans = visualHumans, thermalHumans
+                elif part == "obstacles":
+                    self.obstacles, self.placedBulky, self.placedDebris = newObstacles, placedBulky, placedDebris
+                    self.bulkyObstacles, self.debris = genValues[2][0], genValues[2][1]
+                elif part == "hazards":
+                    self.placedTraps, self.placedSwamps = placedTraps, placedSwamps
+                    self.traps, self.swamps = genValues[3][1], genValues[3][2]
+                #Redraw the changed tiles of the map
+                self.showInformation()
+                self.window.setProgress("Generated")
+            return finish
+
+        self.startJob("Placing " + part + "...", job)
+
+    def startSave (self) -> None:
+        '''Save the map as a world file on the worker thread'''
+        #The file dialog has to be shown on the Tk thread
+        path = self.window.getPathSelection().strip()
+        #Nothing to do if the dialog was closed
+        if path == "":
+            return
+        #Add the .wbt extension unless it is a world or compact map file
+        path = WorldCreator.savePath(path)
+        world, obstacles, startTilePos, rng = self.world, self.obstacles, self.startTilePos, self.rng
+
+        def job ():
+            generateWorldFile(world, obstacles, startTilePos, None, path, rng = rng)
+
+            def finish ():
+                self.window.setProgress("Saved " + os.path.basename(path))
+            return finish
+
+        self.startJob("Saving...", job)
+
+
+def runGUI ():
+    '''Open the generator window and run it until it is closed'''
+    GeneratorApp().run()
+
+
+if __name__ == "__main__":
+    runGUI()
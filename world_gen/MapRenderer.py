@@ -0,0 +1,268 @@
+"""Map Generation Map Renderer v5
+
+Renders a MazeGrid to an RGB image held in a single NumPy array.
+Every tile is drawn at once for each layer (floor, linear border, walls, humans, obstacles)
+using boolean masks and slice assignment rather than a pixel at a time.
+
+Tiles that look the same (same walls, floor, human and obstacle) share one sprite, which is kept
+in a least recently used cache so re-rendering a similar map is mostly cache hits.
+PreviewImage keeps the last render and only redraws the tiles that look different since then.
+It can also be updated from a snapshot of the tile codes (gridCodes) so a map that is still being
+generated on another thread can be drawn without reading its arrays while they change.
+
+Changelog:
+ V1:
+ - Replaced per pixel printWorld drawing with array slicing
+ V2:
+ - Added tile sprite cache
+ V3:
+ - Added preview image that only redraws the tiles that have changed
+ V4:
+ - Preview images can be drawn straight at a smaller tile size to fit a size in pixels
+ V5:
+ - Preview images can be updated from tile code snapshots and record which tiles were redrawn
+"""
+
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+import MazeGrid
+
+#Colours used for the map
+WHITE = (255, 255, 255)
+WALL = (0, 0, 255)
+CHECKPOINT = (175, 175, 175)
+TRAP = (0, 0, 0)
+GOAL = (0, 255, 0)
+SWAMP = (222, 184, 135)
+VISUAL_HUMAN = (255, 0, 255)
+THERMAL_HUMAN = (255, 0, 0)
+OBSTACLE = (255, 127, 0)
+LINEAR = (231, 243, 247)
+
+#Size of a tile in the full size map
+defaultTileSize = 100
+
+
+def scaled (value: int, tileSize: int) -> int:
+    '''Scale a pixel position on a 100 pixel tile to a tile of the given size'''
+    return int(round(value * tileSize / 100.0))
+
+
+def renderTiles (walls: np.ndarray, flags: np.ndarray, humanType: np.ndarray, humanWall: np.ndarray, tileSize = defaultTileSize) -> np.ndarray:
+    '''Render a flat list of tiles, returns an array of shape (tiles, tileSize, tileSize, 3)'''
+    S = tileSize
+    tiles = np.empty((len(walls), S, S, 3), dtype = np.uint8)
+
+    #Floor colour (later entries take priority)
+    tiles[:] = WHITE
+    linear = (flags & MazeGrid.LINEAR) != 0
+    tiles[linear] = LINEAR
+    for flag, colour in [(MazeGrid.CHECKPOINT, CHECKPOINT), (MazeGrid.TRAP, TRAP), (MazeGrid.GOAL, GOAL), (MazeGrid.SWAMP, SWAMP)]:
+        tiles[(flags & flag) != 0] = colour
+
+    #Light border around linear tiles
+    low = scaled(10, S)
+    high = scaled(90, S) + 1
+    tiles[linear, :low, :] = LINEAR
+    tiles[linear, high:, :] = LINEAR
+    tiles[linear, :, :low] = LINEAR
+    tiles[linear, :, high:] = LINEAR
+
+    #Wall, human and obstacle sizes
+    thickness = max(1, scaled(4, S))
+    humanThickness = max(1, scaled(3, S))
+    centreStart = scaled(30, S)
+    centreEnd = max(centreStart + 1, scaled(70, S))
+
+    #Human colour for each tile
+    thermal = humanType == 4
+
+    #Slices for the wall and the human in front of it for each direction [up, right, down, left]
+    #(row slice, column slice) of the wall then of the human
+    wallSlices = [(slice(0, thickness), slice(0, S)),
+                  (slice(0, S), slice(S - thickness, S)),
+                  (slice(S - thickness, S), slice(0, S)),
+                  (slice(0, S), slice(0, thickness))]
+    humanSlices = [(slice(thickness, thickness + humanThickness), slice(centreStart, centreEnd)),
+                   (slice(centreStart, centreEnd), slice(S - thickness - humanThickness, S - thickness)),
+                   (slice(S - thickness - humanThickness, S - thickness), slice(centreStart, centreEnd)),
+                   (slice(centreStart, centreEnd), slice(thickness, thickness + humanThickness))]
+
+    #Draw in the same order as the original map (up, left, down, right)
+    for d in [0, 3, 2, 1]:
+        hasWall = (walls & MazeGrid.wallBits[d]) != 0
+        rows, cols = wallSlices[d]
+        tiles[hasWall, rows, cols] = WALL
+        #Humans are only shown on a wall that is present
+        hasHuman = hasWall & (humanType > 0) & (humanWall == d)
+        rows, cols = humanSlices[d]
+        tiles[hasHuman & ~thermal, rows, cols] = VISUAL_HUMAN
+        tiles[hasHuman & thermal, rows, cols] = THERMAL_HUMAN
+
+    #Obstacle marker in the centre of the tile
+    hasObstacle = (flags & MazeGrid.OBSTACLE) != 0
+    tiles[hasObstacle, centreStart:centreEnd, centreStart:centreEnd] = OBSTACLE
+
+    return tiles
+
+
+#Flags that change how a tile looks
+drawnFlags = MazeGrid.specialFlags | MazeGrid.OBSTACLE | MazeGrid.LINEAR
+
+
+def tileCodes (walls: np.ndarray, flags: np.ndarray, humanType: np.ndarray, humanWall: np.ndarray) -> np.ndarray:
+    '''Pack everything that changes how a tile looks into one integer per tile
+    [walls 4 bits, drawn flags 8 bits, human type 3 bits, human wall 2 bits]'''
+    codes = walls.astype(np.int32)
+    codes |= (flags & drawnFlags).astype(np.int32) << 4
+    codes |= humanType.astype(np.int32) << 12
+    #The human wall only matters if there is a human
+    codes |= np.where(humanType > 0, humanWall, 0).astype(np.int32) << 15
+    return codes
+
+
+def gridCodes (grid) -> np.ndarray:
+    '''Get the tile codes for every tile of a grid (a snapshot that does not change with the grid)'''
+    return tileCodes(grid.walls, grid.flags, grid.humanType, grid.humanWall)
+
+
+def decodeTiles (codes: np.ndarray) -> tuple:
+    '''Unpack tile codes into (walls, flags, humanType, humanWall) arrays'''
+    walls = (codes & 15).astype(np.uint8)
+    flags = ((codes >> 4) & 255).astype(np.uint8)
+    humanType = ((codes >> 12) & 7).astype(np.uint8)
+    humanWall = ((codes >> 15) & 3).astype(np.uint8)
+    return walls, flags, humanType, humanWall
+
+
+class TileSpriteCache ():
+    '''Least recently used cache of rendered tile sprites keyed by tile size and tile code'''
+    def __init__ (self, maxSprites = 512) -> None:
+        self.maxSprites = maxSprites
+        self.sprites = OrderedDict()
+        #Number of sprites found in and missing from the cache
+        self.hits = 0
+        self.misses = 0
+
+    def getSprites (self, codes: np.ndarray, tileSize = defaultTileSize) -> np.ndarray:
+        '''Get the sprites for a list of unique tile codes, rendering any that are not cached'''
+        sprites = np.empty((len(codes), tileSize, tileSize, 3), dtype = np.uint8)
+        missing = []
+
+        #Copy the cached sprites
+        for i, code in enumerate(codes.tolist()):
+            key = (tileSize, code)
+            sprite = self.sprites.get(key)
+            if sprite is None:
+                missing.append(i)
+            else:
+                #Mark as most recently used
+                self.sprites.move_to_end(key)
+                sprites[i] = sprite
+        self.hits = self.hits + len(codes) - len(missing)
+        self.misses = self.misses + len(missing)
+
+        #Render all the missing sprites together
+        if len(missing) > 0:
+            missingCodes = codes[missing]
+            sprites[missing] = renderTiles(*decodeTiles(missingCodes), tileSize)
+            for i, code in zip(missing, missingCodes.tolist()):
+                self.sprites[(tileSize, code)] = sprites[i].copy()
+            #Remove the least recently used sprites
+            while len(self.sprites) > self.maxSprites:
+                self.sprites.popitem(last = False)
+
+        return sprites
+
+    def clear (self) -> None:
+        '''Remove all cached sprites'''
+        self.sprites.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+#Sprite cache shared by all renders
+spriteCache = TileSpriteCache()
+
+
+def renderCodes (codes: np.ndarray, tileSize = defaultTileSize, cache = None) -> np.ndarray:
+    '''Render a (height, width) array of tile codes, returns an RGB array of shape (height * tileSize, width * tileSize, 3)'''
+    if cache is None:
+        cache = spriteCache
+    height, width = codes.shape
+    #Get the sprite for each different looking tile
+    uniqueCodes, tileSprite = np.unique(codes.ravel(), return_inverse = True)
+    sprites = cache.getSprites(uniqueCodes, tileSize)
+    #Paste the sprites for every tile
+    tiles = sprites[tileSprite.ravel()]
+    #Lay the tiles out in rows and columns
+    tiles = tiles.reshape(height, width, tileSize, tileSize, 3)
+    return tiles.transpose(0, 2, 1, 3, 4).reshape(height * tileSize, width * tileSize, 3)
+
+
+def renderWorld (grid, tileSize = defaultTileSize, cache = None) -> np.ndarray:
+    '''Render a whole grid, returns an RGB array of shape (height * tileSize, width * tileSize, 3)'''
+    return renderCodes(gridCodes(grid), tileSize, cache)
+
+
+def fitTileSize (grid, size: int) -> int:
+    '''Largest tile size (at least 1 pixel) that fits the whole grid within size by size pixels'''
+    return max(1, size // max(grid.width, grid.height))
+
+
+def renderImage (grid, tileSize = defaultTileSize) -> Image.Image:
+    '''Render a whole grid to a PIL image'''
+    return Image.fromarray(renderWorld(grid, tileSize), "RGB")
+
+
+class PreviewImage ():
+    '''The last rendered image of a grid, updated by redrawing only the tiles that have changed'''
+    def __init__ (self, tileSize = defaultTileSize, cache = None) -> None:
+        self.tileSize = tileSize
+        if cache is None:
+            cache = spriteCache
+        self.cache = cache
+        #Tile codes the image was drawn from and the image
+        self.codes = None
+        self.image = None
+        #Number of tiles redrawn by the last update
+        self.redrawn = 0
+        #Boolean array of the tiles redrawn by the last update
+        self.dirty = None
+
+    def update (self, grid, tileSize = None) -> np.ndarray:
+        '''Bring the image up to date with the grid (optionally changing the tile size), returns the RGB array'''
+        return self.updateCodes(gridCodes(grid), tileSize)
+
+    def updateCodes (self, codes: np.ndarray, tileSize = None) -> np.ndarray:
+        '''Bring the image up to date with a snapshot of the tile codes (optionally changing the tile size), returns the RGB array'''
+        redrawAll = self.codes is None or self.codes.shape != codes.shape
+        if tileSize != None and tileSize != self.tileSize:
+            self.tileSize = tileSize
+            redrawAll = True
+        #Different size - draw everything
+        if redrawAll:
+            self.image = renderCodes(codes, self.tileSize, self.cache)
+            self.codes = codes
+            self.redrawn = codes.size
+            self.dirty = np.ones(codes.shape, dtype = bool)
+            return self.image
+
+        self.dirty = codes != self.codes
+        changed = np.argwhere(self.dirty)
+        self.redrawn = len(changed)
+        if len(changed) > 0:
+            changedCodes = codes[changed[:, 0], changed[:, 1]]
+            uniqueCodes, tileSprite = np.unique(changedCodes, return_inverse = True)
+            sprites = self.cache.getSprites(uniqueCodes, self.tileSize)
+            S = self.tileSize
+            #Paste the new sprite over each changed tile
+            for (y, x), i in zip(changed.tolist(), tileSprite.ravel().tolist()):
+                self.image[y * S:(y + 1) * S, x * S:(x + 1) * S] = sprites[i]
+            self.codes = codes
+        return self.image
+
+    def toImage (self) -> Image.Image:
+        '''Get the current image as a PIL image'''
+        return Image.fromarray(self.image, "RGB")
@@ -0,0 +1,255 @@
+"""Map Generation Maze Engines v2
+
+Interchangeable maze carving algorithms. Every engine takes a MazeGrid (all walls present),
+the [x, y] tile to start from and a random number generator (the random module or a random.Random
+so that a maze can be reproduced from a seed) and opens walls until every tile is connected.
+
+Visited tiles are tracked in a flat bytearray indexed by y * width + x so checking a tile is O(1).
+
+ellerRows is different - it streams a maze one row at a time using only memory for a single row,
+for mazes too large to hold in a MazeGrid.
+
+Changelog:
+ V1:
+ - Added depth first, Kruskal, Wilson and Prim engines
+ V2:
+ - Added streaming row by row generation (Eller's algorithm)
+"""
+
+import random
+import numpy as np
+import MazeGrid
+
+#Surrounding tile directions [up, right, down, left]
+around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
+
+
+def neighbours (width: int, height: int, x: int, y: int) -> list:
+    '''Return a list of [x, y, direction] for the surrounding tiles that are in the grid'''
+    found = []
+    #Iterate for each surrounding tile (in direction order)
+    for d in range(0, 4):
+        otherX = x + around[d][0]
+        otherY = y + around[d][1]
+        #If the position is in the grid
+        if otherX >= 0 and otherX < width and otherY >= 0 and otherY < height:
+            found.append([otherX, otherY, d])
+    return found
+
+
+def depthFirst (grid, start, rng = random) -> None:
+    '''Carve a maze with an iterative depth first search (recursive backtracker)'''
+    width = grid.width
+    height = grid.height
+    #Tiles that have been visited
+    visited = bytearray(width * height)
+    visited[start[1] * width + start[0]] = 1
+    #The current stack - allowing for backtracking
+    stack = [start]
+
+    #Until it has backtracked past the start
+    while len(stack) > 0:
+        x, y = stack[-1]
+        usable = []
+        #Iterate through the surrounding tiles
+        for otherX, otherY, d in neighbours(width, height, x, y):
+            #If it hasn't been visited yet
+            if not visited[otherY * width + otherX]:
+                usable.append([otherX, otherY, d])
+
+        #If there are tiles that can be reached
+        if len(usable) > 0:
+            #Pick a random tile and open the wall to it
+            otherX, otherY, d = usable[rng.randrange(0, len(usable))]
+            grid.openWall(x, y, d)
+            #Add tile to visited and to the stack
+            visited[otherY * width + otherX] = 1
+            stack.append([otherX, otherY])
+        else:
+            #No unvisited tiles to go to - go back a tile
+            stack.pop()
+
+
+def kruskal (grid, start, rng = random) -> None:
+    '''Carve a maze with randomised Kruskal (shuffled walls joined with union find)'''
+    width = grid.width
+    height = grid.height
+    #Each tile starts in its own set
+    parent = list(range(width * height))
+    size = [1] * (width * height)
+
+    def find (i: int) -> int:
+        '''Find the root of a set (with path halving)'''
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    #Every wall between two tiles (only right and down so each is counted once)
+    walls = []
+    for y in range(0, height):
+        for x in range(0, width):
+            if x < width - 1:
+                walls.append((x, y, 1))
+            if y < height - 1:
+                walls.append((x, y, 2))
+    rng.shuffle(walls)
+
+    #Number of joins needed to connect every tile
+    remaining = width * height - 1
+    for x, y, d in walls:
+        if remaining == 0:
+            break
+        a = find(y * width + x)
+        b = find((y + around[d][1]) * width + x + around[d][0])
+        #If the tiles are not already connected
+        if a != b:
+            grid.openWall(x, y, d)
+            #Join the smaller set onto the larger
+            if size[a] < size[b]:
+                a, b = b, a
+            parent[b] = a
+            size[a] = size[a] + size[b]
+            remaining = remaining - 1
+
+
+def wilson (grid, start, rng = random) -> None:
+    '''Carve a maze with Wilson's algorithm (loop erased random walks, an unbiased spanning tree)'''
+    width = grid.width
+    height = grid.height
+    #Tiles that are part of the maze
+    inMaze = bytearray(width * height)
+    inMaze[start[1] * width + start[0]] = 1
+    #Direction last left each tile in by the current walk (overwriting erases loops)
+    walkDirection = bytearray(width * height)
+
+    #Walk from every tile in a random order
+    order = list(range(width * height))
+    rng.shuffle(order)
+
+    for first in order:
+        if inMaze[first]:
+            continue
+        #Random walk until the maze is reached
+        x = first % width
+        y = first // width
+        while not inMaze[y * width + x]:
+            otherX, otherY, d = rng.choice(neighbours(width, height, x, y))
+            walkDirection[y * width + x] = d
+            x = otherX
+            y = otherY
+        #Follow the loop erased walk adding it to the maze
+        x = first % width
+        y = first // width
+        while not inMaze[y * width + x]:
+            inMaze[y * width + x] = 1
+            x, y = grid.openWall(x, y, walkDirection[y * width + x])
+
+
+def prim (grid, start, rng = random) -> None:
+    '''Carve a maze with randomised Prim (grow from the start by a random frontier tile)'''
+    width = grid.width
+    height = grid.height
+    inMaze = bytearray(width * height)
+    inFrontier = bytearray(width * height)
+    frontier = []
+
+    def addTile (x: int, y: int) -> None:
+        '''Add a tile to the maze and its neighbours to the frontier'''
+        inMaze[y * width + x] = 1
+        for otherX, otherY, d in neighbours(width, height, x, y):
+            i = otherY * width + otherX
+            if not inMaze[i] and not inFrontier[i]:
+                inFrontier[i] = 1
+                frontier.append([otherX, otherY])
+
+    addTile(start[0], start[1])
+
+    while len(frontier) > 0:
+        #Remove a random frontier tile (swap with the last so it is O(1))
+        r = rng.randrange(0, len(frontier))
+        frontier[r], frontier[-1] = frontier[-1], frontier[r]
+        x, y = frontier.pop()
+        #Connect it to a random neighbour already in the maze
+        connected = [n for n in neighbours(width, height, x, y) if inMaze[n[1] * width + n[0]]]
+        d = rng.choice(connected)[2]
+        grid.openWall(x, y, d)
+        addTile(x, y)
+
+
+def ellerRows (width: int, height: int, rng = random, joinChance = 0.5):
+    '''Generate a maze with Eller's algorithm, yielding a wall bit mask array for each row in turn'''
+    #Set label of each tile in the current row and the tiles in each set
+    labels = list(range(0, width))
+    members = {i: [i] for i in range(0, width)}
+    nextLabel = width
+
+    #Walls opened on the top of the current row by the row above
+    openedAbove = [False] * width
+
+    for y in range(0, height):
+        lastRow = y == height - 1
+        row = np.full(width, MazeGrid.allWalls, dtype = np.uint8)
+
+        #Open up to the row above
+        for x in range(0, width):
+            if openedAbove[x]:
+                row[x] &= ~MazeGrid.wallBits[0] & MazeGrid.allWalls
+
+        #Randomly join adjacent tiles in different sets (the last row joins them all)
+        for x in range(0, width - 1):
+            a = labels[x]
+            b = labels[x + 1]
+            if a != b and (lastRow or rng.random() < joinChance):
+                row[x] &= ~MazeGrid.wallBits[1] & MazeGrid.allWalls
+                row[x + 1] &= ~MazeGrid.wallBits[3] & MazeGrid.allWalls
+                #Merge the smaller set into the larger
+                if len(members[a]) < len(members[b]):
+                    a, b = b, a
+                for i in members[b]:
+                    labels[i] = a
+                members[a].extend(members[b])
+                del members[b]
+
+        if not lastRow:
+            #Every set must continue down at least once
+            openedAbove = [False] * width
+            for label, tiles in members.items():
+                down = [i for i in tiles if rng.random() < joinChance]
+                if len(down) == 0:
+                    down = [rng.choice(tiles)]
+                for i in down:
+                    openedAbove[i] = True
+                    row[i] &= ~MazeGrid.wallBits[2] & MazeGrid.allWalls
+
+            #Tiles that did not continue down start new sets on the next row
+            newMembers = {}
+            for x in range(0, width):
+                if not openedAbove[x]:
+                    labels[x] = nextLabel
+                    nextLabel = nextLabel + 1
+                newMembers.setdefault(labels[x], []).append(x)
+            members = newMembers
+
+        yield row
+
+
+#Available engines by name (the first is the default)
+engines = {"Depth First": depthFirst,
+           "Kruskal": kruskal,
+           "Wilson": wilson,
+           "Prim": prim}
+
+defaultEngine = "Depth First"
+
+
+def engineNames () -> list:
+    '''Return the names of all the maze engines'''
+    return list(engines.keys())
+
+
+def carve (grid, start, engine = defaultEngine, rng = random) -> None:
+    '''Carve a maze into the grid with the named engine'''
+    if engine not in engines:
+        raise ValueError("Unknown maze engine: " + str(engine))
+    engines[engine](grid, start, rng)
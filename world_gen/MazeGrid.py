@@ -0,0 +1,282 @@
+"""Map Generation Maze Grid Model v2
+
+Stores a whole maze as a handful of NumPy arrays instead of one object per tile:
+ - walls and linear walls are 4 bit masks per tile [up, right, down, left]
+ - special tile states (checkpoint, trap, goal, swamp, obstacle, linear, human) are flag bits
+ - humans are stored as a type and the wall they are on
+
+TileView and MazeRow give the old tile interface (world[y][x].getWalls() etc.) on top of the arrays
+so the generation stages can keep using it while hot loops read the arrays directly.
+
+Changelog:
+ V1:
+ - Replaced list of Tile objects with array backed grid
+ V2:
+ - Added copy so a map can be changed without affecting the one shown
+"""
+
+import numpy as np
+
+#Surrounding tile directions [up, right, down, left]
+around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
+#For each direction this is the alternative in the opposite direction
+oppositeDirections = [2, 3, 0, 1]
+
+#Bit used in the wall masks for each direction [up, right, down, left]
+wallBits = [1, 2, 4, 8]
+#All four walls present
+allWalls = 15
+
+#Flag bits for special tile states
+CHECKPOINT = 1
+TRAP = 2
+GOAL = 4
+SWAMP = 8
+OBSTACLE = 16
+LINEAR = 32
+HUMAN = 64
+
+#Flags that make a tile a special floor tile (only one can be present)
+specialFlags = CHECKPOINT | TRAP | GOAL | SWAMP
+
+
+class MazeGrid ():
+    '''A maze of width by height tiles held in NumPy arrays'''
+    def __init__ (self, width: int, height: int) -> None:
+        '''Create a grid with all four walls on every tile and no special parts'''
+        self.width = width
+        self.height = height
+        #Wall bit mask for each tile (all walls)
+        self.walls = np.full((height, width), allWalls, dtype = np.uint8)
+        #Linear wall bit mask for each tile
+        self.linearWalls = np.zeros((height, width), dtype = np.uint8)
+        #Special tile flags
+        self.flags = np.zeros((height, width), dtype = np.uint8)
+        #Human type (0 - none, 1 - harmed, 2 - unharmed, 3 - stable, 4 - thermal) and wall it is on
+        self.humanType = np.zeros((height, width), dtype = np.uint8)
+        self.humanWall = np.zeros((height, width), dtype = np.uint8)
+
+    def __len__ (self) -> int:
+        '''Number of rows (so len(world) and len(world[0]) work as they did with lists)'''
+        return self.height
+
+    def __getitem__ (self, y: int):
+        '''Get a row of the grid'''
+        if y < 0 or y >= self.height:
+            raise IndexError("Maze row out of range")
+        return MazeRow(self, y)
+
+    def tile (self, x: int, y: int):
+        '''Get a view of a single tile'''
+        return TileView(self, x, y)
+
+    def inBounds (self, x: int, y: int) -> bool:
+        '''Returns true if the position is within the grid'''
+        return x >= 0 and x < self.width and y >= 0 and y < self.height
+
+    def openWall (self, x: int, y: int, direction: int) -> list:
+        '''Open the wall in the given direction on this tile and the adjacent one, returns the adjacent position'''
+        otherX = x + around[direction][0]
+        otherY = y + around[direction][1]
+        self.walls[y, x] &= ~wallBits[direction] & allWalls
+        self.walls[otherY, otherX] &= ~wallBits[oppositeDirections[direction]] & allWalls
+        return [otherX, otherY]
+
+    def hasFlag (self, x: int, y: int, flag: int) -> bool:
+        '''Returns true if any of the given flags are set on the tile'''
+        return bool(self.flags[y, x] & flag)
+
+    def setSpecial (self, x: int, y: int, flag: int) -> None:
+        '''Set a special floor flag, removing any other special floor flag'''
+        self.flags[y, x] = (int(self.flags[y, x]) & ~specialFlags) | flag
+
+    def wallMask (self, direction: int) -> np.ndarray:
+        '''Boolean array of tiles with a wall in the given direction'''
+        return (self.walls & wallBits[direction]) != 0
+
+    def flagMask (self, flag: int) -> np.ndarray:
+        '''Boolean array of tiles with any of the given flags'''
+        return (self.flags & flag) != 0
+
+    def copy (self):
+        '''Create an independent copy of the grid'''
+        other = MazeGrid(self.width, self.height)
+        other.walls[:, :] = self.walls
+        other.linearWalls[:, :] = self.linearWalls
+        other.flags[:, :] = self.flags
+        other.humanType[:, :] = self.humanType
+        other.humanWall[:, :] = self.humanWall
+        return other
+
+    def toWallData (self) -> list:
+        '''Convert to the list format used by the world creator
+        [present, [uWall,rWall,dWall,lWall], checkpoint, trap, goal, swamp, humanType, humanWall, linearTile]'''
+        walls = self.walls.tolist()
+        flags = self.flags.tolist()
+        humanType = self.humanType.tolist()
+        humanWall = self.humanWall.tolist()
+
+        data = []
+        #Iterate vertically
+        for y in range(0, self.height):
+            row = []
+            #Iterate horizontally
+            for x in range(0, self.width):
+                w = walls[y][x]
+                f = flags[y][x]
+                row.append([True, [w & 1 != 0, w & 2 != 0, w & 4 != 0, w & 8 != 0], f & CHECKPOINT != 0, f & TRAP != 0, f & GOAL != 0, f & SWAMP != 0, humanType[y][x], humanWall[y][x], f & LINEAR != 0])
+            data.append(row)
+
+        return data
+
+
+class MazeRow ():
+    '''A single row of a maze grid'''
+    def __init__ (self, grid: MazeGrid, y: int) -> None:
+        self.grid = grid
+        self.y = y
+
+    def __len__ (self) -> int:
+        return self.grid.width
+
+    def __getitem__ (self, x: int):
+        '''Get the tile view at this position in the row'''
+        if x < 0 or x >= self.grid.width:
+            raise IndexError("Maze column out of range")
+        return TileView(self.grid, x, self.y)
+
+
+class TileView ():
+    '''View of one tile in a maze grid with the same interface as the old Tile object'''
+    def __init__ (self, grid: MazeGrid, x: int, y: int) -> None:
+        self.grid = grid
+        self.x = x
+        self.y = y
+
+    def __eq__ (self, other) -> bool:
+        return isinstance(other, TileView) and other.grid is self.grid and other.x == self.x and other.y == self.y
+
+    def __hash__ (self) -> int:
+        return hash((id(self.grid), self.x, self.y))
+
+    def addWalls (self, wallList: list) -> None:
+        '''Add a list of walls'''
+        for d in wallList:
+            self.grid.walls[self.y, self.x] |= wallBits[d]
+
+    def addLinearWall (self, wall: int) -> bool:
+        '''Set a linear wall, returns false if there is no wall there'''
+        if wall >= 0 and wall < 4 and self.grid.walls[self.y, self.x] & wallBits[wall]:
+            self.grid.linearWalls[self.y, self.x] |= wallBits[wall]
+            return True
+        return False
+
+    def removeWalls (self, wallList: list) -> None:
+        '''Remove a list of walls'''
+        for d in wallList:
+            self.grid.walls[self.y, self.x] &= ~wallBits[d] & allWalls
+
+    def addCheckpoint (self) -> None:
+        '''Add a checkpoint - removes traps, goals and swamps'''
+        self.grid.setSpecial(self.x, self.y, CHECKPOINT)
+
+    def removeCheckpoint (self) -> None:
+        '''Remove a checkpoint'''
+        self.grid.flags[self.y, self.x] &= ~CHECKPOINT & 0xFF
+
+    def addTrap (self) -> None:
+        '''Add a trap - removes checkpoints, goals and swamps'''
+        self.grid.setSpecial(self.x, self.y, TRAP)
+
+    def removeTrap (self) -> None:
+        '''Remove a trap'''
+        self.grid.flags[self.y, self.x] &= ~TRAP & 0xFF
+
+    def addGoal (self) -> None:
+        '''Add a goal - removes checkpoints, traps and swamps'''
+        self.grid.setSpecial(self.x, self.y, GOAL)
+
+    def removeGoal (self) -> None:
+        '''Remove a goal'''
+        self.grid.flags[self.y, self.x] &= ~GOAL & 0xFF
+
+    def addSwamp (self) -> None:
+        '''Add a swamp - removes checkpoints, traps and goals'''
+        self.grid.setSpecial(self.x, self.y, SWAMP)
+
+    def removeSwamp (self) -> None:
+        '''Remove a swamp'''
+        self.grid.flags[self.y, self.x] &= ~SWAMP & 0xFF
+
+    def getWalls (self) -> list:
+        '''Returns a list of bools which represents if each of the four walls is present'''
+        w = int(self.grid.walls[self.y, self.x])
+        return [w & 1 != 0, w & 2 != 0, w & 4 != 0, w & 8 != 0]
+
+    def getLinearWalls (self) -> list:
+        '''Returns a list of bools which represents if each of the four linear walls is present'''
+        w = int(self.grid.linearWalls[self.y, self.x])
+        return [w & 1 != 0, w & 2 != 0, w & 4 != 0, w & 8 != 0]
+
+    def getCheckpoint (self) -> bool:
+        '''Return if this tile has a checkpoint'''
+        return self.grid.hasFlag(self.x, self.y, CHECKPOINT)
+
+    def getTrap (self) -> bool:
+        '''Return if this tile has a trap'''
+        return self.grid.hasFlag(self.x, self.y, TRAP)
+
+    def getGoal (self) -> bool:
+        '''Return if this tile has a goal'''
+        return self.grid.hasFlag(self.x, self.y, GOAL)
+
+    def getSwamp (self) -> bool:
+        '''Return if this tile has a swamp'''
+        return self.grid.hasFlag(self.x, self.y, SWAMP)
+
+    @property
+    def hasHuman (self) -> bool:
+        '''True if a human has been placed on this tile'''
+        return self.grid.hasFlag(self.x, self.y, HUMAN)
+
+    def addHuman (self, type, wall) -> bool:
+        '''Add a human to a given wall, returns true only if a wall was present in that direction and it didn't contain a human'''
+        #If the wall position is valid
+        if wall < 4 and wall >= 0 and not self.hasHuman:
+            #If there is a wall there
+            if self.grid.walls[self.y, self.x] & wallBits[wall]:
+                #Set the human value
+                self.grid.humanType[self.y, self.x] = type
+                self.grid.humanWall[self.y, self.x] = wall
+                #This tile does contain a human
+                self.grid.flags[self.y, self.x] |= HUMAN
+                #Successfully added
+                return True
+
+        #Failed to add human
+        return False
+
+    def getHuman (self) -> bool:
+        '''Returns true if there is a human on this tile'''
+        return self.grid.humanType[self.y, self.x] != 0
+
+    def getHumanData (self) -> list:
+        '''Returns the human type and the wall it is on'''
+        return int(self.grid.humanType[self.y, self.x]), int(self.grid.humanWall[self.y, self.x])
+
+    def addObstacle (self) -> None:
+        '''Toggle flag for an obstacle to true'''
+        self.grid.flags[self.y, self.x] |= OBSTACLE
+
+    def getObstacle (self) -> bool:
+        '''Returns true if an obstacle has been placed in this tile'''
+        return self.grid.hasFlag(self.x, self.y, OBSTACLE)
+
+    def getTileType (self) -> bool:
+        return self.grid.hasFlag(self.x, self.y, LINEAR)
+
+    def setLinear (self) -> None:
+        self.grid.flags[self.y, self.x] |= LINEAR
+
+    def setFloating (self) -> None:
+        self.grid.flags[self.y, self.x] &= ~LINEAR & 0xFF
@@ -0,0 +1,109 @@
+"""Map Generation Maze Metrics v2
+
+Measures a generated maze so maps can be compared for fairness:
+ - shortest path (in tiles) from the start to every checkpoint and every human
+ - number of dead ends (reachable tiles with three walls)
+ - number of loops (independent cycles in the reachable tiles - edges - tiles + 1)
+ - reachable area (tiles that can be driven to from the start)
+
+The difficulty function reduces these to a few numbers that difficulty targets can be set on.
+
+Traps are holes so they cannot be driven through. The breadth first search works on whole arrays -
+every tile in the frontier is moved through the open walls at once using the wall masks.
+
+Changelog:
+ V1:
+ - Added maze metrics
+ V2:
+ - Added difficulty summary
+"""
+
+import numpy as np
+import MazeGrid
+import Placement
+
+
+def moveMasks (grid, passable: np.ndarray) -> list:
+    '''For each direction the tiles that can be driven out of in that direction (no wall and leads to a passable tile)'''
+    masks = []
+    for d in range(0, 4):
+        masks.append(passable & ~grid.wallMask(d) & Placement.shifted(passable, d, False))
+    return masks
+
+
+def distances (grid, start, passable = None) -> np.ndarray:
+    '''Shortest number of moves from the start to every tile (-1 if it cannot be reached)'''
+    if passable is None:
+        passable = ~grid.flagMask(MazeGrid.TRAP)
+    moves = moveMasks(grid, passable)
+
+    distance = np.full((grid.height, grid.width), -1, dtype = np.int32)
+    frontier = np.zeros((grid.height, grid.width), dtype = bool)
+    frontier[start[1], start[0]] = True
+    step = 0
+    while frontier.any():
+        distance[frontier] = step
+        reached = np.zeros(frontier.shape, dtype = bool)
+        for d in range(0, 4):
+            #Tiles entered from a frontier tile in direction d (the tile they came from is the opposite way)
+            reached |= Placement.shifted(frontier & moves[d], MazeGrid.oppositeDirections[d], False)
+        frontier = reached & (distance < 0)
+        step = step + 1
+    return distance
+
+
+def measure (grid, start) -> dict:
+    '''Calculate all the metrics for a maze from the start tile [x, y]'''
+    passable = ~grid.flagMask(MazeGrid.TRAP)
+    distance = distances(grid, start, passable)
+    reachable = distance >= 0
+
+    #Open edges between reachable tiles (right and down so each edge is counted once)
+    moves = moveMasks(grid, reachable)
+    edges = int(np.count_nonzero(moves[1]) + np.count_nonzero(moves[2]))
+    area = int(np.count_nonzero(reachable))
+
+    #Dead ends have only one way out
+    exits = sum(m.astype(np.int8) for m in moves)
+    deadEnds = int(np.count_nonzero(reachable & (exits == 1)))
+
+    checkpoints = []
+    for y, x in np.argwhere(grid.flagMask(MazeGrid.CHECKPOINT)):
+        checkpoints.append({"tile": [int(x), int(y)], "distance": int(distance[y, x])})
+
+    humans = []
+    for y, x in np.argwhere(grid.humanType != 0):
+        humans.append({"tile": [int(x), int(y)], "type": int(grid.humanType[y, x]), "distance": int(distance[y, x])})
+
+    return {"reachableArea": area,
+            "totalArea": grid.width * grid.height,
+            "deadEnds": deadEnds,
+            "loops": max(0, edges - area + 1),
+            "furthestDistance": int(distance.max()),
+            "checkpoints": checkpoints,
+            "humans": humans}
+
+
+def difficulty (grid, metrics: dict) -> dict:
+    '''Summarise the metrics of a maze as the values difficulty targets are set on
+     - pathLength: mean shortest path from the start to the checkpoints and humans that can be reached
+     - victimSpread: mean distance (in tiles) of the humans from their centre
+     - trapDensity: fraction of the tiles that are traps
+     - unreachable: number of checkpoints and humans that cannot be reached'''
+    targets = metrics["checkpoints"] + metrics["humans"]
+    reached = [target["distance"] for target in targets if target["distance"] >= 0]
+    pathLength = 0.0
+    if len(reached) > 0:
+        pathLength = float(sum(reached)) / len(reached)
+
+    victimSpread = 0.0
+    if len(metrics["humans"]) > 0:
+        positions = np.array([human["tile"] for human in metrics["humans"]], dtype = float)
+        victimSpread = float(np.mean(np.hypot(*(positions - positions.mean(axis = 0)).T)))
+
+    traps = int(np.count_nonzero(grid.flagMask(MazeGrid.TRAP)))
+
+    return {"pathLength": pathLength,
+            "victimSpread": victimSpread,
+            "trapDensity": float(traps) / (grid.width * grid.height),
+            "unreachable": len(targets) - len(reached)}
@@ -0,0 +1,223 @@
+"""Map Generation Merged Wall Geometry v1
+
+Works out the solid boxes that the worldTile proto would create for every tile (floors, walls, corner
+pillars, external walls and notches) and joins boxes that line up into as few boxes as possible.
+A long straight wall across many tiles becomes one box and floors become rectangles, so a world has
+far fewer solids and bounding objects for Webots to load and simulate while the shape is the same.
+
+Box positions are kept in whole units of 0.00625 (every part of a tile lines up with this) so boxes
+can be compared exactly. Tile (x, z) is centred on (48x, 48z) units.
+
+Boxes are only joined when they touch or overlap along one axis and cover exactly the same range
+across it, so the joined box is always exactly the space the boxes filled. Corner pillars are joined
+into walls in both directions where needed (the boxes overlap on the pillar), so walls can run across
+tiles in either direction. Pillars only get a box of their own when no wall run in either direction
+covers them, so no pillar is written twice (SelfCheck checks no box is inside another).
+
+Special tiles (checkpoint, trap, start and swamp) are left out: they keep their whole tile node as the
+supervisor reads their fields (the start tile's walls give the robot's starting direction).
+
+Changelog:
+ V1:
+ - Added merged wall and floor boxes
+"""
+
+#Size of one unit of the box positions
+unit = 0.00625
+#Width of a tile in units
+tileUnits = 48
+
+#Height of the centre, height and colour of each kind of box
+boxKinds = {"floor": [-0.085, 0.02, "0.635 0.635 0.635"],
+            "wall": [0, 0.15, "0.2 0.47 0.52"],
+            "external": [-0.01, 0.17, "0.2 0.466667 0.521569"]}
+
+#Parts of a tile in units from its centre [xMin, xMax, zMin, zMax]
+floorPart = [-24, 24, -24, 24]
+#Walls [up, right, down, left]
+wallParts = [[-22, 22, -24, -22], [22, 24, -22, 22], [-22, 22, 22, 24], [-24, -22, -22, 22]]
+#Corner pillars in the same order as the corners [top right, bottom right, bottom left, top left]
+pillarParts = [[22, 24, -24, -22], [22, 24, 22, 24], [-24, -22, 22, 24], [-24, -22, -24, -22]]
+#Walls either side of each corner (the pillar is needed if either is there)
+pillarWalls = [[0, 1], [1, 2], [2, 3], [3, 0]]
+
+#External wall parts before they are turned to face the right way
+externalBack = [-24, 24, -26, -24]
+externalPairSide = [-26, -24, -26, 24]
+externalTripleSides = [[-26, -24, -26, 22], [24, 26, -26, 22]]
+#Quarter turns and parts for each combination of external walls [up, right, down, left] the proto draws
+externalShapes = {(True, False, False, False): [0, [externalBack]],
+                  (False, True, False, False): [1, [externalBack]],
+                  (False, False, True, False): [2, [externalBack]],
+                  (False, False, False, True): [3, [externalBack]],
+                  (True, False, False, True): [0, [externalBack, externalPairSide]],
+                  (True, True, False, False): [1, [externalBack, externalPairSide]],
+                  (False, True, True, False): [2, [externalBack, externalPairSide]],
+                  (False, False, True, True): [3, [externalBack, externalPairSide]],
+                  (True, True, False, True): [0, [externalBack] + externalTripleSides],
+                  (True, True, True, False): [1, [externalBack] + externalTripleSides],
+                  (False, True, True, True): [2, [externalBack] + externalTripleSides],
+                  (True, False, True, True): [3, [externalBack] + externalTripleSides]}
+
+#Notch parts before they are turned
+notchParts = {"left": [-26, -24, 22, 24], "right": [24, 26, 22, 24]}
+#Quarter turns of the notch for the direction of the joined tile [up, right, down, left]
+notchTurns = [2, 3, 0, 1]
+
+
+def isSpecial (tile) -> bool:
+    '''Whether a tile (in the world creator list format) is a checkpoint, trap, start or swamp'''
+    return tile[2] or tile[3] or tile[4] or tile[5]
+
+
+def turned (part: list, quarters: int) -> list:
+    '''Turn a part around the tile centre (the same as the proto rotations 0, -pi/2, pi and pi/2 about y)'''
+    xMin, xMax, zMin, zMax = part
+    if quarters == 1:
+        return [-zMax, -zMin, xMin, xMax]
+    if quarters == 2:
+        return [-xMax, -xMin, -zMax, -zMin]
+    if quarters == 3:
+        return [zMin, zMax, -xMax, -xMin]
+    return [xMin, xMax, zMin, zMax]
+
+
+def tileBoxes (walls, corners, externals, notchLeft, notchRight, notchDirection) -> dict:
+    '''Get the boxes of every kind for all the tiles (walls in the list format used by the world creator,
+    the rest from WorldCreator.neighbourAnalysis as lists), returns {kind: [[xMin, xMax, zMin, zMax], ...]}
+    Special tiles are skipped (they are written as tile nodes)'''
+    boxes = {kind: [] for kind in boxKinds}
+
+    def add (kind: str, part: list, x: int, z: int) -> None:
+        boxes[kind].append([part[0] + x * tileUnits, part[1] + x * tileUnits, part[2] + z * tileUnits, part[3] + z * tileUnits])
+
+    for z in range(0, len(walls)):
+        for x in range(0, len(walls[0])):
+            tile = walls[z][x]
+            if isSpecial(tile):
+                continue
+            floor = tile[0] and not tile[3]
+            if floor:
+                add("floor", floorPart, x, z)
+            for d in range(0, 4):
+                if tile[1][d]:
+                    add("wall", wallParts[d], x, z)
+            #Pillars are drawn for the corners and at the ends of the walls of a floor or trap
+            for c in range(0, 4):
+                if corners[z][x][c] or ((tile[1][pillarWalls[c][0]] or tile[1][pillarWalls[c][1]]) and (floor or tile[3])):
+                    add("wall", pillarParts[c], x, z)
+            shape = externalShapes.get(tuple(externals[z][x]))
+            if shape != None:
+                for part in shape[1]:
+                    add("external", turned(part, shape[0]), x, z)
+            #A right notch replaces a left one (as in the tile node)
+            notch = None
+            if notchLeft[z][x]:
+                notch = "left"
+            if notchRight[z][x]:
+                notch = "right"
+            if notch != None:
+                add("external", turned(notchParts[notch], notchTurns[notchDirection[z][x]]), x, z)
+
+    return boxes
+
+
+def mergeRuns (boxes: list, axis: int) -> list:
+    '''Join boxes that touch or overlap along an axis (0 - x, 1 - z) and cover exactly the same range across it
+    Returns [box, indexes of the boxes joined into it] for each joined box'''
+    along = axis * 2
+    across = 2 - along
+    #Boxes covering each range across the axis
+    lines = {}
+    for i, box in enumerate(boxes):
+        lines.setdefault((box[across], box[across + 1]), []).append(i)
+
+    runs = []
+    for line in lines.values():
+        line.sort(key = lambda i: boxes[i][along])
+        current = None
+        for i in line:
+            box = boxes[i]
+            #Touching or overlapping the current run - extend it
+            if current != None and box[along] <= current[0][along + 1]:
+                current[0][along + 1] = max(current[0][along + 1], box[along + 1])
+                current[1].append(i)
+            else:
+                current = [list(box), [i]]
+                runs.append(current)
+    return runs
+
+
+def mergeWalls (boxes: list) -> list:
+    '''Join wall boxes into as few long boxes as possible, returns the joined boxes
+    Square boxes (pillars) can join runs in either direction so walls are not split at every tile corner'''
+    long = [[], []]
+    squares = []
+    for i, box in enumerate(boxes):
+        xSize = box[1] - box[0]
+        zSize = box[3] - box[2]
+        if xSize == zSize:
+            squares.append(i)
+        else:
+            long[int(zSize > xSize)].append(i)
+    squareSet = set(squares)
+
+    #Runs kept along each axis
+    kept = [[], []]
+    #Pillars covered by a run that has a wall in it (on either axis)
+    covered = set()
+    #Runs of only pillars [axis, box, pillars]
+    pillarRuns = []
+    for axis in [1, 0]:
+        members = long[axis] + squares
+        for box, joined in mergeRuns([boxes[i] for i in members], axis):
+            joinedBoxes = [members[j] for j in joined]
+            if any(i not in squareSet for i in joinedBoxes):
+                kept[axis].append(box)
+                covered.update(joinedBoxes)
+            else:
+                pillarRuns.append([axis, box, joinedBoxes])
+
+    #Pillar runs are only kept for pillars no wall run covers (longest first so a lone pillar is not kept inside a longer run)
+    pillarRuns.sort(key = lambda run: -len(run[2]))
+    for axis, box, joinedBoxes in pillarRuns:
+        if any(i not in covered for i in joinedBoxes):
+            kept[axis].append(box)
+            covered.update(joinedBoxes)
+
+    merged = []
+    for axis in [1, 0]:
+        #Walls side by side (either side of the line between two tiles) become one thicker wall
+        merged.extend(box for box, joined in mergeRuns(kept[axis], 1 - axis))
+    return merged
+
+
+def containedBoxes (boxes: list) -> list:
+    '''Get the indexes of boxes that lie entirely inside another box (joined boxes should have none)'''
+    contained = []
+    order = sorted(range(0, len(boxes)), key = lambda i: boxes[i][0])
+    for i in order:
+        box = boxes[i]
+        for j in order:
+            other = boxes[j]
+            #Boxes are sorted by their low x so none after this one can start at or before it
+            if other[0] > box[0]:
+                break
+            if j != i and other[1] >= box[1] and other[2] <= box[2] and other[3] >= box[3] and (other != box or j < i):
+                contained.append(i)
+                break
+    return contained
+
+
+def mergeRectangles (boxes: list) -> list:
+    '''Join boxes into rectangles (rows then columns of rows with the same ends)'''
+    rows = [box for box, joined in mergeRuns(boxes, 0)]
+    return [box for box, joined in mergeRuns(rows, 1)]
+
+
+def mergedBoxes (walls, corners, externals, notchLeft, notchRight, notchDirection) -> dict:
+    '''Get the joined boxes of every kind for all the tiles (see tileBoxes), returns {kind: [[xMin, xMax, zMin, zMax], ...]}'''
+    boxes = tileBoxes(walls, corners, externals, notchLeft, notchRight, notchDirection)
+    return {"floor": mergeRectangles(boxes["floor"]),
+            "wall": mergeWalls(boxes["wall"]),
+            "external": mergeWalls(boxes["external"])}
@@ -0,0 +1,411 @@
+"""Map Generation Placement Engine v4
+
+Chooses tiles for checkpoints, traps, swamps, obstacles and humans.
+
+A boolean eligibility mask is kept for each feature and updated as features are placed, so a tile
+is picked uniformly from the remaining candidates in one step. If there are no candidates left the
+request is reported as impossible straight away rather than retrying random tiles forever.
+
+Changelog:
+ V1:
+ - Replaced random retry loops with candidate masks
+ V2:
+ - Added wall run index for placing humans
+ - Humans are spread over the wall runs (every run is used once before any is used again)
+ V3:
+ - Added spatial hash for obstacle collision checks
+ V4:
+ - Added Poisson-disk sampler for debris positions
+ - The connectivity index is only built when traps are placed
+"""
+
+import math
+import random
+import numpy as np
+import MazeGrid
+import Connectivity
+
+#Features that can be placed
+CHECKPOINT = "checkpoint"
+TRAP = "trap"
+SWAMP = "swamp"
+OBSTACLE = "obstacle"
+DEBRIS = "debris"
+features = [CHECKPOINT, TRAP, SWAMP, OBSTACLE, DEBRIS]
+
+
+def quadrantMasks (width: int, height: int) -> list:
+    '''Split the grid into four quadrants, returns a boolean mask for each'''
+    halfX = int(width / 2)
+    halfY = int(height / 2)
+    quads = [[[0, 0], [halfX - 1, halfY - 1]],
+             [[halfX, 0], [width - 1, halfY - 1]],
+             [[0, halfY], [halfX - 1, height - 1]],
+             [[halfX, halfY], [width - 1, height - 1]]]
+    masks = []
+    for q in quads:
+        mask = np.zeros((height, width), dtype = bool)
+        mask[q[0][1]:q[1][1] + 1, q[0][0]:q[1][0] + 1] = True
+        masks.append(mask)
+    return masks
+
+
+def shifted (mask: np.ndarray, direction: int, fill: bool) -> np.ndarray:
+    '''For each tile get the value of the tile in the given direction (fill where that is off the grid)'''
+    result = np.full(mask.shape, fill, dtype = bool)
+    if direction == 0:
+        result[1:, :] = mask[:-1, :]
+    elif direction == 1:
+        result[:, :-1] = mask[:, 1:]
+    elif direction == 2:
+        result[:-1, :] = mask[1:, :]
+    else:
+        result[:, 1:] = mask[:, :-1]
+    return result
+
+
+class PlacementEngine ():
+    '''Keeps the tiles each feature can still be placed on'''
+    def __init__ (self, grid, startTile, endTile = None, connectivity = None, rng = random) -> None:
+        self.grid = grid
+        self.rng = rng
+        self.startTile = startTile
+        #Connectivity index used to stop traps cutting off part of the maze (None until it is first needed)
+        self.connectivityIndex = connectivity
+        self.quadrants = quadrantMasks(grid.width, grid.height)
+
+        flags = grid.flags
+        checkpoint = (flags & MazeGrid.CHECKPOINT) != 0
+        trap = (flags & MazeGrid.TRAP) != 0
+        goal = (flags & MazeGrid.GOAL) != 0
+        swamp = (flags & MazeGrid.SWAMP) != 0
+        obstacle = (flags & MazeGrid.OBSTACLE) != 0
+        human = (flags & MazeGrid.HUMAN) != 0
+
+        #Tiles that can be reached directly from the start (no wall between)
+        nextToStart = np.zeros((grid.height, grid.width), dtype = bool)
+        startWalls = int(grid.walls[startTile[1], startTile[0]])
+        for d in range(0, 4):
+            otherX = startTile[0] + MazeGrid.around[d][0]
+            otherY = startTile[1] + MazeGrid.around[d][1]
+            if grid.inBounds(otherX, otherY) and not startWalls & MazeGrid.wallBits[d]:
+                nextToStart[otherY, otherX] = True
+
+        #Checkpoints are not next to the start or another checkpoint
+        nearCheckpoint = checkpoint.copy()
+        for d in range(0, 4):
+            nearCheckpoint |= shifted(checkpoint, d, False)
+
+        self.eligible = {CHECKPOINT: ~(checkpoint | trap | goal | nextToStart | nearCheckpoint),
+                         TRAP: ~(checkpoint | trap | goal),
+                         SWAMP: ~(checkpoint | trap | goal | swamp | nextToStart),
+                         OBSTACLE: ~(checkpoint | trap | goal | swamp | obstacle | human),
+                         DEBRIS: ~(checkpoint | trap | goal | swamp | obstacle)}
+
+        #Nothing can be placed on the start or end
+        for feature in [CHECKPOINT, TRAP, SWAMP]:
+            self.disallow(feature, startTile)
+            if endTile != None:
+                self.disallow(feature, endTile)
+
+    @property
+    def connectivity (self):
+        '''The connectivity index, built from the grid the first time it is used
+        (only traps need it, so placing anything else never runs the whole maze search)'''
+        if self.connectivityIndex == None:
+            self.connectivityIndex = Connectivity.ConnectivityIndex(self.grid, self.startTile)
+        return self.connectivityIndex
+
+    def blockConnectivity (self, pos) -> None:
+        '''Update the connectivity index for a tile that can no longer be travelled through
+        (if it has not been built yet it will see the tile's flags when it is)'''
+        if self.connectivityIndex != None:
+            self.connectivityIndex.block(pos)
+
+    def disallow (self, feature: str, pos) -> None:
+        '''Stop a feature being placed at a position'''
+        if self.grid.inBounds(pos[0], pos[1]):
+            self.eligible[feature][pos[1], pos[0]] = False
+
+    def candidates (self, feature: str, quadrant = None) -> np.ndarray:
+        '''Boolean array of tiles the feature can be placed on (optionally only within a quadrant)'''
+        mask = self.eligible[feature]
+        if feature == TRAP:
+            mask = mask & self.trapSafeMask()
+        if quadrant != None:
+            mask = mask & self.quadrants[quadrant]
+        return mask
+
+    def trapSafeMask (self) -> np.ndarray:
+        '''Tiles that can become a trap without cutting any surrounding tile off from the start'''
+        safe = self.connectivity.blockableMask()
+        reachable = np.frombuffer(bytes(self.connectivity.reachable), dtype = np.uint8).astype(bool).reshape(self.grid.height, self.grid.width)
+        #Surrounding traps and the start do not need to stay connected
+        ignored = (self.grid.flags & (MazeGrid.TRAP | MazeGrid.GOAL)) != 0
+        for d in range(0, 4):
+            safe &= shifted(reachable | ignored, d, True)
+        return safe
+
+    def count (self, feature: str, quadrant = None) -> int:
+        '''Number of tiles the feature can still be placed on'''
+        return int(np.count_nonzero(self.candidates(feature, quadrant)))
+
+    def sample (self, feature: str, quadrant = None):
+        '''Pick a random candidate tile for the feature, returns [x, y] or None if there are none'''
+        positions = np.flatnonzero(self.candidates(feature, quadrant))
+        if len(positions) == 0:
+            return None
+        i = int(positions[self.rng.randrange(0, len(positions))])
+        return [i % self.grid.width, i // self.grid.width]
+
+    def place (self, feature: str, pos) -> None:
+        '''Place a feature on the grid at a position and update the candidate masks'''
+        tile = self.grid.tile(pos[0], pos[1])
+        x, y = pos
+        if feature == CHECKPOINT:
+            tile.addCheckpoint()
+            #No other checkpoint on or next to this one
+            for d in range(0, 4):
+                self.disallow(CHECKPOINT, [x + MazeGrid.around[d][0], y + MazeGrid.around[d][1]])
+        elif feature == TRAP:
+            tile.addTrap()
+            self.blockConnectivity(pos)
+        elif feature == SWAMP:
+            tile.addSwamp()
+            self.blockConnectivity(pos)
+        elif feature == OBSTACLE:
+            tile.addObstacle()
+        #Only one feature on a tile (obstacles can share a tile with nothing else either)
+        for other in features:
+            self.disallow(other, pos)
+
+    def placeInQuadrants (self, feature: str, number: int, quadrants: list, removeQuadrant: bool) -> int:
+        '''Place a number of a feature, each in a random quadrant (from those that still have room)
+        If removeQuadrant is set each quadrant is only used once, returns the number placed'''
+        quadrants = list(quadrants)
+        placed = 0
+        for i in range(0, number):
+            #Only quadrants with a candidate tile can be used
+            usable = [q for q in quadrants if self.count(feature, q) > 0]
+            if len(usable) == 0:
+                break
+            q = usable[self.rng.randrange(0, len(usable))]
+            self.place(feature, self.sample(feature, q))
+            placed = placed + 1
+            if removeQuadrant:
+                quadrants.remove(q)
+        return placed
+
+    def placeAnywhere (self, feature: str, number: int) -> int:
+        '''Place a number of a feature on random candidate tiles, returns the number placed'''
+        placed = 0
+        for i in range(0, number):
+            pos = self.sample(feature)
+            if pos == None:
+                break
+            self.place(feature, pos)
+            placed = placed + 1
+        return placed
+
+
+class WallRunIndex ():
+    '''Index of the runs of wall humans can be placed on, for each direction [up, right, down, left]
+    Up and down runs go along a row and end at a wall on the right, right and left runs go down a column
+    and end at a wall below. Every tile in a run is a slot a human can be placed in.'''
+    def __init__ (self, grid) -> None:
+        self.grid = grid
+        #Flat tile index of each slot, its direction and the run it is in (numbered across all directions)
+        tiles = []
+        directions = []
+        runs = []
+        #Number of runs in each direction
+        self.runCounts = []
+
+        #Humans are not placed on special tiles (or with an obstacle if they are placed again after obstacles)
+        allowed = (grid.flags & (MazeGrid.specialFlags | MazeGrid.OBSTACLE)) == 0
+        #Index of every tile in the grid
+        index = np.arange(grid.width * grid.height).reshape(grid.height, grid.width)
+
+        for d in range(0, 4):
+            eligible = grid.wallMask(d) & allowed
+            #Runs are found along rows - work on the transpose for the columns
+            if d == 0 or d == 2:
+                runEnd = grid.wallMask(1)
+                order = index
+            else:
+                eligible = eligible.T
+                runEnd = grid.wallMask(2).T
+                order = index.T
+            #A run starts on an eligible tile that does not carry on from the one before it
+            continues = np.zeros(eligible.shape, dtype = bool)
+            continues[:, 1:] = eligible[:, :-1] & ~runEnd[:, :-1]
+            starts = (eligible & ~continues).ravel()
+            #Number each run and find the run of each slot
+            eligible = eligible.ravel()
+            runIds = np.cumsum(starts)[eligible] - 1
+            runs.append(runIds + sum(self.runCounts))
+            self.runCounts.append(int(np.count_nonzero(starts)))
+
+            tiles.append(order.ravel()[eligible])
+            directions.append(np.full(len(runIds), d, dtype = np.uint8))
+
+        self.tiles = np.concatenate(tiles)
+        self.directions = np.concatenate(directions)
+        self.runs = np.concatenate(runs)
+
+    def slotCount (self) -> int:
+        '''Number of places a human could go (a tile and a wall on it)'''
+        return len(self.tiles)
+
+    def tileCount (self) -> int:
+        '''Number of tiles a human could go on (the most humans that can be placed)'''
+        return len(np.unique(self.tiles))
+
+    def sample (self, number: int, rng = random) -> list:
+        '''Pick up to number slots on different tiles, returns a list of [x, y, direction]
+        Humans are spread out: one random slot is taken from each run (in a random order) before any run is used again'''
+        if number <= 0 or len(self.tiles) == 0:
+            return []
+        tiles = self.tiles.tolist()
+        #Slots of each run in a random order
+        runs = self.runs.tolist()
+        runSlots = [[] for i in range(0, sum(self.runCounts))]
+        for i in rng.sample(range(0, len(tiles)), len(tiles)):
+            runSlots[runs[i]].append(i)
+        usedTiles = set()
+        chosen = []
+        while len(chosen) < number:
+            #One pass - every run with a slot left gets one human (in a random order)
+            passRuns = [r for r in range(0, len(runSlots)) if len(runSlots[r]) > 0]
+            if len(passRuns) == 0:
+                break
+            rng.shuffle(passRuns)
+            for r in passRuns:
+                slots = runSlots[r]
+                #Slots on a tile that already has a human are dropped
+                while len(slots) > 0 and tiles[slots[-1]] in usedTiles:
+                    slots.pop()
+                if len(slots) > 0:
+                    i = slots.pop()
+                    usedTiles.add(tiles[i])
+                    chosen.append(i)
+                    if len(chosen) == number:
+                        break
+        return [[tiles[i] % self.grid.width, tiles[i] // self.grid.width, int(self.directions[i])] for i in chosen]
+
+
+class ObstacleHash ():
+    '''Uniform grid of the obstacles placed in the world (by position and radius) for collision checks
+    With the cell size at least the diameter of the largest obstacle a check only looks at the 3x3 cells around it'''
+    def __init__ (self, cellSize: float) -> None:
+        self.cellSize = cellSize
+        #Cell [x, z]: list of [x, z, radius]
+        self.cells = {}
+        #Largest radius added so far (how far away a colliding obstacle could be)
+        self.maxRadius = 0.0
+
+    def cell (self, x: float, z: float) -> tuple:
+        '''Get the cell a position is in'''
+        return (math.floor(x / self.cellSize), math.floor(z / self.cellSize))
+
+    def add (self, x: float, z: float, radius: float) -> None:
+        '''Add a placed obstacle'''
+        self.cells.setdefault(self.cell(x, z), []).append([x, z, radius])
+        self.maxRadius = max(self.maxRadius, radius)
+
+    def collides (self, x: float, z: float, radius: float) -> bool:
+        '''Returns true if an obstacle of this radius at this position would intersect a placed obstacle'''
+        reach = radius + self.maxRadius
+        minCell = self.cell(x - reach, z - reach)
+        maxCell = self.cell(x + reach, z + reach)
+        for cellX in range(minCell[0], maxCell[0] + 1):
+            for cellZ in range(minCell[1], maxCell[1] + 1):
+                for other in self.cells.get((cellX, cellZ), []):
+                    #Closer than their combined radius (compared squared - no square root needed)
+                    if (x - other[0]) ** 2 + (z - other[1]) ** 2 < (radius + other[2]) ** 2:
+                        return True
+        return False
+
+    def __len__ (self) -> int:
+        return sum(len(contents) for contents in self.cells.values())
+
+
+class PoissonDiskSampler ():
+    '''Bridson style Poisson-disk sampling of obstacle positions (of varying radius) over a set of tiles
+    Each tile keeps a list of active points - new positions are tried in the ring around an active point
+    (from its radius plus the new radius out to twice that) and a point is retired when none of its attempts fit.
+    A tile without active points is tried at random positions and closed when none of those fit either,
+    so when sample returns None the tiles are packed as far as the sampler can reach.
+    Tiles are picked at random so positions are spread over the whole maze rather than grown from one place.'''
+    def __init__ (self, tiles: list, origin: list, spatialHash: ObstacleHash, rng = random, tileSize = 0.3, attempts = 30) -> None:
+        '''tiles is a list of [x, y] tiles positions can be in, origin is the world position of the corner of tile [0, 0]'''
+        self.origin = origin
+        self.tileSize = tileSize
+        self.spatialHash = spatialHash
+        self.rng = rng
+        self.attempts = attempts
+        #Active points [x, z, radius] in each tile
+        self.active = {(tile[0], tile[1]): [] for tile in tiles}
+        #Tiles that may still have room
+        self.openTiles = list(self.active.keys())
+
+    def tileOf (self, x: float, z: float) -> tuple:
+        '''Get the tile a world position is in'''
+        return (math.floor((x - self.origin[0]) / self.tileSize), math.floor((z - self.origin[1]) / self.tileSize))
+
+    def fits (self, x: float, z: float, radius: float):
+        '''Returns the tile if an obstacle fits entirely inside an allowed tile here without hitting another, otherwise None'''
+        tile = self.tileOf(x, z)
+        if tile not in self.active:
+            return None
+        left = self.origin[0] + tile[0] * self.tileSize
+        top = self.origin[1] + tile[1] * self.tileSize
+        if x - radius < left or x + radius > left + self.tileSize or z - radius < top or z + radius > top + self.tileSize:
+            return None
+        if self.spatialHash.collides(x, z, radius):
+            return None
+        return tile
+
+    def accept (self, tile: tuple, x: float, z: float, radius: float) -> list:
+        '''Record a new position as placed and active'''
+        self.spatialHash.add(x, z, radius)
+        self.active[tile].append([x, z, radius])
+        return [x, z]
+
+    def sample (self, radius: float):
+        '''Find a position for an obstacle of this radius, returns [x, z] or None if there is no room left'''
+        while len(self.openTiles) > 0:
+            tileIndex = self.rng.randrange(0, len(self.openTiles))
+            tile = self.openTiles[tileIndex]
+            active = self.active[tile]
+
+            #Grow from an active point in this tile
+            if len(active) > 0:
+                pointIndex = self.rng.randrange(0, len(active))
+                px, pz, pRadius = active[pointIndex]
+                for i in range(0, self.attempts):
+                    angle = self.rng.uniform(0, 2 * math.pi)
+                    distance = self.rng.uniform(pRadius + radius, 2 * (pRadius + radius))
+                    x = round(px + math.cos(angle) * distance, 5)
+                    z = round(pz + math.sin(angle) * distance, 5)
+                    found = self.fits(x, z, radius)
+                    if found != None:
+                        return self.accept(found, x, z, radius)
+                #Nothing fits around this point - retire it
+                active[pointIndex] = active[-1]
+                active.pop()
+                continue
+
+            #No active points - try anywhere in the tile
+            left = self.origin[0] + tile[0] * self.tileSize
+            top = self.origin[1] + tile[1] * self.tileSize
+            for i in range(0, self.attempts):
+                x = round(self.rng.uniform(left + radius, left + self.tileSize - radius), 5)
+                z = round(self.rng.uniform(top + radius, top + self.tileSize - radius), 5)
+                if self.fits(x, z, radius) != None:
+                    return self.accept(tile, x, z, radius)
+            #Tile is full - close it
+            self.openTiles[tileIndex] = self.openTiles[-1]
+            self.openTiles.pop()
+
+        return None
@@ -0,0 +1,100 @@
+"""Map Generation Stage Profiler v2
+
+Records how long each stage of a generation takes (and optionally the peak memory allocated
+during it). Generation code wraps each stage in
+
+    with Profiler.stage("addTraps"):
+        ...
+
+which does nothing unless a StageProfiler has been started, so normal generation is not slowed.
+Functions in stageListeners are called with the name of each stage and the map it works on (None if it
+is not given) as it starts. The GUI uses this to show progress and draw the map as it is generated, and
+cancels a generation by raising an exception from its listener.
+
+Changelog:
+ V1:
+ - Added stage timing and peak memory recording
+ V2:
+ - Added stage listeners
+ - Stages can give the map they work on to the listeners
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+#Profiler currently recording stages (None when not profiling)
+activeProfiler = None
+#Functions called with the name of each stage and its map (or None) as it starts
+stageListeners = []
+
+
+class StageProfiler ():
+    '''Collects the wall time (and peak memory if trackMemory is set) of each stage run while it is active'''
+    def __init__ (self, trackMemory = False) -> None:
+        self.trackMemory = trackMemory
+        #Stage name: [total seconds, peak bytes, number of calls] (in the order first run)
+        self.stages = {}
+        self.startedTracing = False
+
+    def start (self) -> None:
+        '''Start recording stages'''
+        global activeProfiler
+        activeProfiler = self
+        if self.trackMemory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.startedTracing = True
+
+    def stop (self) -> None:
+        '''Stop recording stages'''
+        global activeProfiler
+        if activeProfiler is self:
+            activeProfiler = None
+        if self.startedTracing:
+            tracemalloc.stop()
+            self.startedTracing = False
+
+    def __enter__ (self):
+        self.start()
+        return self
+
+    def __exit__ (self, *exception) -> None:
+        self.stop()
+
+    def record (self, name: str, seconds: float, peak: int) -> None:
+        '''Add a run of a stage'''
+        total = self.stages.setdefault(name, [0.0, 0, 0])
+        total[0] = total[0] + seconds
+        total[1] = max(total[1], peak)
+        total[2] = total[2] + 1
+
+    def report (self) -> dict:
+        '''Get the recorded stages as {name: {"seconds", "peakBytes", "calls"}}'''
+        return {name: {"seconds": values[0], "peakBytes": values[1], "calls": values[2]} for name, values in self.stages.items()}
+
+
+@contextmanager
+def stage (name: str, grid = None):
+    '''Time the code inside the with block as the named stage (if a profiler is active)
+    grid is the map the stage changes, given to the listeners so they can see the map so far'''
+    for listener in list(stageListeners):
+        listener(name, grid)
+    profiler = activeProfiler
+    if profiler == None:
+        yield
+        return
+
+    tracing = profiler.trackMemory and tracemalloc.is_tracing()
+    if tracing:
+        #Peak is measured relative to the memory in use when the stage starts
+        startMemory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+    startTime = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - startTime
+        peak = 0
+        if tracing:
+            peak = max(0, tracemalloc.get_traced_memory()[1] - startMemory)
+        profiler.record(name, seconds, peak)
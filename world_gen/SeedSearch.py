@@ -0,0 +1,109 @@
+"""Map Generation Seed Search v1
+
+Searches seeds for worlds whose difficulty falls inside a target band rather than relying on the
+feature counts alone. Candidate mazes are generated across a pool of processes and measured with
+MazeMetrics, and the search stops as soon as enough worlds are inside every band given. Only those
+worlds are then saved (in the same way as BatchGenerate).
+
+Candidates are checked in batches in seed order, so the same arguments always pick the same seeds.
+Only the maze is generated for a candidate (no obstacles, image or world file) - with the same seed
+it is exactly the maze the saved world will have.
+
+Example (5 worlds with an average path of 6 to 10 tiles and all targets reachable):
+    python SeedSearch.py --count 5 --path-length 6 10 --unreachable 0 0 --output tournament
+
+Changelog:
+ V1:
+ - Added seed search for difficulty targets
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import BatchGenerate
+import GenerateMap
+import MazeMetrics
+
+#Difficulty values a band can be set on (see MazeMetrics.difficulty)
+bandNames = ["pathLength", "victimSpread", "trapDensity", "unreachable"]
+
+
+def evaluateSeed (seed: int, parameters: dict) -> dict:
+    '''Generate the maze for a seed and return its difficulty'''
+    #Generation prints progress - not wanted for every candidate
+    with contextlib.redirect_stdout(io.StringIO()):
+        #Seeded the same way as generatePlan so the maze is the one the saved world will have
+        world, startPos = GenerateMap.generateWorld(parameters["width"], parameters["height"], parameters["checkpoints"], parameters["traps"], parameters["swamps"], parameters["visual"], parameters["thermal"], parameters["engine"], random.Random(seed))[:2]
+    return MazeMetrics.difficulty(world, MazeMetrics.measure(world, startPos[0]))
+
+
+def inBands (difficulty: dict, bands: dict) -> bool:
+    '''Returns true if every difficulty value with a band is within it (bands are {name: [min, max]})'''
+    for name, band in bands.items():
+        if difficulty[name] < band[0] or difficulty[name] > band[1]:
+            return False
+    return True
+
+
+def searchSeeds (parameters: dict, bands: dict, count: int, firstSeed = 0, maxCandidates = 1000, workers = None) -> list:
+    '''Find up to count seeds (in order from firstSeed) whose worlds are inside all the bands, returns [seed, difficulty] for each'''
+    if workers == None:
+        workers = os.cpu_count() or 1
+    #Enough seeds in each batch to keep every worker busy
+    batchSize = workers * 4
+    found = []
+    seed = firstSeed
+    lastSeed = firstSeed + maxCandidates
+
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        while len(found) < count and seed < lastSeed:
+            seeds = list(range(seed, min(seed + batchSize, lastSeed)))
+            seed = seeds[-1] + 1
+            #Results come back in seed order
+            for candidate, difficulty in zip(seeds, pool.map(evaluateSeed, seeds, [parameters] * len(seeds))):
+                if inBands(difficulty, bands):
+                    found.append([candidate, difficulty])
+                    if len(found) >= count:
+                        break
+
+    return found
+
+
+def parseArguments (arguments = None):
+    '''Read the generation parameters and difficulty bands from the command line'''
+    parser = argparse.ArgumentParser(description = "Search seeds for worlds inside difficulty bands and save them")
+    BatchGenerate.addGenerationArguments(parser)
+    parser.add_argument("--count", type = int, default = 1, help = "number of worlds to find")
+    parser.add_argument("--first-seed", type = int, default = 0, help = "seed to start searching from")
+    parser.add_argument("--max-candidates", type = int, default = 1000, help = "most seeds to try")
+    parser.add_argument("--path-length", type = float, nargs = 2, metavar = ("MIN", "MAX"), help = "mean shortest path to the checkpoints and humans")
+    parser.add_argument("--victim-spread", type = float, nargs = 2, metavar = ("MIN", "MAX"), help = "mean distance of the humans from their centre")
+    parser.add_argument("--trap-density", type = float, nargs = 2, metavar = ("MIN", "MAX"), help = "fraction of the tiles that are traps")
+    parser.add_argument("--unreachable", type = float, nargs = 2, metavar = ("MIN", "MAX"), help = "checkpoints and humans that cannot be reached")
+    return parser.parse_args(arguments)
+
+
+def main (arguments = None) -> None:
+    '''Run a seed search from the command line'''
+    args = parseArguments(arguments)
+    parameters = BatchGenerate.parametersFromArguments(args)
+    #Only the bands that were given are checked
+    given = {"pathLength": args.path_length, "victimSpread": args.victim_spread, "trapDensity": args.trap_density, "unreachable": args.unreachable}
+    bands = {name: band for name, band in given.items() if band != None}
+
+    found = searchSeeds(parameters, bands, args.count, args.first_seed, args.max_candidates, args.workers)
+    for seed, difficulty in found:
+        print("Seed " + str(seed) + ": " + ", ".join(name + " " + str(round(difficulty[name], 3)) for name in bandNames))
+    if len(found) < args.count:
+        print("Only found " + str(len(found)) + " of " + str(args.count) + " worlds in " + str(args.max_candidates) + " seeds")
+
+    #Save only the worlds that were picked
+    BatchGenerate.generateBatch([f[0] for f in found], parameters, args.output, args.name, args.workers, BatchGenerate.cacheFromArguments(args))
+    print("Saved " + str(len(found)) + " worlds in " + args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Map Generation Self Check v1
+
+Generates worlds for a range of seeds and checks that what is written out is consistent, so a change to
+the exporters or their templates that breaks a world is found before the worlds are used.
+
+Checks made for every seed:
+ - No merged wall, floor or external box lies entirely inside another (see MergedWalls)
+ - The scene the supervisor builds from the compact map file (MapLoader) is the same text as the groups
+   of the world file for the seed. MapLoader has its own copy of every node template and of the tile code
+   bits, so this fails if a *Template.txt file or WorldCreator is changed without changing MapLoader
+
+Any problem is listed and the exit code is 1.
+
+Example (20 seeds of an 8 by 8 maze):
+    python SelfCheck.py --size 8 8 --seeds 0 20
+
+Changelog:
+ V1:
+ - Added merged box check
+ - Added compact map scene check
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import BatchGenerate
+import GenerateMap
+import MergedWalls
+import WorldCreator
+
+#The compact map loader is part of the supervisor
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "game", "controllers", "MainSupervisor"))
+import MapLoader
+
+#Values MapLoader keeps its own copy of
+sharedValues = ["mapFormat", "codeWalls", "codeFloor", "codeCorners", "codeExternals", "codeNotchLeft", "codeNotchRight", "codeNotchDirection", "codeSpecial", "notchRotations"]
+
+
+def generateCase (seed: int, parameters: dict) -> tuple:
+    '''Generate the plan for a seed (the same as BatchGenerate), returns (world, obstacles, startPos)'''
+    #Generation prints progress - keep the check output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        return GenerateMap.generatePlan(parameters["width"], parameters["height"], parameters["checkpoints"], parameters["traps"], parameters["bulky"], parameters["debris"], parameters["swamps"], parameters["visual"], parameters["thermal"], parameters["engine"], None, seed)[:3]
+
+
+def checkMergedBoxes (walls) -> list:
+    '''Check no merged box is inside another, returns a description of each problem'''
+    analysis = [a.tolist() for a in WorldCreator.neighbourAnalysis(*WorldCreator.tileArrays(walls))]
+    boxes = MergedWalls.mergedBoxes(walls, *analysis)
+    problems = []
+    for kind, kindBoxes in boxes.items():
+        for i in MergedWalls.containedBoxes(kindBoxes):
+            problems.append(kind + "Block" + str(i) + " " + str(kindBoxes[i]) + " is inside another box")
+    return problems
+
+
+def checkSharedValues () -> list:
+    '''Check MapLoader has the same map format and tile code bits as WorldCreator, returns a description of each problem'''
+    problems = []
+    for name in sharedValues:
+        if getattr(MapLoader, name) != getattr(WorldCreator, name):
+            problems.append("MapLoader." + name + " is " + str(getattr(MapLoader, name)) + " but WorldCreator." + name + " is " + str(getattr(WorldCreator, name)))
+    return problems
+
+
+def firstDifference (expected: str, actual: str) -> str:
+    '''Describe the first line that differs between two texts'''
+    expectedLines = expected.splitlines()
+    actualLines = actual.splitlines()
+    for i in range(0, min(len(expectedLines), len(actualLines))):
+        if expectedLines[i] != actualLines[i]:
+            return "line " + str(i + 1) + ": " + repr(expectedLines[i]) + " != " + repr(actualLines[i])
+    return str(len(expectedLines)) + " lines != " + str(len(actualLines)) + " lines"
+
+
+def checkCompactMap (walls, obstacles, startPos, seed: int) -> list:
+    '''Check the scene MapLoader builds from the compact map file is the same as the groups of the world file, returns a description of each problem
+    Both are made with a generator from the seed so the humans are placed in the same positions'''
+    worldText = WorldCreator.createFileData(walls, obstacles, startPos, False, random.Random(seed))
+    #The map is read back from a file the same way the supervisor reads it
+    with tempfile.TemporaryDirectory() as folder:
+        mapPath = os.path.join(folder, "map.json")
+        mapFile = open(mapPath, "w")
+        WorldCreator.writeMapData(mapFile, walls, obstacles, random.Random(seed))
+        mapFile.close()
+        groups = MapLoader.sceneGroups(MapLoader.loadMap(mapPath))
+
+    #The groups are everything between the header and the supervisor
+    header = WorldCreator.templates.header(len(walls))
+    supervisor = WorldCreator.templates.supervisor()
+    if not worldText.startswith(header) or not worldText.endswith(supervisor):
+        return ["world file does not start with the header and end with the supervisor"]
+    worldGroups = worldText[len(header):len(worldText) - len(supervisor)]
+
+    problems = []
+    position = 0
+    for name, node in groups:
+        section = worldGroups[position:position + len(node)]
+        if section != node:
+            problems.append(name + " group differs from the world file (" + firstDifference(section, node) + ")")
+            #Later groups would not line up
+            return problems
+        position = position + len(node)
+    if position != len(worldGroups):
+        problems.append("world file has " + str(len(worldGroups) - position) + " more characters of groups than the compact map scene")
+    return problems
+
+
+def checkSeed (seed: int, parameters: dict) -> list:
+    '''Make every check for one seed, returns a description of each problem'''
+    world, obstacles, startPos = generateCase(seed, parameters)
+    walls = world.toWallData()
+    return checkMergedBoxes(walls) + checkCompactMap(walls, obstacles, startPos, seed)
+
+
+def parseArguments (arguments = None):
+    '''Read the generation parameters and seeds from the command line'''
+    parser = argparse.ArgumentParser(description = "Generate worlds and check the exported files are consistent")
+    BatchGenerate.addGenerationArguments(parser)
+    parser.add_argument("--seeds", type = int, nargs = 2, default = [0, 10], metavar = ("FIRST", "COUNT"), help = "seeds to check")
+    return parser.parse_args(arguments)
+
+
+def main (arguments = None) -> int:
+    '''Run the checks from the command line, returns the exit code'''
+    args = parseArguments(arguments)
+    parameters = BatchGenerate.parametersFromArguments(args)
+    #Checked once as they do not depend on the seed
+    sharedProblems = checkSharedValues()
+    for problem in sharedProblems:
+        print(problem)
+    failed = 0
+    for seed in range(args.seeds[0], args.seeds[0] + args.seeds[1]):
+        problems = checkSeed(seed, parameters)
+        if len(problems) > 0:
+            failed = failed + 1
+            print("Seed " + str(seed) + " (" + str(len(problems)) + " problems):")
+            for problem in problems:
+                print("  " + problem)
+
+    if len(sharedProblems) > 0 or failed > 0:
+        print("FAILED: " + str(failed) + " of " + str(args.seeds[1]) + " seeds")
+        return 1
+    print("All " + str(args.seeds[1]) + " seeds passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
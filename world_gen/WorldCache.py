@@ -0,0 +1,97 @@
+"""Map Generation World Cache v1
+
+Keeps generated worlds on disk so the same request does not have to be generated again.
+Each entry is keyed by a hash of the generator version, the generation parameters and the seed,
+and is stored as <key>.wbt, <key>.png and <key>.json in the cache folder.
+
+Entries are touched whenever they are used. evict removes the least recently used ones while the
+cache is over its size limit, as well as any older than the maximum age (it is not called on every
+store so that several processes can add to the cache at once).
+
+Changelog:
+ V1:
+ - Added content addressed world cache
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+#File extensions that make up one cached world [world file, preview image, metadata]
+extensions = [".wbt", ".png", ".json"]
+
+
+def worldKey (version: str, parameters: dict, seed: int) -> str:
+    '''Get the cache key for a world generated with these parameters and seed'''
+    description = json.dumps({"version": version, "parameters": parameters, "seed": seed}, sort_keys = True)
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+class WorldCache ():
+    '''Folder of generated worlds, limited to maxBytes in total (if given) and entries younger than maxAge seconds (if given)'''
+    def __init__ (self, directory: str, maxBytes = None, maxAge = None) -> None:
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.maxAge = maxAge
+        os.makedirs(directory, exist_ok = True)
+
+    def paths (self, key: str) -> list:
+        '''Get the [world file, preview image, metadata] paths for an entry'''
+        return [os.path.join(self.directory, key + extension) for extension in extensions]
+
+    def lookup (self, key: str):
+        '''Get the paths of a cached world, returns None if it is not in the cache'''
+        paths = self.paths(key)
+        for path in paths:
+            if not os.path.exists(path):
+                return None
+        if self.maxAge != None and time.time() - os.path.getmtime(paths[-1]) > self.maxAge:
+            return None
+        #Mark as recently used
+        for path in paths:
+            os.utime(path)
+        return paths
+
+    def store (self, key: str, worldPath: str, imagePath: str, dataPath: str) -> list:
+        '''Copy a generated world into the cache, returns the cached paths'''
+        paths = self.paths(key)
+        for source, destination in zip([worldPath, imagePath, dataPath], paths):
+            #Copy to a temporary file first so another process never sees a half written entry
+            temporary = destination + "." + str(os.getpid()) + ".tmp"
+            shutil.copyfile(source, temporary)
+            os.replace(temporary, destination)
+        return paths
+
+    def entries (self) -> list:
+        '''Get a list of [last used time, size in bytes, key] for every complete entry in the cache'''
+        found = {}
+        for fileName in os.listdir(self.directory):
+            key, extension = os.path.splitext(fileName)
+            if extension in extensions:
+                path = os.path.join(self.directory, fileName)
+                found.setdefault(key, []).append([os.path.getmtime(path), os.path.getsize(path)])
+        return [[min(f[0] for f in files), sum(f[1] for f in files), key] for key, files in found.items() if len(files) == len(extensions)]
+
+    def remove (self, key: str) -> None:
+        '''Delete an entry from the cache'''
+        for path in self.paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def evict (self) -> int:
+        '''Remove entries that are too old, then the least recently used until under the size limit, returns the number removed'''
+        entries = sorted(self.entries())
+        removed = 0
+        now = time.time()
+        total = sum(entry[1] for entry in entries)
+        for lastUsed, size, key in entries:
+            tooOld = self.maxAge != None and now - lastUsed > self.maxAge
+            tooBig = self.maxBytes != None and total > self.maxBytes
+            if not tooOld and not tooBig:
+                continue
+            self.remove(key)
+            total = total - size
+            removed = removed + 1
+        return removed
@@ -24,12 +24,28 @@ Changelog:
  - Removed robots from generation (commended out if needed)
  v4:
  - Updated to scale tiles
+ v5:
+ - Added streamed world files written one row of tiles at a time
+ - makeFile can be given the path to save to
+ - Debris is positioned in the world
+ - World files are written node by node straight to the file (no repeated string joining or True/False replacing)
+ - Templates are read and checked once per process and formatted by a function for each kind of node
+ - Corners, external walls and notches are found for the whole map at once with shifted arrays
+ - Added merged wall export (lined up walls and floors are joined into long boxes, far fewer nodes)
+ - Added compact map files (JSON tile codes, humans and obstacles) built into a base world by the supervisor
 """
 
 
 from decimal import Decimal
+import io
+import json
 import os
+import string
 import random
+import numpy as np
+import Placement
+import Profiler
+import MergedWalls
 dirname = os.path.dirname(__file__)
 
 #General scale for tiles - adjusts position and size of pieces and obstacles
@@ -37,233 +53,249 @@ tileScale = [0.4, 0.4, 0.4]
 #The vertical position of the floor
 floorPos = -0.075 * tileScale[1]
 
-def checkForCorners(pos, walls):
-    '''Check if each of the corners is needed'''
-    #Surrounding tile directions
-    around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
-    #Needed corners
-    corners = [False, False, False, False]
-
-    surroundingTiles = []
-
-    thisWall = walls[pos[1]][pos[0]]
-
-    if not thisWall[0]:
-        return corners
-
-    #For each surrounding card
-    for a in around:
-        #Get the position
-        xPos = pos[0] + a[0]
-        yPos = pos[1] + a[1]
-        #If it is a valid position
-        if xPos > -1 and xPos < len(walls[0]) and yPos > -1 and yPos < len(walls):
-            #Add the tile to the surrounding list
-            surroundingTiles.append(walls[yPos][xPos])
-        else:
-            #Otherwise add a null value
-            surroundingTiles.append([False, [False, False, False, False], False, False, False])
-
-    #If top right is needed
-    corners[0] = surroundingTiles[0][1][1] and surroundingTiles[1][1][0] and not thisWall[1][0] and not thisWall[1][1]
-    #If bottom right is needed
-    corners[1] = surroundingTiles[1][1][2] and surroundingTiles[2][1][1] and not thisWall[1][1] and not thisWall[1][2]
-    #If bottom left is needed
-    corners[2] = surroundingTiles[2][1][3] and surroundingTiles[3][1][2] and not thisWall[1][2] and not thisWall[1][3]
-    #If top left is needed
-    corners[3] = surroundingTiles[0][1][3] and surroundingTiles[3][1][0] and not thisWall[1][3] and not thisWall[1][0]
-
-    return corners
-
-
-def checkForExternalWalls (pos, walls):
-    '''Convert tile position to a list of bools for needed external walls'''
-    #Get the tile at the position
-    thisWall = walls[pos[1]][pos[0]]
-
-    #If there is no tile here there is no need for an external wall
-    if not thisWall[0]:
-        return [False, False, False, False]
-
-    #Surrounding tiles
-    around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
-    otherTiles = [False, False, False, False]
-
-    d = 0
-
-    for a in around:
-        #Get the tiles position
-        xPos = pos[0] + a[0]
-        yPos = pos[1] + a[1]
-        #If it is a valid positon
-        if xPos > -1 and xPos < len(walls[0]) and yPos > -1 and yPos < len(walls):
-            #Add the tiles present data
-            otherTiles[d] = walls[yPos][xPos][0]
-        else:
-            #No tile present
-            otherTiles[d] = False
-        #Add one to direction counter
-        d = d + 1
-
-    #Convert to needed walls
-    externalsNeeded = [not otherTiles[0], not otherTiles[1], not otherTiles[2], not otherTiles[3]]
-    return externalsNeeded
-
-
-def checkForNotch (pos, walls):
-    '''Determine if a notch is needed on either side'''
-    #Variables to store if each notch is needed
-    needLeft = False
-    needRight = False
-
-    #No notches needed if there is not a floor
-    if not walls[pos[1]][pos[0]][0]:
-        return False, False, 0
-
-    rotations = [3.14159, 1.57079, 0, -1.57079]
-
-    #Surrounding tiles
-    around = [[0, -1], [1, 0], [0, 1], [-1, 0]]
-    #Tiles to check if notches are needed
-    notchAround = [[ [1, -1], [-1, -1] ],
-                   [ [1, 1], [1, -1] ],
-                   [ [-1, 1], [1, 1] ],
-                   [ [-1, -1], [-1, 1] ]]
-
-    #Current direction
-    d = 0
-    #Number of surrounding tiles
-    surround = 0
-
-    #Direction of present tile
-    dire = -1
-
-    #Iterate for surrounding tiles
-    for a in around:
-        #If x axis is within array
-        if pos[0] + a[0] < len(walls[0]) and pos[0] + a[0] > -1:
-            #If y axis is within array
-            if pos[1] + a[1] < len(walls) and pos[1] + a[1] > -1:
-                #If there is a tile there
-                if walls[pos[1] + a[1]][pos[0] + a[0]][0]:
-                    #Add to number of surrounding tiles
-                    surround = surround + 1
-                    #Store direction
-                    dire = d
-        #Increment direction
-        d = d + 1
-
-    rotation = 0
-
-    #If there was only one connected tile and there is a valid stored direction
-    if surround == 1 and dire > -1 and dire < len(notchAround):
-        #Get the left and right tile positions to check
-        targetLeft = [pos[0] + notchAround[dire][0][0], pos[1] + notchAround[dire][0][1]]
-        targetRight = [pos[0] + notchAround[dire][1][0], pos[1] + notchAround[dire][1][1]]
-
-        #If the left tile is a valid target position
-        if targetLeft[0] < len(walls[0]) and targetLeft[0] > -1 and targetLeft[1] < len(walls) and targetLeft[1] > -1:
-            #If there is no tile there
-            if not walls[targetLeft[1]][targetLeft[0]][0]:
-                #A left notch is needed
-                needLeft = True
-
-        #If the right tile is a valid target position
-        if targetRight[0] < len(walls[0]) and targetRight[0] > -1 and targetRight[1] < len(walls) and targetRight[1] > -1:
-            #If there is no tile there
-            if not walls[targetRight[1]][targetRight[0]][0]:
-                #A right notch is needed
-                needRight = True
-
-        rotation = rotations[dire]
-
-    #Return information about needed notches
-    return needLeft, needRight, rotation
-
-
-def createFileData (walls, obstacles, startPos):
-    '''Create a file data string from the positions and scales'''
-    #Open the file containing the standard header
-    headerFile = open(os.path.join(dirname, "fileHeader.txt"), "r")
-    #Read header
-    fileHeader = headerFile.read()
-    #Close header file
-    headerFile.close()
-
-    #Open the file containing the template for a group
-    groupTemplate = open(os.path.join(dirname, "groupTemplate.txt"), "r")
-    #Read template
-    groupPart = groupTemplate.read()
-    #Close template file
-    groupTemplate.close()
-
-    '''#Open the file containing the template for a robot
-    robotTemplate = open(os.path.join(dirname, "robotTemplate.txt"), "r")
-    #Read template
-    robotPart = robotTemplate.read()
-    #Close template file
-    robotTemplate.close()'''
-
-    #Open the file containing the template for a proto tile
-    protoTileTemplate = open(os.path.join(dirname, "protoTileTemplate.txt"), "r")
-    #Read template
-    protoTilePart = protoTileTemplate.read()
-    #Close template file
-    protoTileTemplate.close()
-
-    #Open the file containing the template for a boundary
-    boundsTemplate = open(os.path.join(dirname, "boundsTemplate.txt"), "r")
-    #Read template
-    boundsPart = boundsTemplate.read()
-    #Close template file
-    boundsTemplate.close()
-
-    #Open the file containing the template for the obstacles
-    obstacleTemplate = open(os.path.join(dirname, "obstacleTemplate.txt"), "r")
-    #Read template
-    obstaclePart = obstacleTemplate.read()
-    #Close template file
-    obstacleTemplate.close()
-
-    #Open the file containing the template for the debris
-    debrisTemplate = open(os.path.join(dirname, "debrisTemplate.txt"), "r")
-    #Read template
-    debrisPart = debrisTemplate.read()
-    #Close template file
-    debrisTemplate.close()
-
-    #Open the file containing the template for the supervisor
-    supervisorTemplate = open(os.path.join(dirname, "supervisorTemplate.txt"), "r")
-    #Read template
-    supervisorPart = supervisorTemplate.read()
-    #Close template file
-    supervisorTemplate.close()
-
-    #Open the file containing the template for the visual humans
-    visualHumanTemplate = open(os.path.join(dirname, "visualHumanTemplate.txt"), "r")
-    #Read template
-    visualHumanPart = visualHumanTemplate.read()
-    #Close template file
-    visualHumanTemplate.close()
-
-    #Open the file containing the template for the thermal humans
-    thermalHumanTemplate = open(os.path.join(dirname, "thermalHumanTemplate.txt"), "r")
-    #Read template
-    thermalHumanPart = thermalHumanTemplate.read()
-    #Close template file
-    thermalHumanTemplate.close()
-
-
-    #Strings to hold the tile parts
-    allTiles = ""
-    #Strings to hold the boundaries for special tiles
-    allCheckpointBounds = ""
-    allTrapBounds = ""
-    allGoalBounds = ""
-    allSwampBounds = ""
-
-    #String to hold all the humans
-    allHumans = ""
+#Rotation of the notch for the direction of the only joined tile (the last entry is for no notch)
+notchRotations = [3.14159, 1.57079, 0, -1.57079, 0]
+#Tiles either side of the joined tile for each direction [left, right] as [x, y] offsets (a notch is needed where they are empty)
+notchAround = [[[1, -1], [-1, -1]],
+               [[1, 1], [1, -1]],
+               [[-1, 1], [1, 1]],
+               [[-1, -1], [-1, 1]]]
+
+
+def tileArrays (walls) -> tuple:
+    '''Convert tiles in the list format to (present, walls) arrays of shape (height, width) and (height, width, 4)'''
+    present = np.array([[tile[0] for tile in row] for row in walls], dtype = bool)
+    wallSides = np.array([[tile[1] for tile in row] for row in walls], dtype = bool).reshape(present.shape + (4,))
+    return present, wallSides
+
+
+def offsetValues (values: np.ndarray, offset, fill: bool) -> np.ndarray:
+    '''For each tile get the value of the tile at an [x, y] offset of up to one tile each way (fill where that is off the grid)'''
+    if offset[0] != 0:
+        values = Placement.shifted(values, 2 - offset[0], fill)
+    if offset[1] != 0:
+        values = Placement.shifted(values, 1 + offset[1], fill)
+    return values
+
+
+def neighbourAnalysis (present: np.ndarray, wallSides: np.ndarray) -> tuple:
+    '''Find the corners, external walls and notches needed by every tile at once with shifted arrays
+    (corners where two neighbouring walls meet, external walls on sides without a tile, notches beside tiles joined to only one other)
+    Returns (corners, externals, notchLeft, notchRight, notchDirection) - corners and externals have a value for each
+    of the four corners or sides of every tile, notchDirection is the direction of the only joined tile (4 if there is no notch)'''
+    sides = [wallSides[:, :, d] for d in range(0, 4)]
+
+    def neighbourWall (direction: int, side: int) -> np.ndarray:
+        #Wall on one side of the tile in a direction (no walls off the grid)
+        return Placement.shifted(sides[side], direction, False)
+
+    #A corner is needed where two walls of the neighbours meet and this tile has neither of them [top right, bottom right, bottom left, top left]
+    corners = np.stack([neighbourWall(0, 1) & neighbourWall(1, 0) & ~sides[0] & ~sides[1],
+                        neighbourWall(1, 2) & neighbourWall(2, 1) & ~sides[1] & ~sides[2],
+                        neighbourWall(2, 3) & neighbourWall(3, 2) & ~sides[2] & ~sides[3],
+                        neighbourWall(0, 3) & neighbourWall(3, 0) & ~sides[3] & ~sides[0]], axis = 2)
+    corners &= present[:, :, None]
+
+    #An external wall is needed on each side without a tile
+    neighbourPresent = [Placement.shifted(present, d, False) for d in range(0, 4)]
+    externals = np.stack([~p for p in neighbourPresent], axis = 2) & present[:, :, None]
+
+    #Notches are only on tiles joined to exactly one other tile
+    joined = sum(p.astype(np.int8) for p in neighbourPresent)
+    notchDirection = np.full(present.shape, 4, dtype = np.int8)
+    notchLeft = np.zeros(present.shape, dtype = bool)
+    notchRight = np.zeros(present.shape, dtype = bool)
+    for d in range(0, 4):
+        direction = present & (joined == 1) & neighbourPresent[d]
+        notchDirection[direction] = d
+        #A notch is needed on each side with an empty tile (not off the grid)
+        notchLeft |= direction & offsetValues(~present, notchAround[d][0], False)
+        notchRight |= direction & offsetValues(~present, notchAround[d][1], False)
+
+    return corners, externals, notchLeft, notchRight, notchDirection
+
+
+#VRML text for each boolean (indexed by the boolean)
+vrmlBools = ("FALSE", "TRUE")
+
+
+def readTemplate (name: str) -> str:
+    '''Read a template file from the generator directory'''
+    templateFile = open(os.path.join(dirname, name), "r")
+    template = templateFile.read()
+    templateFile.close()
+    return template
+
+
+class TemplateRegistry ():
+    '''The world file templates, read and checked once and shared by every world written in the process
+    Each kind of node has its own format function taking the node's values rather than the template's positional fields'''
+    #Template file and number of positional fields for each kind of node (None if it is written as it is)
+    templateFiles = {"header": ["fileHeader.txt", 2],
+                     "group": ["groupTemplate.txt", 2],
+                     "tile": ["protoTileTemplate.txt", 28],
+                     "bounds": ["boundsTemplate.txt", 7],
+                     "obstacle": ["obstacleTemplate.txt", 8],
+                     "debris": ["debrisTemplate.txt", 8],
+                     "visualHuman": ["visualHumanTemplate.txt", 6],
+                     "thermalHuman": ["thermalHumanTemplate.txt", 5],
+                     "mergedGroup": ["mergedGroupTemplate.txt", 6],
+                     "mergedBox": ["mergedBoxTemplate.txt", 8],
+                     "supervisor": ["supervisorTemplate.txt", None],
+                     "baseSupervisor": ["baseSupervisorTemplate.txt", 1]}
+
+    def __init__ (self) -> None:
+        #Template text for each kind of node (empty until first used)
+        self.templates = {}
+        #[start, end] of a group node either side of its children for each group name
+        self.groups = {}
+
+    def template (self, kind: str) -> str:
+        '''Get the template for a kind of node, reading and checking it the first time'''
+        template = self.templates.get(kind)
+        if template == None:
+            fileName, fields = self.templateFiles[kind]
+            template = readTemplate(fileName)
+            if fields != None:
+                #Check the fields now so a broken template fails before anything is written
+                used = [int(field) for text, field, spec, conversion in string.Formatter().parse(template) if field != None]
+                if len(used) > 0 and max(used) >= fields:
+                    raise ValueError(fileName + " uses field {" + str(max(used)) + "} but " + kind + " nodes only have " + str(fields))
+            self.templates[kind] = template
+        return template
+
+    def load (self) -> None:
+        '''Read every template now (otherwise they are read when first used)'''
+        for kind in self.templateFiles:
+            self.template(kind)
+
+    def header (self, height: int) -> str:
+        '''Format the start of the world file (the viewpoint is moved back for taller maps)'''
+        return self.template("header").format(0.2 * height, 0.17 * height)
+
+    def supervisor (self) -> str:
+        '''Get the supervisor node (the end of the world file)'''
+        return self.template("supervisor")
+
+    def baseSupervisor (self, mapPath: str) -> str:
+        '''Get the supervisor node for a base world that builds the scene from a compact map file'''
+        return self.template("baseSupervisor").format(mapPath)
+
+    def group (self, name: str) -> list:
+        '''Get the [start, end] of a named group node either side of its children'''
+        parts = self.groups.get(name)
+        if parts == None:
+            parts = self.template("group").format("\0", name).split("\0")
+            self.groups[name] = parts
+        return parts
+
+    def tile (self, tile, x: int, z: int, corners, externals, notchData, width: int, height: int, tileId: int) -> str:
+        '''Format the proto node for one tile (booleans are converted as they are formatted)'''
+        notch = ""
+        #Set notch string to correct value
+        if notchData[0]:
+            notch = "left"
+        if notchData[1]:
+            notch = "right"
+        #Name to be given to the tile
+        tileName = "TILE"
+        if tile[4]:
+            tileName = "START_TILE"
+        walls = tile[1]
+        return self.template("tile").format(tileName, x, z, vrmlBools[tile[0] and not tile[3]], vrmlBools[walls[0]], vrmlBools[walls[1]], vrmlBools[walls[2]], vrmlBools[walls[3]], vrmlBools[corners[0]], vrmlBools[corners[1]], vrmlBools[corners[2]], vrmlBools[corners[3]], vrmlBools[externals[0]], vrmlBools[externals[1]], vrmlBools[externals[2]], vrmlBools[externals[3]], notch, notchData[2], vrmlBools[tile[4]], vrmlBools[tile[3]], vrmlBools[tile[2]], vrmlBools[tile[5]], width, height, tileId, tileScale[0], tileScale[1], tileScale[2])
+
+    def mergedGroup (self, startX: float, startZ: float) -> list:
+        '''Get the [start, end] of the node holding the merged boxes either side of its children
+        It is positioned and scaled like the tiles so the boxes are placed in unscaled tile space'''
+        return self.template("mergedGroup").format("\0", startX, startZ, tileScale[0], tileScale[1], tileScale[2]).split("\0")
+
+    def mergedBox (self, kind: str, box: list, boxId: int) -> str:
+        '''Format a merged box (kind is floor, wall or external, box is [xMin, xMax, zMin, zMax] in MergedWalls units)'''
+        y, height, colour = MergedWalls.boxKinds[kind]
+        unit = MergedWalls.unit
+        return self.template("mergedBox").format(kind + "Block" + str(boxId), round((box[0] + box[1]) * unit / 2, 6), y, round((box[2] + box[3]) * unit / 2, 6), round((box[1] - box[0]) * unit, 6), height, round((box[3] - box[2]) * unit, 6), colour)
+
+    def bounds (self, name: str, boundsId: int, x: int, z: int, startX: float, startZ: float) -> str:
+        '''Format the boundary of a special tile'''
+        return self.template("bounds").format(name, boundsId, (x * 0.3 * tileScale[0] + startX) - (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) - (0.15 * tileScale[2]), (x * 0.3 * tileScale[0] + startX) + (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) + (0.15 * tileScale[2]), floorPos)
+
+    def obstacle (self, obstacle, obstacleId: int) -> str:
+        '''Format a bulky obstacle or piece of debris (scaled and positioned based on world scale)'''
+        kind = "obstacle"
+        if obstacle[0][3]:
+            kind = "debris"
+        return self.template(kind).format(obstacleId, obstacle[0][0] * tileScale[0], obstacle[0][1] * tileScale[1], obstacle[0][2] * tileScale[2], obstacle[1][0] * tileScale[0], obstacle[1][1] * tileScale[1], obstacle[1][2] * tileScale[2], obstacle[1][3])
+
+    def visualHuman (self, x: float, z: float, rotation: float, humanId: int, humanType: str, score: int) -> str:
+        '''Format a visual human (humanType is harmed, unharmed or stable)'''
+        return self.template("visualHuman").format(x, z, rotation, humanId, humanType, score)
+
+    def thermalHuman (self, x: float, z: float, rotation: float, humanId: int, score: int) -> str:
+        '''Format a thermal human'''
+        return self.template("thermalHuman").format(x, z, rotation, humanId, score)
+
+
+#Templates shared by every world written in this process
+templates = TemplateRegistry()
+
+
+def writeGroup (output, children: list, name: str) -> None:
+    '''Write a group node containing the formatted children'''
+    groupStart, groupEnd = templates.group(name)
+    output.write(groupStart)
+    for child in children:
+        output.write(child)
+    output.write(groupEnd)
+
+
+#Rotations of humans for each wall
+humanRotation = [3.14, 1.57, 0, -1.57]
+#Offsets for visual and thermal humans
+humanOffset = [[0, -0.1375 * tileScale[2]], [0.1375 * tileScale[0], 0], [0, 0.1375 * tileScale[2]], [-0.1375 * tileScale[0], 0]]
+humanOffsetThermal = [[0, -0.136 * tileScale[2]], [0.136 * tileScale[0], 0], [0, 0.136 * tileScale[2]], [-0.136 * tileScale[0], 0]]
+#Names of types of visual human
+humanTypesVisual = ["harmed", "unharmed", "stable"]
+
+
+def placeHuman (tile, x: int, z: int, startX: float, startZ: float, rng = random) -> list:
+    '''Position the human on a tile (randomly moved along its wall), returns [x, z, rotation, type, score]
+    type is thermal or the type of visual human'''
+    #Position of tile
+    humanPos = [(x * 0.3 * tileScale[0]) + startX , (z * 0.3 * tileScale[2]) + startZ]
+    humanRot = humanRotation[tile[7]]
+    #Randomly move human left and right on wall
+    randomOffset = [0, 0]
+    if tile[7] in [0, 2]:
+        #X offset for top and bottom
+        randomOffset = [round(rng.uniform(-0.08 * tileScale[0], 0.08 * tileScale[0]), 3), 0]
+    else:
+        #Z offset for left and right
+        randomOffset = [0, round(rng.uniform(-0.08 * tileScale[2], 0.08 * tileScale[2]), 3)]
+    score = 30
+    if tile[8]:
+        score = 10
+    #Thermal
+    if tile[6] == 4:
+        humanPos[0] = humanPos[0] + humanOffsetThermal[tile[7]][0] + randomOffset[0]
+        humanPos[1] = humanPos[1] + humanOffsetThermal[tile[7]][1] + randomOffset[1]
+        return [humanPos[0], humanPos[1], humanRot, "thermal", score]
+    humanPos[0] = humanPos[0] + humanOffset[tile[7]][0] + randomOffset[0]
+    humanPos[1] = humanPos[1] + humanOffset[tile[7]][1] + randomOffset[1]
+    return [humanPos[0], humanPos[1], humanRot, humanTypesVisual[tile[6] - 1], score]
+
+
+def writeFileData (output, walls, obstacles, startPos, mergeWalls = False, rng = random) -> None:
+    '''Write the world file for the walls and obstacles to output (an open file or io stream)
+    Each node is formatted once and written straight to the output, so the time and memory taken grow with the number of tiles
+    If mergeWalls is set the floors and walls are written as merged boxes and only special tiles get a tile node'''
+    #Lists to hold the boundaries for special tiles (only special tiles have them so these are small)
+    allCheckpointBounds = []
+    allTrapBounds = []
+    allGoalBounds = []
+    allSwampBounds = []
+
+    #List to hold all the humans
+    allHumans = []
 
     #Upper left corner to start placing tiles from
     width = len(walls[0])
@@ -271,143 +303,94 @@ def createFileData (walls, obstacles, startPos):
     startX = -(len(walls[0]) * (0.3 * tileScale[0]) / 2.0)
     startZ = -(len(walls) * (0.3 * tileScale[2]) / 2.0)
 
-    #Create file data - initialy just the header
-    fileData = fileHeader.format(0.2*height,0.17*height)
-
-    #Rotations of humans for each wall
-    humanRotation = [3.14, 1.57, 0, -1.57]
-    #Offsets for visual and thermal humans
-    humanOffset = [[0, -0.1375 * tileScale[2]], [0.1375 * tileScale[0], 0], [0, 0.1375 * tileScale[2]], [-0.1375 * tileScale[0], 0]]
-    humanOffsetThermal = [[0, -0.136 * tileScale[2]], [0.136 * tileScale[0], 0], [0, 0.136 * tileScale[2]], [-0.136 * tileScale[0], 0]]
-    #Names of types of visual human
-    humanTypesVisual = ["harmed", "unharmed", "stable"]
+    #Write the header
+    output.write(templates.header(height))
 
     #Id numbers used to give a unique but interable name to tile pieces
     tileId = 0
-    checkId = 0
-    trapId = 0
-    goalId = 0
-    swampId = 0
     humanId = 0
 
+    #The tiles are written straight into their group
+    tileGroupStart, tileGroupEnd = templates.group("WALLTILES")
+    output.write(tileGroupStart)
+
+    #Find which corners and external walls and notches are needed for every tile (looked up for each tile below)
+    corners, externals, notchLeft, notchRight, notchDirection = [a.tolist() for a in neighbourAnalysis(*tileArrays(walls))]
+
     #Iterate through all the tiles
     for x in range(0, len(walls[0])):
         for z in range(0, len(walls)):
-            #Check which corners and external walls and notches are needed
-            corners = checkForCorners([x, z], walls)
-            externals = checkForExternalWalls([x, z], walls)
-            notchData = checkForNotch([x, z], walls)
-            notch = ""
-            #Name to be given to the tile
-            tileName = "TILE"
-            if walls[z][x][4]:
-                tileName = "START_TILE"
-            #Set notch string to correct value
-            if notchData[0]:
-                notch = "left"
-            if notchData[1]:
-                notch = "right"
-            #Create a new tile with all the data
-            tile = protoTilePart.format(tileName, x, z, walls[z][x][0] and not walls[z][x][3], walls[z][x][1][0], walls[z][x][1][1], walls[z][x][1][2], walls[z][x][1][3], corners[0], corners[1], corners[2], corners[3], externals[0], externals[1], externals[2], externals[3], notch, notchData[2], walls[z][x][4], walls[z][x][3], walls[z][x][2], walls[z][x][5], width, height, tileId, tileScale[0], tileScale[1], tileScale[2])
-            tile = tile.replace("True", "TRUE")
-            tile = tile.replace("False", "FALSE")
-            allTiles = allTiles + tile
+            tile = walls[z][x]
+            notchData = (notchLeft[z][x], notchRight[z][x], notchRotations[notchDirection[z][x]])
+            #Special tiles are still written as tile nodes when merging (the supervisor reads them)
+            if not mergeWalls or MergedWalls.isSpecial(tile):
+                #Write a new tile with all the data
+                output.write(templates.tile(tile, x, z, corners[z][x], externals[z][x], notchData, width, height, tileId))
             #checkpoint
-            if walls[z][x][2]:
+            if tile[2]:
                 #Add bounds to the checkpoint boundaries
-                allCheckpointBounds = allCheckpointBounds + boundsPart.format("checkpoint", checkId, (x * 0.3 * tileScale[0] + startX) - (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) - (0.15 * tileScale[2]), (x * 0.3 * tileScale[0] + startX) + (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) + (0.15 * tileScale[2]), floorPos)
-                #Increment id counter
-                checkId = checkId + 1
-
+                allCheckpointBounds.append(templates.bounds("checkpoint", len(allCheckpointBounds), x, z, startX, startZ))
             #trap
-            if walls[z][x][3]:
+            if tile[3]:
                 #Add bounds to the trap boundaries
-                allTrapBounds = allTrapBounds + boundsPart.format("trap", trapId, (x * 0.3 * tileScale[0] + startX) - (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) - (0.15 * tileScale[2]), (x * 0.3 * tileScale[0] + startX) + (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) + (0.15 * tileScale[2]), floorPos)
-                #Increment id counter
-                trapId = trapId + 1
-
+                allTrapBounds.append(templates.bounds("trap", len(allTrapBounds), x, z, startX, startZ))
             #goal
-            if walls[z][x][4]:
+            if tile[4]:
                 #Add bounds to the goal boundaries
-                allGoalBounds = allGoalBounds + boundsPart.format("start", goalId, (x * 0.3 * tileScale[0] + startX) - (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) - (0.15 * tileScale[2]), (x * 0.3 * tileScale[0] + startX) + (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) + (0.15 * tileScale[2]), floorPos)
-                #Increment id counter
-                goalId = goalId + 1
+                allGoalBounds.append(templates.bounds("start", len(allGoalBounds), x, z, startX, startZ))
             #swamp
-            if walls[z][x][5]:
+            if tile[5]:
                 #Add bounds to the swamp boundaries
-                allSwampBounds = allSwampBounds + boundsPart.format("swamp", swampId, (x * 0.3 * tileScale[0] + startX) - (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) - (0.15 * tileScale[2]), (x * 0.3 * tileScale[0] + startX) + (0.15 * tileScale[0]), (z * 0.3 * tileScale[2] + startZ) + (0.15 * tileScale[2]), floorPos)
-                #Increment id counter
-                swampId = swampId + 1
+                allSwampBounds.append(templates.bounds("swamp", len(allSwampBounds), x, z, startX, startZ))
             #Increment id counter
             tileId = tileId + 1
 
             #Human
-            if walls[z][x][6] != 0:
-                #Position of tile
-                humanPos = [(x * 0.3 * tileScale[0]) + startX , (z * 0.3 * tileScale[2]) + startZ]
-                humanRot = humanRotation[walls[z][x][7]]
-                #Randomly move human left and right on wall
-                randomOffset = [0, 0]
-                if walls[z][x][7] in [0, 2]:
-                    #X offset for top and bottom
-                    randomOffset = [round(random.uniform(-0.08 * tileScale[0], 0.08 * tileScale[0]), 3), 0]
-                else:
-                    #Z offset for left and right
-                    randomOffset = [0, round(random.uniform(-0.08 * tileScale[2], 0.08 * tileScale[2]), 3)]
+            if tile[6] != 0:
+                humanX, humanZ, humanRot, humanType, score = placeHuman(tile, x, z, startX, startZ, rng)
                 #Thermal
-                if walls[z][x][6] == 4:
-                    humanPos[0] = humanPos[0] + humanOffsetThermal[walls[z][x][7]][0] + randomOffset[0]
-                    humanPos[1] = humanPos[1] + humanOffsetThermal[walls[z][x][7]][1] + randomOffset[1]
-                    score = 30
-                    if walls[z][x][8]:
-                        score = 10
-                    allHumans = allHumans + thermalHumanPart.format(humanPos[0], humanPos[1], humanRot, humanId, score)
+                if humanType == "thermal":
+                    allHumans.append(templates.thermalHuman(humanX, humanZ, humanRot, humanId, score))
                 else:
-                    humanPos[0] = humanPos[0] + humanOffset[walls[z][x][7]][0] + randomOffset[0]
-                    humanPos[1] = humanPos[1] + humanOffset[walls[z][x][7]][1] + randomOffset[1]
-                    score = 30
-                    if walls[z][x][8]:
-                        score = 10
-                    allHumans = allHumans + visualHumanPart.format(humanPos[0], humanPos[1], humanRot, humanId, humanTypesVisual[walls[z][x][6] - 1], score)
+                    allHumans.append(templates.visualHuman(humanX, humanZ, humanRot, humanId, humanType, score))
 
                 humanId = humanId + 1
 
+    if mergeWalls:
+        #Write the floors and walls of every tile as merged boxes
+        mergedStart, mergedEnd = templates.mergedGroup(startX, startZ)
+        output.write(mergedStart)
+        boxes = MergedWalls.mergedBoxes(walls, corners, externals, notchLeft, notchRight, notchDirection)
+        for kind in ["floor", "wall", "external"]:
+            for boxId, box in enumerate(boxes[kind]):
+                output.write(templates.mergedBox(kind, box, boxId))
+        output.write(mergedEnd)
 
+    output.write(tileGroupEnd)
 
+    #Add the boundaries to the file
+    writeGroup(output, allCheckpointBounds, "CHECKPOINTBOUNDS")
+    writeGroup(output, allTrapBounds, "TRAPBOUNDS")
+    writeGroup(output, allGoalBounds, "STARTBOUNDS")
+    writeGroup(output, allSwampBounds, "SWAMPBOUNDS")
 
-
-    #Add the data pieces to the file data
-    fileData = fileData + groupPart.format(allTiles, "WALLTILES")
-    fileData = fileData + groupPart.format(allCheckpointBounds, "CHECKPOINTBOUNDS")
-    fileData = fileData + groupPart.format(allTrapBounds, "TRAPBOUNDS")
-    fileData = fileData + groupPart.format(allGoalBounds, "STARTBOUNDS")
-    fileData = fileData + groupPart.format(allSwampBounds, "SWAMPBOUNDS")
-
-    #String to hold all the data for the obstacles
-    allObstacles = ""
-    allDebris = ""
-
-    #Id to give a unique name to the obstacles
-    obstacleId = 0
-    debrisId = 0
+    #Lists to hold all the data for the obstacles
+    allObstacles = []
+    allDebris = []
 
     #Iterate obstalces
     for obstacle in obstacles:
         #If this is debris
         if obstacle[0][3]:
-            #Add the debris object (scaled to world size)
-            allDebris = allDebris + debrisPart.format(debrisId, obstacle[0][0] * tileScale[0], obstacle[0][1] * tileScale[1], obstacle[0][2] * tileScale[2])
-            #Increment id counter
-            debrisId = debrisId + 1
+            #Add the debris object
+            allDebris.append(templates.obstacle(obstacle, len(allDebris)))
         else:
-            #Add the obstacle (scaled and positioned based on world scale)
-            allObstacles = allObstacles + obstaclePart.format(obstacleId, obstacle[0][0] * tileScale[0], obstacle[0][1] * tileScale[1], obstacle[0][2] * tileScale[2], obstacle[1][0] * tileScale[0], obstacle[1][1] * tileScale[1], obstacle[1][2] * tileScale[2], obstacle[1][3])
-            #Increment id counter
-            obstacleId = obstacleId + 1
+            #Add the obstacle
+            allObstacles.append(templates.obstacle(obstacle, len(allObstacles)))
 
     #Add obstacles and debris to the file
-    fileData = fileData + groupPart.format(allObstacles, "OBSTACLES")
-    fileData = fileData + groupPart.format(allDebris, "DEBRIS")
+    writeGroup(output, allObstacles, "OBSTACLES")
+    writeGroup(output, allDebris, "DEBRIS")
 
     #String to hold all the data for the robots (removed - now performed by supervisor)
     '''robotData = ""
@@ -432,24 +415,119 @@ def createFileData (walls, obstacles, startPos):
         robotData = robotData + robotPart.format(0, startPos[0][0] * 0.3 + startX, (startPos[0][1] * 0.3 + startZ) + 0.075, 1.5708)
         robotData = robotData + robotPart.format(1, startPos[0][0] * 0.3 + startX, (startPos[0][1] * 0.3 + startZ) - 0.075, 1.5708)'''
 
-    fileData = fileData + groupPart.format(allHumans, "HUMANGROUP")
-
-    #Add the robot data to the file
-    #fileData = fileData + robotPart.format(0)
+    writeGroup(output, allHumans, "HUMANGROUP")
 
     #Add supervisors
-    fileData = fileData + supervisorPart
+    output.write(templates.supervisor())
+
 
-    #Return the file data as a string
-    return fileData
+def createFileData (walls, obstacles, startPos, mergeWalls = False, rng = random) -> str:
+    '''Create a file data string from the positions and scales'''
+    output = io.StringIO()
+    writeFileData(output, walls, obstacles, startPos, mergeWalls, rng)
+    return output.getvalue()
+
+
+#Version of the compact map format (MapLoader in the supervisor checks it)
+#MapLoader has its own copy of these values and the node templates (SelfCheck checks they still match)
+mapFormat = 1
+#First bit of each part of a compact map tile code
+#[walls (4 bits: up, right, down, left), floor, corners (4 bits: top right, bottom right, bottom left, top left),
+#external walls (4 bits), left notch, right notch, notch direction (3 bits: 4 for none), start, trap, checkpoint, swamp]
+codeWalls = 0
+codeFloor = 4
+codeCorners = 5
+codeExternals = 9
+codeNotchLeft = 13
+codeNotchRight = 14
+codeNotchDirection = 15
+codeSpecial = 18
+
+
+def mapTileCodes (walls) -> np.ndarray:
+    '''Pack the values of every tile node into one integer per tile (see codeWalls to codeSpecial), returns a (height, width) array'''
+    present, wallSides = tileArrays(walls)
+    corners, externals, notchLeft, notchRight, notchDirection = neighbourAnalysis(present, wallSides)
+    #[start, trap, checkpoint, swamp] for each tile (the order of the tile node fields)
+    special = np.array([[[tile[4], tile[3], tile[2], tile[5]] for tile in row] for row in walls], dtype = bool).reshape(present.shape + (4,))
+    codes = (present & ~special[:, :, 1]).astype(np.int64) << codeFloor
+    for i in range(0, 4):
+        codes |= wallSides[:, :, i].astype(np.int64) << (codeWalls + i)
+        codes |= corners[:, :, i].astype(np.int64) << (codeCorners + i)
+        codes |= externals[:, :, i].astype(np.int64) << (codeExternals + i)
+        codes |= special[:, :, i].astype(np.int64) << (codeSpecial + i)
+    codes |= notchLeft.astype(np.int64) << codeNotchLeft
+    codes |= notchRight.astype(np.int64) << codeNotchRight
+    codes |= notchDirection.astype(np.int64) << codeNotchDirection
+    return codes
+
+
+def mapDescription (walls, obstacles, rng = random) -> dict:
+    '''Get the compact description of a world: the tile codes, humans [x, z, rotation, type, score] and
+    obstacles and debris [x size, y size, z size, x, y, z, rotation] (positions and sizes already scaled)'''
+    width = len(walls[0])
+    height = len(walls)
+    startX = -(width * (0.3 * tileScale[0]) / 2.0)
+    startZ = -(height * (0.3 * tileScale[2]) / 2.0)
 
+    #Humans are placed in the same order as the world file so a seed gives the same positions
+    humans = []
+    for x in range(0, width):
+        for z in range(0, height):
+            if walls[z][x][6] != 0:
+                humans.append(placeHuman(walls[z][x], x, z, startX, startZ, rng))
 
-def makeFile(boxData, obstacles, startPos, uiWindow = None):
-    '''Create and save the file for the information'''
-    #Generate the file string for the map
-    data = createFileData(boxData, obstacles, startPos)
+    allObstacles = []
+    allDebris = []
+    for obstacle in obstacles:
+        values = [obstacle[0][0] * tileScale[0], obstacle[0][1] * tileScale[1], obstacle[0][2] * tileScale[2], obstacle[1][0] * tileScale[0], obstacle[1][1] * tileScale[1], obstacle[1][2] * tileScale[2], obstacle[1][3]]
+        if obstacle[0][3]:
+            allDebris.append(values)
+        else:
+            allObstacles.append(values)
+
+    return {"format": mapFormat,
+            "width": width,
+            "height": height,
+            "scale": list(tileScale),
+            "tiles": mapTileCodes(walls).tolist(),
+            "humans": humans,
+            "obstacles": allObstacles,
+            "debris": allDebris}
+
+
+def writeMapData (output, walls, obstacles, rng = random) -> None:
+    '''Write the compact map file for the walls and obstacles to output (an open file or io stream)'''
+    json.dump(mapDescription(walls, obstacles, rng), output, separators = (",", ":"))
+
+
+def isMapPath (path: str) -> bool:
+    '''Whether a path is for a compact map file rather than a world file'''
+    return path.endswith(".json")
+
+
+def savePath (path: str) -> str:
+    '''Add the world file extension to a path chosen by the user unless it already ends in .wbt or .json (compact map)'''
+    if not path.endswith(".wbt") and not isMapPath(path):
+        path = path + ".wbt"
+    return path
+
+
+def makeBaseFile (filePath: str, mapPath: str, height = 8) -> None:
+    '''Save a world with no map in it that builds the scene from a compact map file when it starts
+    (mapPath is relative to the world's folder, the viewpoint is set for maps of the given height)'''
+    worldFile = open(filePath, "w")
+    worldFile.write(templates.header(height))
+    worldFile.write(templates.baseSupervisor(mapPath))
+    worldFile.close()
+
+
+def makeFile(boxData, obstacles, startPos, uiWindow = None, filePath = None, mergeWalls = False, rng = random):
+    '''Create and save the file for the information
+    Paths ending in .json are saved as a compact map file instead of a world file'''
     #The default file path
-    filePath = os.path.join(dirname, "generatedWorld.wbt")
+    if filePath == None:
+        filePath = os.path.join(dirname, "generatedWorld.wbt")
 
     #If there is a GUI window to use
     if uiWindow != None:
@@ -459,18 +537,80 @@ def makeFile(boxData, obstacles, startPos, uiWindow = None):
         path = path.strip()
         #If there is a path
         if path != "":
-            #If there isn't a .wbt extension on the file
-            if not path.endswith(".wbt"):
-                #Add the extension
-                path = path + ".wbt"
-            #Change the path to the one the user gave
-            filePath = path
+            #Change the path to the one the user gave (adding the extension if it is missing)
+            filePath = savePath(path)
         else:
             return
 
-    #Open the file to store the world in (cleared when opened)
+    with Profiler.stage("writeWorldFile"):
+        #Open the file to store the world in (cleared when opened) and write the world straight into it
+        worldFile = open(filePath, "w")
+        if isMapPath(filePath):
+            writeMapData(worldFile, boxData, obstacles, rng)
+        else:
+            writeFileData(worldFile, boxData, obstacles, startPos, mergeWalls, rng)
+        #Close the file
+        worldFile.close()
+
+
+def rowToWallData (row, y: int, startTile) -> list:
+    '''Convert a row of wall bit masks to the tile list format used by createFileData'''
+    data = []
+    for x, wall in enumerate(row.tolist()):
+        isStart = [x, y] == startTile
+        #[present, [uWall,rWall,dWall,lWall], checkpoint, trap, goal, swamp, humanType, humanWall, linearTile]
+        #(every wall of a perfect maze is joined to the outside so all tiles are linear)
+        data.append([True, [wall & 1 != 0, wall & 2 != 0, wall & 4 != 0, wall & 8 != 0], False, False, isStart, False, 0, 0, True])
+    return data
+
+
+def makeStreamedFile (rows, width: int, height: int, startTile, filePath: str) -> None:
+    '''Write a world file from an iterable of rows of wall bit masks (top row first) without holding the whole maze
+    Only three rows are kept at once (the neighbours needed for corners, external walls and notches)
+    Tiles are written row by row but given the same ids as createFileData (numbered column by column)'''
+    #Split the group template either side of its children
+    tileGroupStart, tileGroupEnd = templates.group("WALLTILES")
+
+    #Upper left corner to start placing tiles from
+    startX = -(width * (0.3 * tileScale[0]) / 2.0)
+    startZ = -(height * (0.3 * tileScale[2]) / 2.0)
+
+    #Row used above the first and below the last row (no tiles)
+    emptyRow = [[False, [False, False, False, False], False, False, False, False, 0, 0, False]] * width
+
     worldFile = open(filePath, "w")
-    #Write all the information to the file
-    worldFile.write(data)
-    #Close the file
+    worldFile.write(templates.header(height))
+    worldFile.write(tileGroupStart)
+
+    #Rows above, at and below the one being written
+    window = [emptyRow, emptyRow, emptyRow]
+    rowIterator = iter(rows)
+
+    #Read one row ahead so each row is written once the row below it is known
+    for z in range(-1, height):
+        nextRow = next(rowIterator, None)
+        window = [window[1], window[2], rowToWallData(nextRow, z + 1, startTile) if nextRow is not None else emptyRow]
+        if z < 0:
+            continue
+
+        #Find which corners and external walls and notches are needed (middle row of the window)
+        corners, externals, notchLeft, notchRight, notchDirection = [a[1].tolist() for a in neighbourAnalysis(*tileArrays(window))]
+        for x in range(0, width):
+            notchData = (notchLeft[x], notchRight[x], notchRotations[notchDirection[x]])
+            #Same id as the tile gets in createFileData (x then z)
+            tileId = x * height + z
+            worldFile.write(templates.tile(window[1][x], x, z, corners[x], externals[x], notchData, width, height, tileId))
+
+    worldFile.write(tileGroupEnd)
+
+    #Bounds for the start tile (the only special tile)
+    startBounds = templates.bounds("start", 0, startTile[0], startTile[1], startX, startZ)
+    writeGroup(worldFile, [], "CHECKPOINTBOUNDS")
+    writeGroup(worldFile, [], "TRAPBOUNDS")
+    writeGroup(worldFile, [startBounds], "STARTBOUNDS")
+    writeGroup(worldFile, [], "SWAMPBOUNDS")
+    writeGroup(worldFile, [], "OBSTACLES")
+    writeGroup(worldFile, [], "DEBRIS")
+    writeGroup(worldFile, [], "HUMANGROUP")
+    worldFile.write(templates.supervisor())
     worldFile.close()